@@ -0,0 +1,48 @@
+"""
+Background refresh of the analytics snapshot tables
+
+Every worker process runs its own refresher, and the snapshot is shared through the database.
+A worker skips a rebuild when another one refreshed the snapshot within the last half interval,
+so N workers do roughly one rebuild per interval instead of N (they may still overlap at
+startup). For exactly one refresher per deployment, set ANALYTICS_REFRESH_SECONDS=0 on every
+worker and run `python manage.py refresh-analytics` from cron.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from crud import get_pipeline_refreshed_at, refresh_pipeline_snapshot
+from database import SessionLocal
+
+# Seconds between pipeline snapshot rebuilds; 0 turns the in-process refresh off
+# (e.g. when `python manage.py refresh-analytics` runs from cron instead)
+ANALYTICS_REFRESH_SECONDS = float(os.getenv("ANALYTICS_REFRESH_SECONDS", "900"))
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_pipeline(fresh_for: Optional[float] = None):
+    """Rebuild the snapshot, unless it is less than `fresh_for` seconds old; returns the report or None"""
+    db = SessionLocal()
+    try:
+        if fresh_for is not None:
+            refreshed_at = get_pipeline_refreshed_at(db)
+            if refreshed_at is not None and datetime.utcnow() - refreshed_at < timedelta(seconds=fresh_for):
+                return None
+        return refresh_pipeline_snapshot(db)
+    finally:
+        db.close()
+
+
+async def refresh_periodically(interval: float = ANALYTICS_REFRESH_SECONDS):
+    """Rebuild the pipeline snapshot now and every `interval` seconds, in a worker thread off the event loop"""
+    while True:
+        try:
+            await run_in_threadpool(refresh_pipeline, interval / 2)
+        except Exception:
+            logger.exception("Pipeline snapshot refresh failed")
+        await asyncio.sleep(interval)
@@ -1,22 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from database import SessionLocal
-from models import User
+from sqlalchemy import event, inspect
+from database import Database, get_database
+from models import User, UserRole
+from cache import TTLCache
+import asyncio
 import hashlib
+import os
 
 # Configuration
 SECRET_KEY = "your-secret-key-here"  # In production, use environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# EventSource cannot send headers, so /events takes a token in the URL, where access logs keep it.
+# That token is a separate short-lived one only /events accepts; it is checked once, on connect.
+STREAM_TOKEN_EXPIRE_SECONDS = int(os.getenv("STREAM_TOKEN_EXPIRE_SECONDS", "60"))
+STREAM_TOKEN_SCOPE = "events"
+
+# Argon2 cost parameters (the defaults are passlib's). Every hash and verification holds
+# ARGON2_MEMORY_COST_KIB of memory; stored hashes made with other parameters are rehashed on the
+# next successful login.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST_KIB = int(os.getenv("ARGON2_MEMORY_COST_KIB", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+# Hashes computed at once, and how many more may wait before logins are refused with 503;
+# peak hashing memory is PASSWORD_HASH_WORKERS * ARGON2_MEMORY_COST_KIB. Hashing is CPU bound, so
+# a second worker on a single core only takes time from the other routes (README, load tests).
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
 
 # Use argon2 instead of bcrypt for better security and no length limits
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST_KIB,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+# Authenticated users keyed by token subject (email), so most requests skip the users lookup
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "60")),
+)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    # Drop the entry under the old subject too in case the email itself changed
+    for email in {target.email, *inspect(target).attrs.email.history.deleted}:
+        user_cache.invalidate(email)
+
+def _cacheable_user(user: User) -> User:
+    """Detached copy of the user's columns (minus the password hash) that can be shared across sessions"""
+    return User(**{
+        column.key: getattr(user, column.key)
+        for column in User.__table__.columns
+        if column.key != "hashed_password"
+    })
 
 def get_password_hash(password: str):
     """
@@ -30,6 +78,48 @@ def verify_password(plain_password: str, hashed_password: str):
     """
     return pwd_context.verify(plain_password, hashed_password)
 
+class PasswordHashPool:
+    """
+    Dedicated threads for argon2, so a burst of logins cannot occupy the threadpool every other
+    endpoint runs on. argon2-cffi releases the GIL while hashing, so threads hash in parallel.
+    At most `workers` hashes run and `queue` wait; beyond that run() refuses with 503 rather
+    than letting requests (and their memory) pile up.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue: int = PASSWORD_HASH_QUEUE):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.limit = workers + queue
+        self.pending = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args):
+        # Only touched on the event loop, so the counter needs no lock
+        if self.pending >= self.limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password checks in progress, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+password_pool = PasswordHashPool()
+
+async def hash_password(password: str) -> str:
+    """get_password_hash on the password pool"""
+    return await password_pool.run(get_password_hash, password)
+
+async def check_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify on the password pool. Also returns a new hash when the stored one was made with
+    other argon2 parameters (None otherwise), for the caller to store.
+    """
+    return await password_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -40,28 +130,63 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def create_stream_token(email: str) -> str:
+    return create_access_token(
+        {"sub": email, "scope": STREAM_TOKEN_SCOPE},
+        expires_delta=timedelta(seconds=STREAM_TOKEN_EXPIRE_SECONDS),
+    )
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _load_user(db, email: str):
+    user = db.query(User).filter(User.email == email).first()
+    return _cacheable_user(user) if user is not None else None
+
+async def _user_from_token(token: Optional[str], db: Database, scope: Optional[str] = None):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    if not token:
+        raise credentials_exception
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        # Stream tokens only open /events, and access tokens are never accepted in its URL
+        if email is None or payload.get("scope") != scope:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        user = await db.run(_load_user, email)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(email, user)
     return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Database = Depends(get_database)):
+    return await _user_from_token(token, db)
+
+async def get_stream_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    stream_token: Optional[str] = None,
+    db: Database = Depends(get_database),
+):
+    """get_current_user that also takes a create_stream_token token as ?stream_token=, for EventSource"""
+    try:
+        if token:
+            return await _user_from_token(token, db)
+        return await _user_from_token(stream_token, db, scope=STREAM_TOKEN_SCOPE)
+    finally:
+        # The stream outlives the request's dependencies; an AsyncSession would otherwise keep
+        # its pooled connection checked out until the client disconnects
+        await db.close()
+
+async def get_current_admin(current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return current_user
@@ -0,0 +1,79 @@
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from bulk import validation_messages
+from crud import apply_batch
+from database import Database
+from models import Contact, Interaction, Task, Deal
+from schemas import (
+    ContactCreate, ContactUpdate, ContactResponse,
+    InteractionCreate, InteractionUpdate, InteractionResponse,
+    TaskCreate, TaskUpdate, TaskResponse,
+    DealCreate, DealUpdate, DealResponse,
+    BatchAction, BatchEntity, BatchRequest,
+)
+from serialization import RowSerializer
+
+# entity: (model, create schema, update schema, response serializer)
+ENTITIES = {
+    BatchEntity.CONTACTS: (Contact, ContactCreate, ContactUpdate, RowSerializer(ContactResponse)),
+    BatchEntity.INTERACTIONS: (Interaction, InteractionCreate, InteractionUpdate, RowSerializer(InteractionResponse)),
+    BatchEntity.TASKS: (Task, TaskCreate, TaskUpdate, RowSerializer(TaskResponse)),
+    BatchEntity.DEALS: (Deal, DealCreate, DealUpdate, RowSerializer(DealResponse)),
+}
+
+CREATED, OK, NOT_FOUND, INVALID, FAILED_DEPENDENCY, SERVER_ERROR = 201, 200, 404, 422, 424, 500
+
+def _validate(operation):
+    """(action, model, id, data) for crud.apply_batch, or a list of error messages"""
+    model, create_schema, update_schema, _ = ENTITIES[operation.entity]
+    if operation.action != BatchAction.CREATE and operation.id is None:
+        return ["id: required for update and delete"]
+    try:
+        if operation.action == BatchAction.CREATE:
+            data = create_schema.model_validate(operation.data).model_dump()
+        elif operation.action == BatchAction.UPDATE:
+            data = update_schema.model_validate(operation.data).model_dump(exclude_unset=True)
+        else:
+            data = None
+    except ValidationError as exc:
+        return validation_messages(exc)
+    return operation.action.value, model, operation.id, data
+
+async def run_batch(db: Database, batch: BatchRequest, owner_id: int) -> dict:
+    """
+    Validate every operation, then apply the valid ones in a single transaction. Without
+    `atomic`, invalid or missing targets are reported and the rest is committed; with it,
+    any failure leaves the database untouched and the other operations are reported as 424.
+    """
+    results = [None] * len(batch.operations)
+    planned, planned_at = [], []
+    for index, operation in enumerate(batch.operations):
+        validated = _validate(operation)
+        if isinstance(validated, list):
+            results[index] = {"status": INVALID, "errors": validated}
+        else:
+            planned.append(validated)
+            planned_at.append((index, operation))
+
+    if batch.atomic and any(results):
+        return {"committed": False, "results": [result or {"status": FAILED_DEPENDENCY} for result in results]}
+
+    try:
+        committed, written = await db.run(apply_batch, owner_id, planned, atomic=batch.atomic)
+    except SQLAlchemyError as exc:
+        message = f"database error: {getattr(exc, 'orig', exc)}"
+        return {"committed": False, "results": [result or {"status": SERVER_ERROR, "errors": [message]} for result in results]}
+
+    for (index, operation), row in zip(planned_at, written):
+        if row is None:
+            results[index] = {"status": NOT_FOUND, "errors": ["not found"]}
+        elif not committed:
+            results[index] = {"status": FAILED_DEPENDENCY}
+        elif row is True:
+            results[index] = {"status": OK}
+        else:
+            serializer = ENTITIES[operation.entity][3]
+            status = CREATED if operation.action == BatchAction.CREATE else OK
+            results[index] = {"status": status, "data": serializer.dicts([row])[0]}
+    return {"committed": committed, "results": results}
@@ -0,0 +1,108 @@
+"""
+pytest-benchmark suite for the crud functions behind the hot endpoints, on a seeded datagen.py
+database. Not collected by the regular test run; run it explicitly:
+
+    pytest bench_crud.py --benchmark-autosave
+    pytest bench_crud.py --benchmark-compare --benchmark-compare-fail=median:20%
+
+--benchmark-autosave stores a JSON baseline under .benchmarks/; --benchmark-compare-fail exits
+non-zero when a benchmark regressed past the threshold. p95/p99 are recorded in each
+benchmark's extra_info.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import crud
+from benchmark import percentile
+from datagen import generate
+from schemas import ContactUpdate, DealFilter, TaskFilter
+from models import DealStage, TaskStatus
+
+USERS = 10
+CONTACTS_PER_USER = 1000
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('bench') / 'crm.db'}")
+    data = generate(engine, USERS, CONTACTS_PER_USER, seed=42, hashed_password="x")
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    crud.refresh_pipeline_snapshot(db)
+    yield db, data.user_ids[0]
+    db.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def timed(benchmark):
+    """benchmark(fn, *args) that also records the p95/p99 of the rounds, in ms"""
+    def run(fn, *args, **kwargs):
+        result = benchmark(fn, *args, **kwargs)
+        rounds = sorted(benchmark.stats.stats.data)
+        benchmark.extra_info["p95_ms"] = percentile(rounds, 0.95) * 1000
+        benchmark.extra_info["p99_ms"] = percentile(rounds, 0.99) * 1000
+        return result
+    return run
+
+
+def test_dashboard_stats(timed, dataset):
+    db, owner_id = dataset
+    timed(crud.get_dashboard_stats, db, owner_id)
+
+
+def test_contacts_first_page(timed, dataset):
+    db, owner_id = dataset
+    assert len(timed(crud.get_contacts, db, limit=20, user_id=owner_id)) == 20
+
+
+def test_contact_search(timed, dataset):
+    db, owner_id = dataset
+    timed(crud.search_contacts, db, owner_id, "grace hop")
+
+
+def test_open_tasks_by_due_date(timed, dataset):
+    db, owner_id = dataset
+    filters = TaskFilter(status=[TaskStatus.PENDING, TaskStatus.IN_PROGRESS], sort="due_date")
+    timed(crud.get_tasks, db, limit=20, user_id=owner_id, filters=filters)
+
+
+def test_deals_in_late_stages(timed, dataset):
+    db, owner_id = dataset
+    filters = DealFilter(stage=[DealStage.PROPOSAL, DealStage.NEGOTIATION], sort="-value")
+    timed(crud.get_deals, db, limit=20, user_id=owner_id, filters=filters, include_contact=True)
+
+
+def test_interactions_first_page(timed, dataset):
+    db, owner_id = dataset
+    timed(crud.get_interactions, db, limit=20, user_id=owner_id)
+
+
+def test_contact_overview(timed, dataset):
+    db, owner_id = dataset
+    contact_id = crud.get_contacts(db, limit=1, user_id=owner_id)[0].id
+    timed(crud.get_contact_overview, db, contact_id, owner_id)
+
+
+def test_full_sync(timed, dataset):
+    db, owner_id = dataset
+    timed(crud.get_changes, db, owner_id)
+
+
+def test_pipeline_analytics(timed, dataset):
+    db, owner_id = dataset
+    timed(crud.get_pipeline_analytics, db, [owner_id])
+
+
+def test_stage_funnel(timed, dataset):
+    db, owner_id = dataset
+    timed(crud.get_stage_funnel, db, owner_id)
+
+
+def test_update_contact(timed, dataset):
+    db, owner_id = dataset
+    contact_id = crud.get_contacts(db, limit=1, user_id=owner_id)[0].id
+    timed(crud.update_contact, db, contact_id, ContactUpdate(phone="+1-555-0100"), owner_id)
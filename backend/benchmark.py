@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for ZenCRM backend hot paths
+
+Seeds a throwaway SQLite database and times crud functions against it.
+
+Usage:
+    python benchmark.py dashboard --rows 100000 --runs 50
+    python benchmark.py bulk_import --rows 100000 --runs 3
+    python benchmark.py export --rows 100000
+    python benchmark.py search --rows 1000000 --owners 20
+    python benchmark.py projection --rows 10000
+    python benchmark.py serialize --rows 100000 --runs 5
+    python benchmark.py writes --rows 10000 --runs 200
+    python benchmark.py search --save-baseline search.json
+    python benchmark.py search --baseline search.json --tolerance 0.15
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import List
+
+# The API app is imported by some scenarios; keep its import-time setup off the real database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event, func, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import User, Contact, Interaction, Task, Deal, ContactStatus, TaskStatus, TaskPriority, DealStage, InteractionType
+from schemas import DashboardStats
+import crud
+
+
+FIRST_NAMES = ["Ada", "Alan", "Grace", "Linus", "Margaret", "Dennis", "Barbara", "Ken", "Radia", "Edsger",
+               "Frances", "Donald", "Katherine", "John", "Hedy", "Tim", "Shafi", "Guido", "Anita", "Bjarne"]
+LAST_NAMES = ["Lovelace", "Turing", "Hopper", "Torvalds", "Hamilton", "Ritchie", "Liskov", "Thompson", "Perlman",
+              "Dijkstra", "Allen", "Knuth", "Johnson", "McCarthy", "Lamarr", "Berners-Lee", "Goldwasser", "van Rossum",
+              "Borg", "Stroustrup"]
+
+
+def make_engine(path):
+    return create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+
+def seed(engine, rows, owners=1, seed_value=42):
+    """Bulk-insert `rows` contacts, tasks and deals (and rows // 10 interactions) spread over `owners` users"""
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {
+                "id": i + 1,
+                "email": f"user{i + 1}@example.com",
+                "hashed_password": "x",
+                "full_name": f"User {i + 1}",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(owners)
+        ])
+        names = [(rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)) for _ in range(rows)]
+        conn.execute(insert(Contact), [
+            {
+                "id": i + 1,
+                "first_name": names[i][0],
+                "last_name": names[i][1],
+                "email": f"{names[i][0]}.{names[i][1]}{i}@example.com".lower().replace(" ", ""),
+                "company": f"Company {i % 500}",
+                "status": rng.choice(list(ContactStatus)),
+                "owner_id": i % owners + 1,
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now - timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ])
+        conn.execute(insert(Task), [
+            {
+                "title": f"Task {i}",
+                "priority": rng.choice(list(TaskPriority)),
+                "status": rng.choice(list(TaskStatus)),
+                "due_date": now + timedelta(hours=rng.randint(-500, 500)),
+                "contact_id": i + 1,
+                "owner_id": i % owners + 1,
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now - timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ])
+        conn.execute(insert(Deal), [
+            {
+                "title": f"Deal {i}",
+                "value": round(rng.uniform(100, 100000), 2),
+                "stage": rng.choice(list(DealStage)),
+                "probability": rng.randint(0, 100),
+                "contact_id": i + 1,
+                "owner_id": i % owners + 1,
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now - timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ])
+        conn.execute(insert(Interaction), [
+            {
+                "type": rng.choice(list(InteractionType)),
+                "subject": f"Interaction {i}",
+                "contact_id": i * 10 + 1,
+                "user_id": i % owners + 1,
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(rows // 10)
+        ])
+
+
+class StatementCounter:
+    """Counts the SQL statements issued on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an ascending list"""
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * q) - 1))]
+
+
+def summarize(timings, elapsed):
+    """Throughput and latency percentiles of `timings` (ms) measured over `elapsed` seconds"""
+    ordered = sorted(timings)
+    return {
+        "count": len(ordered),
+        "throughput": len(ordered) / elapsed if elapsed else 0.0,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+    }
+
+
+# label -> summary of every run() in this invocation, for --save-baseline and --baseline
+RESULTS = {}
+
+
+def save_baseline(path, results, params):
+    params = {key: value for key, value in params.items() if key not in ("save_baseline", "baseline", "tolerance")}
+    with open(path, "w") as f:
+        json.dump({"created_at": datetime.utcnow().isoformat(), "params": params, "results": results}, f, indent=2, sort_keys=True)
+
+
+def compare_baseline(path, results, tolerance):
+    """
+    Lines describing every result that regressed against the baseline at `path` by more than
+    `tolerance` (0.2 = 20%): lower throughput or a higher p50/p95/p99
+    """
+    with open(path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for label, current in results.items():
+        before = baseline.get(label)
+        if before is None:
+            continue
+        if current["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {before['throughput']:.1f}/s -> {current['throughput']:.1f}/s")
+        for key in ("p50", "p95", "p99"):
+            if current[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{label}: {key} {before[key]:.2f}ms -> {current[key]:.2f}ms")
+    return regressions
+
+
+def report_baseline(args, results, params):
+    """Handle --save-baseline/--baseline; returns the exit status"""
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, params)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        regressions = compare_baseline(args.baseline, results, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+def add_baseline_arguments(parser):
+    parser.add_argument("--save-baseline", metavar="FILE", help="write throughput and p50/p95/p99 per label as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against a saved baseline; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging, 0.2 = 20%%")
+
+
+def run(label, fn, runs, counter):
+    fn()  # warm-up
+    timings = []
+    counter.count = 0
+    started = time.perf_counter()
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    summary = RESULTS[label] = summarize(timings, time.perf_counter() - started)
+    print(f"{label:<28} queries/call={counter.count / runs:>5.1f}  "
+          f"p50={summary['p50']:>8.2f}ms  p95={summary['p95']:>8.2f}ms  p99={summary['p99']:>8.2f}ms")
+
+
+def legacy_dashboard_stats(db, user_id):
+    """The per-status COUNT(*) implementation get_dashboard_stats replaced, kept as the baseline"""
+    q = db.query
+    deals_by_stage = {
+        stage.value: q(Deal).filter(Deal.owner_id == user_id, Deal.stage == stage).count()
+        for stage in DealStage
+    }
+    return DashboardStats(
+        total_contacts=q(Contact).filter(Contact.owner_id == user_id).count(),
+        total_leads=q(Contact).filter(Contact.owner_id == user_id, Contact.status == ContactStatus.LEAD).count(),
+        total_prospects=q(Contact).filter(Contact.owner_id == user_id, Contact.status == ContactStatus.PROSPECT).count(),
+        total_customers=q(Contact).filter(Contact.owner_id == user_id, Contact.status == ContactStatus.CUSTOMER).count(),
+        total_tasks=q(Task).filter(Task.owner_id == user_id).count(),
+        pending_tasks=q(Task).filter(Task.owner_id == user_id, Task.status == TaskStatus.PENDING).count(),
+        completed_tasks=q(Task).filter(Task.owner_id == user_id, Task.status == TaskStatus.COMPLETED).count(),
+        total_deals=q(Deal).filter(Deal.owner_id == user_id).count(),
+        total_deal_value=q(func.sum(Deal.value)).filter(Deal.owner_id == user_id).scalar() or 0,
+        deals_by_stage=deals_by_stage,
+        recent_interactions=q(Interaction).join(Contact).filter(Contact.owner_id == user_id)
+        .order_by(Interaction.created_at.desc()).limit(5).all(),
+    )
+
+
+def bench_dashboard(db, counter, args):
+    before = legacy_dashboard_stats(db, 1).model_dump()
+    after = crud.get_dashboard_stats(db, 1).model_dump()
+    # Float sums depend on summation order, so compare the value with a tolerance
+    assert abs(before.pop("total_deal_value") - after.pop("total_deal_value")) < 1e-3
+    assert before == after, "aggregated stats differ from the baseline"
+    run("before", lambda: legacy_dashboard_stats(db, 1), args.runs, counter)
+    run("after", lambda: crud.get_dashboard_stats(db, 1), args.runs, counter)
+
+
+def app_client(db, user_id=1):
+    """In-process client for the API, bound to the benchmark session and authenticated as `user_id`"""
+    from fastapi.testclient import TestClient
+    import auth
+    import database
+    import main
+
+    async def bench_database():
+        yield database.Database(db)
+
+    async def bench_user():
+        return db.get(User, user_id)
+
+    main.app.dependency_overrides[database.get_database] = bench_database
+    main.app.dependency_overrides[auth.get_current_user] = bench_user
+    return TestClient(main.app)
+
+
+def bench_bulk_import(db, counter, args):
+    client = app_client(db)
+    body = "\n".join(
+        json.dumps({"first_name": f"Bulk{i}", "last_name": "Import", "email": f"bulk{i}@example.com",
+                    "company": f"Company {i % 500}", "status": "prospect"})
+        for i in range(args.rows)
+    )
+    headers = {"Content-Type": "application/x-ndjson"}
+    for run_number in range(args.runs):
+        counter.count = 0
+        start = time.perf_counter()
+        report = client.post("/contacts/bulk", content=body, headers=headers).json()
+        elapsed = time.perf_counter() - start
+        assert report["created"] == args.rows, report["errors"][:3]
+        print(f"run {run_number + 1}: {args.rows} rows in {elapsed:.2f}s  "
+              f"rows/s={args.rows / elapsed:>9.0f}  statements={counter.count}")
+
+
+def bench_export(db, counter, args):
+    client = app_client(db)
+
+    def paged():
+        rows, skip = 0, 0
+        while True:
+            page = client.get(f"/contacts?pagination=offset&skip={skip}&limit=1000").json()
+            if not page:
+                return rows
+            rows += len(page)
+            skip += len(page)
+
+    def streamed(export_format):
+        # Drain the response body directly: TestClient would buffer all of it before returning
+        import database
+        from export import ExportFormat, export_response
+
+        async def drain():
+            response = export_response(database.Database(db), Contact, 1, ExportFormat(export_format), "contacts")
+            lines = 0
+            async for chunk in response.body_iterator:
+                lines += chunk.count("\n")
+            return lines
+
+        return asyncio.run(drain()) - (export_format == "csv")
+
+    for label, fn in [("paged", paged), ("csv", lambda: streamed("csv")), ("ndjson", lambda: streamed("ndjson"))]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = fn()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<8} {rows} rows in {elapsed:.2f}s  rows/s={rows / elapsed:>9.0f}  peak={peak / 2**20:>7.1f}MiB")
+
+
+def bench_search(db, counter, args):
+    for q in ["gr", "hop", "grace hopper", "grace hop", "company 42", "lovelace17"]:
+        found = len(crud.search_contacts(db, 1, q))
+        run(f"{q!r} ({found})", lambda: crud.search_contacts(db, 1, q), args.runs, counter)
+
+
+def bench_projection(db, counter, args):
+    # Seeded rows have no long text; give them realistic notes and descriptions first
+    db.execute(update(Contact).values(notes="Met at the conference. " * 40))
+    db.execute(update(Deal).values(description="Multi-year renewal with an expansion option. " * 20))
+    db.commit()
+    client = app_client(db)
+    for path in ["/contacts?limit=100", "/contacts?limit=100&fields=id,first_name,last_name,company,status",
+                 "/deals?limit=100", "/deals?limit=100&fields=id,title,value,stage"]:
+        size = len(client.get(path).content)
+        run(f"{path.split('?')[0]} {'fields' if 'fields' in path else 'full'} {size / 1024:.0f}KiB",
+            lambda: client.get(path), args.runs, counter)
+
+
+def bench_serialize(db, counter, args):
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from schemas import ContactResponse, InteractionResponse, TaskResponse, DealResponse
+    from serialization import ORJSONResponse, RowSerializer
+
+    entities = [
+        ("contacts", crud.get_contacts, ContactResponse),
+        ("interactions", crud.get_interactions, InteractionResponse),
+        ("tasks", crud.get_tasks, TaskResponse),
+        ("deals", crud.get_deals, DealResponse),
+    ]
+    for name, get_rows, schema in entities:
+        adapter = TypeAdapter(List[schema])
+        serializer = RowSerializer(schema)
+        variants = [
+            # What FastAPI does with response_model: validate every row, then dump to JSON
+            ("response_model", lambda rows: adapter.dump_json(adapter.validate_python(rows, from_attributes=True))),
+            ("stdlib json", lambda rows: json.dumps(jsonable_encoder([schema.model_validate(row) for row in rows])).encode()),
+            ("rows+orjson", lambda rows: ORJSONResponse(serializer.dicts(rows)).body),
+        ]
+        for size in (1000, 10000):
+            rows = get_rows(db, limit=size, user_id=1)
+            if len(rows) < size:
+                print(f"{name} x{size}: only {len(rows)} rows seeded, skipped (raise --rows)")
+                continue
+            for label, serialize in variants:
+                serialize(rows)  # warm-up
+                timings = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    serialize(rows)
+                    timings.append((time.perf_counter() - start) * 1000)
+                print(f"{name:<12} x{size:<6} {label:<15} p50={statistics.median(timings):>9.2f}ms  "
+                      f"rows/s={size / statistics.median(timings) * 1000:>10.0f}")
+
+
+def bench_writes(db, counter, args):
+    client = app_client(db)
+
+    def ok(response):
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    # path, create body, plain update, updates (applied alternately) that move the owner_stats rollup
+    entities = [
+        ("contacts", {"first_name": "W", "last_name": "Rite"}, {"phone": "555"}, [{"status": "customer"}, {"status": "lead"}]),
+        ("interactions", {"type": "note", "subject": "W", "contact_id": 1}, {"type": "note", "subject": "Edited"}, None),
+        ("tasks", {"title": "W", "contact_id": 1}, {"description": "Edited"}, [{"status": "completed"}, {"status": "pending"}]),
+        ("deals", {"title": "W", "value": 10, "contact_id": 1}, {"description": "Edited"}, [{"stage": "proposal"}, {"stage": "negotiation"}]),
+    ]
+    for path, create, edit, rollup in entities:
+        created = []
+        run(f"POST /{path}", lambda: created.append(ok(client.post(f"/{path}", json=create))["id"]), args.runs, counter)
+        run(f"PUT /{path}", lambda: ok(client.put(f"/{path}/{created[0]}", json=edit)), args.runs, counter)
+        if rollup:
+            bodies = itertools.cycle(rollup)
+            run(f"PUT /{path} {next(iter(rollup[0]))}", lambda: ok(client.put(f"/{path}/{created[0]}", json=next(bodies))), args.runs, counter)
+        run(f"DELETE /{path}", lambda: ok(client.delete(f"/{path}/{created.pop()}")), args.runs, counter)
+
+
+SCENARIOS = {
+    "dashboard": bench_dashboard,
+    "bulk_import": bench_bulk_import,
+    "export": bench_export,
+    "search": bench_search,
+    "projection": bench_projection,
+    "serialize": bench_serialize,
+    "writes": bench_writes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--rows", type=int, default=100000, help="contacts, tasks and deals to seed")
+    parser.add_argument("--owners", type=int, default=1, help="users the seeded rows are spread over")
+    parser.add_argument("--runs", type=int, default=50, help="timed iterations per variant")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        seed(engine, args.rows, args.owners)
+        print(f"seeded {args.rows} rows/table in {time.perf_counter() - start:.1f}s")
+        counter = StatementCounter(engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        try:
+            SCENARIOS[args.scenario](db, counter, args)
+        finally:
+            db.close()
+            engine.dispose()
+    sys.exit(report_baseline(args, RESULTS, vars(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import csv
+import json
+from typing import AsyncIterator, Tuple
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from crud import bulk_create
+from database import Database
+
+# Rows per multi-row INSERT / transaction; keeps the bind count well under SQLite's limit
+BULK_CHUNK_SIZE = 500
+
+FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+class UndecodableLine(ValueError):
+    def __init__(self, line_number: int):
+        super().__init__(f"Line {line_number} is not valid UTF-8")
+        self.line_number = line_number
+
+def _decode(line: bytes, line_number: int) -> str:
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        raise UndecodableLine(line_number)
+
+async def _lines(request: Request) -> AsyncIterator[str]:
+    """Decode the request body line by line as it arrives"""
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield _decode(line, line_number)
+    if buffer:
+        yield _decode(buffer, line_number + 1)
+
+async def _csv_records(request: Request) -> AsyncIterator[str]:
+    """Join physical lines into CSV records, since quoted fields may contain newlines"""
+    pending = None
+    async for line in _lines(request):
+        pending = line if pending is None else f"{pending}\n{line}"
+        # An odd number of quotes means a quoted field is still open
+        if pending.count('"') % 2 == 0:
+            yield pending
+            pending = None
+    if pending is not None:
+        yield pending
+
+async def iter_records(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yield (row number, record) for a JSON array, NDJSON or CSV body picked by Content-Type.
+    A record that cannot be decoded is yielded as the exception instead.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    body_format = FORMATS.get(content_type)
+    if body_format is None:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
+
+    if body_format == "json":
+        try:
+            records = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body is not valid JSON")
+        if not isinstance(records, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of rows")
+        for row_number, record in enumerate(records, 1):
+            yield row_number, record
+
+    elif body_format == "ndjson":
+        row_number = 0
+        async for line in _lines(request):
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except ValueError as exc:
+                yield row_number, exc
+
+    else:
+        header = None
+        row_number = 0
+        async for record in _csv_records(request):
+            if not record.strip():
+                continue
+            values = next(csv.reader([record]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row_number += 1
+            if len(values) != len(header):
+                yield row_number, ValueError(f"expected {len(header)} columns, got {len(values)}")
+                continue
+            # Empty cells fall back to the schema defaults
+            yield row_number, {name: value for name, value in zip(header, values) if value != ""}
+
+def validation_messages(exc: ValidationError):
+    return [f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()]
+
+async def _checked_records(request: Request, report: dict):
+    try:
+        async for item in iter_records(request):
+            yield item
+    except UndecodableLine as exc:
+        # Earlier chunks are already committed; say how far the import got
+        raise HTTPException(status_code=400, detail=f"{exc}; {report['created']} rows before it were imported")
+
+async def import_records(db: Database, request: Request, schema, model, owner_id: int) -> dict:
+    """
+    Validate streamed rows through `schema` and insert the valid ones in chunks of
+    BULK_CHUNK_SIZE, one transaction per chunk. Returns a per-row error report.
+    """
+    report = {"received": 0, "created": 0, "failed": 0, "errors": []}
+    chunk, chunk_rows = [], []
+
+    async def flush():
+        try:
+            report["created"] += await db.run(bulk_create, model, chunk, owner_id)
+        except SQLAlchemyError as exc:
+            message = f"database error: {getattr(exc, 'orig', exc)}"
+            report["errors"].extend({"row": row_number, "errors": [message]} for row_number in chunk_rows)
+        chunk.clear()
+        chunk_rows.clear()
+
+    async for row_number, record in _checked_records(request, report):
+        report["received"] += 1
+        if isinstance(record, Exception):
+            report["errors"].append({"row": row_number, "errors": [str(record)]})
+            continue
+        if not isinstance(record, dict):
+            report["errors"].append({"row": row_number, "errors": ["row: expected an object"]})
+            continue
+        try:
+            chunk.append(schema.model_validate(record).model_dump())
+        except ValidationError as exc:
+            report["errors"].append({"row": row_number, "errors": validation_messages(exc)})
+            continue
+        chunk_rows.append(row_number)
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+
+    report["failed"] = len(report["errors"])
+    return report
@@ -0,0 +1,94 @@
+"""
+Shared pytest fixtures - every test gets its own in-memory SQLite database
+"""
+import os
+
+# Keep main.py's import-time create_all away from the real database file
+os.environ["DATABASE_URL"] = "sqlite://"
+# No background analytics refresh or reminder scheduler; tests drive them explicitly
+os.environ["ANALYTICS_REFRESH_SECONDS"] = "0"
+os.environ["REMINDERS_ENABLED"] = "false"
+# Cheap argon2 parameters; the hashing code path is the same
+os.environ["ARGON2_TIME_COST"] = "1"
+os.environ["ARGON2_MEMORY_COST_KIB"] = "1024"
+os.environ["ARGON2_PARALLELISM"] = "1"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+import models  # noqa: F401 - registers the tables on Base.metadata
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(engine):
+    import auth
+    import database
+    import main
+
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    async def override_get_database():
+        session = Session()
+        try:
+            yield database.Database(session)
+        finally:
+            session.close()
+
+    main.app.dependency_overrides[database.get_database] = override_get_database
+    auth.user_cache.clear()
+    with TestClient(main.app) as test_client:
+        yield test_client
+    main.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def auth_headers(client):
+    client.post("/register", json={"email": "owner@example.com", "password": "secret1", "full_name": "Owner"})
+    token = client.post("/token", data={"username": "owner@example.com", "password": "secret1"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def other_headers(client):
+    """Bearer headers of a second user, for owner-scoping tests"""
+    client.post("/register", json={"email": "other@example.com", "password": "secret1", "full_name": "Other"})
+    token = client.post("/token", data={"username": "other@example.com", "password": "secret1"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def count_statements(engine):
+    """The SQL statements run on `engine`, in order; clear() it to start counting mid-test"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
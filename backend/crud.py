@@ -1,18 +1,365 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+import logging
+import math
+import re
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy import column, delete, func, insert, literal, literal_column, select, table, update
+from sqlalchemy.exc import SQLAlchemyError
+from collections.abc import Mapping
 from typing import List, Optional
-from models import User, Contact, Interaction, Task, Deal, ContactStatus, TaskStatus, DealStage
-from schemas import UserCreate, ContactCreate, ContactUpdate, InteractionCreate, InteractionUpdate, TaskCreate, TaskUpdate, DealCreate, DealUpdate, DashboardStats
+from datetime import datetime
+from models import CONTACT_SEARCH_COLUMNS, User, UserRole, Contact, Interaction, Task, Deal, OwnerStats, CollectionVersion, Tombstone, DealStageEvent, PipelineStageSnapshot, PipelineForecastSnapshot, ContactStatus, TaskStatus, DealStage
+from pagination import Keyset
+from schemas import UserCreate, ContactCreate, ContactUpdate, InteractionCreate, InteractionUpdate, TaskCreate, TaskUpdate, DealCreate, DealUpdate, ContactFilter, ContactSort, TaskFilter, TaskSort, DealFilter, DealSort, DashboardStats, StatsDrift, RebuildStatsReport, ForecastMonth, StageSummary, StageConversion, OwnerPipeline, PipelineAnalytics, StageDuration, StageDurationReport, FunnelStep, FunnelReport, PipelineRefreshReport
+
+logger = logging.getLogger(__name__)
+
+# List ordering for keyset (cursor) pagination
+USER_KEYSET = Keyset(User.id)
+CONTACT_KEYSET = Keyset(Contact.id)
+INTERACTION_KEYSET = Keyset(Interaction.created_at, Interaction.id, descending=True)
+TASK_KEYSET = Keyset(Task.id)
+DEAL_KEYSET = Keyset(Deal.id)
+
+def _sort_keysets(model, sort_enum):
+    """Keyset per sort option; "-field" sorts descending, and id breaks ties"""
+    keysets = {}
+    for sort in sort_enum:
+        name = sort.value.lstrip("-")
+        columns = [getattr(model, name)] + ([model.id] if name != "id" else [])
+        keysets[sort] = Keyset(*columns, descending=sort.value.startswith("-"))
+    return keysets
+
+def _load_only(query, model, fields: Optional[List[str]], keyset: Keyset, include_contact: bool = False):
+    """Narrow the SELECT to `fields`, plus the keyset columns the next cursor is encoded from"""
+    if fields:
+        also = ["contact_id"] if include_contact else []
+        names = dict.fromkeys([*fields, *also, *(column.key for column in keyset.columns)])
+        query = query.options(load_only(*[getattr(model, name) for name in names]))
+    return query
+
+CONTACT_SUMMARY_COLUMNS = [Contact.first_name, Contact.last_name, Contact.email, Contact.company]
+
+def _with_contact(query, model, owner_id: int):
+    """Load each row's contact summary with one extra SELECT ... WHERE id IN (...), limited to the owner's contacts"""
+    return query.options(selectinload(model.contact.and_(Contact.owner_id == owner_id)).load_only(*CONTACT_SUMMARY_COLUMNS))
+
+CONTACT_SORTS = _sort_keysets(Contact, ContactSort)
+TASK_SORTS = _sort_keysets(Task, TaskSort)
+DEAL_SORTS = _sort_keysets(Deal, DealSort)
+
+# Contact full-text search; the index itself is defined next to the Contact model
+CONTACTS_FTS = table("contacts_fts", column("rowid"), column("rank"), column("contacts_fts"))
+SEARCH_TERM = re.compile(r"[^\W_]+")
+
+ROLLUP_COLUMNS = [column.name for column in OwnerStats.__table__.columns if column.name != "owner_id"]
+
+# Owner stats rollup
+def _rollup_entry(obj, model=None):
+    """
+    Return (owner_id, {owner_stats column: amount}) that one contact, task or deal contributes.
+    `obj` is a model instance, or a mapping of column values for `model`. Other models contribute None.
+    """
+    model = model or type(obj)
+    get = obj.get if isinstance(obj, Mapping) else lambda key: getattr(obj, key)
+    if model is Contact:
+        counts = {"total_contacts": 1}
+        if get("status") is not None:
+            counts[f"{ContactStatus(get('status')).value}_contacts"] = 1
+    elif model is Task:
+        counts = {"total_tasks": 1}
+        if get("status") is not None:
+            counts[f"{TaskStatus(get('status')).value}_tasks"] = 1
+    elif model is Deal:
+        counts = {"total_deals": 1, "total_deal_value": get("value") or 0}
+        if get("stage") is not None:
+            counts[f"{DealStage(get('stage')).value}_deals"] = 1
+    else:
+        return None
+    return get("owner_id"), counts
+
+def _add_rollup(deltas: dict, entry, sign: int):
+    """Accumulate a rollup entry into per-owner deltas"""
+    if entry is None or entry[0] is None:
+        return
+    owner_id, counts = entry
+    owner_deltas = deltas.setdefault(owner_id, {})
+    for column, amount in counts.items():
+        owner_deltas[column] = owner_deltas.get(column, 0) + sign * amount
+
+def _apply_rollup(db: Session, deltas: dict):
+    """
+    Add per-owner deltas to owner_stats inside the caller's transaction.
+    Owners without a rollup row get one computed from scratch.
+    """
+    db.flush()
+    for owner_id, owner_deltas in deltas.items():
+        values = {column: getattr(OwnerStats, column) + amount for column, amount in owner_deltas.items() if amount}
+        if not values:
+            continue
+        result = db.execute(
+            update(OwnerStats).where(OwnerStats.owner_id == owner_id).values(values),
+            execution_options={"synchronize_session": False},
+        )
+        if result.rowcount == 0:
+            # The flushed change is already visible to the aggregate queries
+            db.add(OwnerStats(owner_id=owner_id, **compute_owner_stats(db, owner_id)[owner_id]))
+
+def _update_rollup(db: Session, before, after):
+    """Move a row's contribution in owner_stats from `before` to `after` (rollup entries, either may be None)"""
+    if before == after:
+        return
+    deltas = {}
+    _add_rollup(deltas, before, -1)
+    _add_rollup(deltas, after, 1)
+    _apply_rollup(db, deltas)
+
+def compute_owner_stats(db: Session, owner_id: Optional[int] = None):
+    """Recompute rollup values from the source tables, for one owner or all of them"""
+    totals = {}
+
+    def owner_totals(oid):
+        return totals.setdefault(oid, dict.fromkeys(ROLLUP_COLUMNS, 0))
+
+    if owner_id is not None:
+        owner_totals(owner_id)
+
+    def grouped(*columns, model):
+        query = db.query(model.owner_id, *columns).group_by(model.owner_id, columns[0])
+        if owner_id is not None:
+            query = query.filter(model.owner_id == owner_id)
+        return query.all()
+
+    # One grouped aggregate per table keeps the number of round-trips constant
+    # no matter how many statuses/stages the enums grow to
+    for oid, status, count in grouped(Contact.status, func.count(Contact.id), model=Contact):
+        row = owner_totals(oid)
+        row["total_contacts"] += count
+        if status is not None:
+            row[f"{status.value}_contacts"] = count
+    for oid, status, count in grouped(Task.status, func.count(Task.id), model=Task):
+        row = owner_totals(oid)
+        row["total_tasks"] += count
+        if status is not None:
+            row[f"{status.value}_tasks"] = count
+    for oid, stage, count, value in grouped(Deal.stage, func.count(Deal.id), func.sum(Deal.value), model=Deal):
+        row = owner_totals(oid)
+        row["total_deals"] += count
+        row["total_deal_value"] += value or 0
+        if stage is not None:
+            row[f"{stage.value}_deals"] = count
+    totals.pop(None, None)
+    return totals
+
+def rebuild_stats(db: Session):
+    """Recompute owner_stats from scratch, report every counter that had drifted and store the fixed values"""
+    actual = compute_owner_stats(db)
+    for (user_id,) in db.query(User.id).all():
+        actual.setdefault(user_id, dict.fromkeys(ROLLUP_COLUMNS, 0))
+    stored = {row.owner_id: row for row in db.query(OwnerStats).all()}
+
+    drift = []
+    for owner_id, values in sorted(actual.items()):
+        row = stored.get(owner_id)
+        if row is None:
+            row = OwnerStats(owner_id=owner_id)
+            db.add(row)
+        for column, value in values.items():
+            current = getattr(row, column)
+            if current is None or abs(current - value) > 1e-6:
+                if owner_id in stored:
+                    drift.append(StatsDrift(owner_id=owner_id, field=column, stored=current, actual=value))
+                setattr(row, column, value)
+    missing = sorted(set(actual) - set(stored))
+    db.commit()
+    return RebuildStatsReport(owners_checked=len(actual), missing_owners=missing, drift=drift)
+
+# Collection versions: one counter per owner and collection, bumped in the same transaction
+# as every write so conditional GETs can be answered without touching the rows. Each written
+# row is stamped with the new version (and each delete leaves a tombstone) for /sync.
+COLLECTIONS = {Contact: "contacts", Interaction: "interactions", Task: "tasks", Deal: "deals"}
+OWNER_COLUMNS = {Contact: Contact.owner_id, Interaction: Interaction.user_id, Task: Task.owner_id, Deal: Deal.owner_id}
+
+def _bump_version(db: Session, owner_id: Optional[int], model) -> Optional[int]:
+    """Increment the owner's version of `model`'s collection and return the new value"""
+    if owner_id is None:
+        return None
+    now = datetime.utcnow()
+    # The UPDATE locks the counter row until commit, so versions are handed out in commit order
+    version = db.execute(
+        update(CollectionVersion)
+        .where(CollectionVersion.owner_id == owner_id, CollectionVersion.collection == COLLECTIONS[model])
+        .values(version=CollectionVersion.version + 1, changed_at=now)
+        .returning(CollectionVersion.version),
+        execution_options={"synchronize_session": False},
+    ).scalar_one_or_none()
+    if version is None:
+        version = 1
+        db.add(CollectionVersion(owner_id=owner_id, collection=COLLECTIONS[model], version=version, changed_at=now))
+    return version
+
+def _add_tombstone(db: Session, owner_id: Optional[int], model, object_id: int):
+    version = _bump_version(db, owner_id, model)
+    if version is not None:
+        db.add(Tombstone(owner_id=owner_id, collection=COLLECTIONS[model], object_id=object_id, sync_version=version))
+
+# Write listeners: callables run as listener(model, action, row) after each committed create,
+# update or delete ("row" is the written row, or the deleted one), to keep in-process state
+# such as the reminder scheduler in step with the tables. A listener must not block.
+WRITE_LISTENERS = []
+
+def _notify(model, action: str, rows):
+    for listener in WRITE_LISTENERS:
+        for row in rows:
+            try:
+                listener(model, action, row)
+            except Exception:
+                # The write is already committed; a broken listener must not fail the request
+                logger.exception("Write listener %r failed", listener)
+
+# Deal stage history: one append-only event per stage change, written in the deal's transaction.
+# Each event carries the time spent in the stage being left, so duration and funnel reports over
+# a date range are a single (owner_id, changed_at) range scan.
+def _stage_event(deal_id: int, owner_id: int, from_stage, to_stage, changed_at: datetime, entered_at: Optional[datetime] = None):
+    return {
+        "deal_id": deal_id, "owner_id": owner_id, "from_stage": from_stage, "to_stage": to_stage, "changed_at": changed_at,
+        "seconds_in_from_stage": (changed_at - entered_at).total_seconds() if entered_at is not None else None,
+    }
+
+def _stage_entered_at(db: Session, created_at: dict):
+    """{deal id: when it entered its current stage} for deals given as {id: created_at}; deals without history count from creation"""
+    entered = dict(db.execute(
+        select(DealStageEvent.deal_id, func.max(DealStageEvent.changed_at))
+        .where(DealStageEvent.deal_id.in_(created_at)).group_by(DealStageEvent.deal_id)
+    ).all())
+    return {deal_id: entered.get(deal_id) or created for deal_id, created in created_at.items()}
+
+def _add_stage_events(db: Session, events: List[dict]):
+    if events:
+        db.execute(insert(DealStageEvent.__table__), events)
+
+# Single-row writes: one INSERT/UPDATE/DELETE ... RETURNING per mutation, scoped to the owner,
+# instead of loading the row first and refreshing it after the commit. The returned rows are
+# plain result rows, so the commit does not expire them.
+ROLLUP_FIELDS = {Contact: {"status"}, Task: {"status"}, Deal: {"stage", "value"}}
+
+def _insert_row(db: Session, model, values: dict, owner_id: int):
+    table = model.__table__
+    values = {**values, OWNER_COLUMNS[model].key: owner_id, "sync_version": _bump_version(db, owner_id, model)}
+    row = db.execute(insert(table).values(values).returning(*table.c)).one()
+    _update_rollup(db, None, _rollup_entry(row._mapping, model))
+    if model is Deal and row.stage is not None:
+        _add_stage_events(db, [_stage_event(row.id, owner_id, None, row.stage, row.created_at)])
+    db.commit()
+    _notify(model, "create", [row])
+    return row
+
+def _update_row(db: Session, model, object_id: int, values: dict, owner_id: int):
+    """Update the owner's row, reading its old values first only when the change moves owner_stats"""
+    table = model.__table__
+    where = (table.c.id == object_id, OWNER_COLUMNS[model] == owner_id)
+    old = before = None
+    rollup_fields = ROLLUP_FIELDS.get(model, set())
+    if rollup_fields & values.keys():
+        old = db.execute(select(table.c.owner_id, *[table.c[name] for name in sorted(rollup_fields)]).where(*where)).one_or_none()
+        if old is None:
+            return None
+        before = _rollup_entry(old._mapping, model)
+    values = {**values, "sync_version": _bump_version(db, owner_id, model)}
+    row = db.execute(update(table).where(*where).values(values).returning(*table.c)).one_or_none()
+    if row is None:
+        db.rollback()
+        return None
+    if before is not None:
+        _update_rollup(db, before, _rollup_entry(row._mapping, model))
+    if model is Deal and old is not None and row.stage != old.stage and row.stage is not None:
+        entered_at = _stage_entered_at(db, {row.id: row.created_at})[row.id]
+        _add_stage_events(db, [_stage_event(row.id, owner_id, old.stage, row.stage, row.updated_at, entered_at)])
+    db.commit()
+    _notify(model, "update", [row])
+    return row
+
+def _delete_row(db: Session, model, object_id: int, owner_id: int) -> bool:
+    table = model.__table__
+    row = db.execute(
+        delete(table).where(table.c.id == object_id, OWNER_COLUMNS[model] == owner_id).returning(*table.c)
+    ).one_or_none()
+    if row is None:
+        db.rollback()
+        return False
+    _update_rollup(db, _rollup_entry(row._mapping, model), None)
+    _add_tombstone(db, owner_id, model, object_id)
+    if model is Contact:
+        _detach_from_contact(db, object_id)
+    db.commit()
+    _notify(model, "delete", [row])
+    return True
+
+def _detach_from_contact(db: Session, contact_id: int):
+    """Null contact_id on a deleted contact's interactions, tasks and deals, as the ORM delete did"""
+    for model in (Interaction, Task, Deal):
+        table = model.__table__
+        owner = table.c[OWNER_COLUMNS[model].key]
+        detached = db.execute(
+            update(table).where(table.c.contact_id == contact_id).values(contact_id=None).returning(table.c.id, owner)
+        ).all()
+        by_owner = {}
+        for object_id, owner_id in detached:
+            by_owner.setdefault(owner_id, []).append(object_id)
+        for owner_id, ids in by_owner.items():
+            version = _bump_version(db, owner_id, model)
+            db.execute(update(table).where(table.c.id.in_(ids)).values(sync_version=version))
+
+def get_collection_versions(db: Session, owner_id: int, collections: List[str]):
+    """{collection: (version, changed_at)} for one owner; collections never written to are (0, None)"""
+    versions = dict.fromkeys(collections, (0, None))
+    rows = db.query(CollectionVersion).filter(
+        CollectionVersion.owner_id == owner_id, CollectionVersion.collection.in_(collections)
+    )
+    for row in rows:
+        versions[row.collection] = (row.version, row.changed_at)
+    return versions
+
+def get_changes(db: Session, owner_id: int, since: Optional[dict] = None):
+    """
+    Rows of each collection written after the `since` versions ({collection: version}), and the
+    ids deleted since then. A collection with no `since` version (or one ahead of the server's,
+    e.g. after a restore) is returned in full and listed in "reset". The versions are read first,
+    so the returned ones are a safe `since` for the next call.
+    """
+    versions = {name: version for name, (version, _) in get_collection_versions(db, owner_id, list(COLLECTIONS.values())).items()}
+    changes = {"versions": versions, "reset": [], "deleted": {}}
+    for model, name in COLLECTIONS.items():
+        owner = OWNER_COLUMNS[model]
+        after = (since or {}).get(name)
+        if after is None or after > versions[name]:
+            changes["reset"].append(name)
+            changes[name] = db.query(model).filter(owner == owner_id).order_by(model.id).all()
+            changes["deleted"][name] = []
+        elif after == versions[name]:
+            changes[name] = []
+            changes["deleted"][name] = []
+        else:
+            changes[name] = db.query(model).filter(owner == owner_id, model.sync_version > after).order_by(model.id).all()
+            deleted = db.query(Tombstone.object_id).filter(
+                Tombstone.owner_id == owner_id, Tombstone.collection == name, Tombstone.sync_version > after
+            )
+            # SQLite can hand a deleted id to a new row; the live row wins
+            live = {row.id for row in changes[name]}
+            changes["deleted"][name] = sorted({object_id for object_id, in deleted} - live)
+    return changes
 
 # User CRUD operations
-def create_user(db: Session, user: UserCreate, hashed_password: str):
+def create_user(db: Session, user: UserCreate, hashed_password: str, role: UserRole = UserRole.USER):
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
         full_name=user.full_name,
-        role=user.role
+        role=role
     )
     db.add(db_user)
+    db.flush()
+    db.add(OwnerStats(owner_id=db_user.id, **dict.fromkeys(ROLLUP_COLUMNS, 0)))
+    db.add_all([CollectionVersion(owner_id=db_user.id, collection=name, version=0) for name in COLLECTIONS.values()])
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -20,188 +367,531 @@ def create_user(db: Session, user: UserCreate, hashed_password: str):
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+def update_password_hash(db: Session, user_id: int, hashed_password: str):
+    # Core UPDATE: the cached users carry no password hash, so nothing needs invalidating
+    db.execute(update(User).where(User.id == user_id).values(hashed_password=hashed_password))
+    db.commit()
+
+def set_user_role(db: Session, email: str, role: UserRole):
+    """Roles are only granted here (manage.py set-role), never through /register; None if there is no such user"""
+    db_user = get_user_by_email(db, email)
+    if db_user is not None:
+        # ORM update, so auth's after_update hook drops the cached user
+        db_user.role = role
+        db.commit()
+    return db_user
+
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    return USER_KEYSET.apply(db.query(User), limit, cursor=cursor, skip=skip).all()
 
 # Contact CRUD operations
 def create_contact(db: Session, contact: ContactCreate, owner_id: int):
-    db_contact = Contact(**contact.dict(), owner_id=owner_id)
-    db.add(db_contact)
-    db.commit()
-    db.refresh(db_contact)
-    return db_contact
+    return _insert_row(db, Contact, contact.dict(), owner_id)
 
-def get_contacts(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None):
+def get_contacts(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None, cursor: Optional[str] = None, filters: Optional[ContactFilter] = None, fields: Optional[List[str]] = None):
+    filters = filters or ContactFilter()
     query = db.query(Contact)
     if user_id:
         query = query.filter(Contact.owner_id == user_id)
+    if filters.status:
+        query = query.filter(Contact.status.in_(filters.status))
+    keyset = CONTACT_SORTS[filters.sort]
+    query = _load_only(query, Contact, fields, keyset)
+    return keyset.apply(query, limit, cursor=cursor, skip=skip).all()
+
+def search_contacts(db: Session, user_id: int, q: str, skip: int = 0, limit: int = 20):
+    """Rank the user's contacts against `q`, every word of which must prefix-match a searchable field"""
+    terms = SEARCH_TERM.findall(q.lower())
+    if not terms:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        vector = literal_column("contacts.search_vector")
+        query = (
+            db.query(Contact)
+            .filter(Contact.owner_id == user_id, vector.op("@@")(tsquery))
+            .order_by(func.ts_rank(vector, tsquery).desc(), Contact.id)
+        )
+    else:
+        # owner_id:N AND {first_name ... notes}:("ada"* AND "lov"*)
+        phrases = " AND ".join(f'"{term}"*' for term in terms)
+        match = f"owner_id:{int(user_id)} AND {{{' '.join(CONTACT_SEARCH_COLUMNS)}}}:({phrases})"
+        query = (
+            db.query(Contact)
+            .join(CONTACTS_FTS, CONTACTS_FTS.c.rowid == Contact.id)
+            .filter(CONTACTS_FTS.c.contacts_fts.op("MATCH")(match))
+            .order_by(CONTACTS_FTS.c.rank, Contact.id)
+        )
     return query.offset(skip).limit(limit).all()
 
-def get_contact(db: Session, contact_id: int):
-    return db.query(Contact).filter(Contact.id == contact_id).first()
+def get_contact(db: Session, contact_id: int, owner_id: int):
+    return db.query(Contact).filter(Contact.id == contact_id, Contact.owner_id == owner_id).first()
 
-def update_contact(db: Session, contact_id: int, contact: ContactUpdate):
-    db_contact = db.query(Contact).filter(Contact.id == contact_id).first()
-    if db_contact:
-        update_data = contact.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_contact, field, value)
-        db.commit()
-        db.refresh(db_contact)
-    return db_contact
+def get_contact_overview(db: Session, contact_id: int, owner_id: int):
+    """The owner's contact with its interactions, tasks and deals, in four queries however many there are"""
+    return db.query(Contact).options(
+        selectinload(Contact.interactions.and_(Interaction.user_id == owner_id)),
+        selectinload(Contact.tasks.and_(Task.owner_id == owner_id)),
+        selectinload(Contact.deals.and_(Deal.owner_id == owner_id)),
+    ).filter(Contact.id == contact_id, Contact.owner_id == owner_id).first()
 
-def delete_contact(db: Session, contact_id: int):
-    db_contact = db.query(Contact).filter(Contact.id == contact_id).first()
-    if db_contact:
-        db.delete(db_contact)
-        db.commit()
-        return True
-    return False
+def update_contact(db: Session, contact_id: int, contact: ContactUpdate, owner_id: int):
+    return _update_row(db, Contact, contact_id, contact.dict(exclude_unset=True), owner_id)
+
+def delete_contact(db: Session, contact_id: int, owner_id: int):
+    return _delete_row(db, Contact, contact_id, owner_id)
 
 # Interaction CRUD operations
 def create_interaction(db: Session, interaction: InteractionCreate, user_id: int):
-    db_interaction = Interaction(**interaction.dict(), user_id=user_id)
-    db.add(db_interaction)
-    db.commit()
-    db.refresh(db_interaction)
-    return db_interaction
+    return _insert_row(db, Interaction, interaction.dict(), user_id)
 
-def get_interactions_by_contact(db: Session, contact_id: int):
-    return db.query(Interaction).filter(Interaction.contact_id == contact_id).order_by(Interaction.created_at.desc()).all()
+def get_interactions_by_contact(db: Session, contact_id: int, owner_id: int):
+    return db.query(Interaction).filter(Interaction.contact_id == contact_id, Interaction.user_id == owner_id).order_by(Interaction.created_at.desc()).all()
 
-def get_interactions(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None):
+def get_interactions(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[List[str]] = None, include_contact: bool = False):
     query = db.query(Interaction)
     if user_id:
         query = query.filter(Interaction.user_id == user_id)
-    return query.order_by(Interaction.created_at.desc()).offset(skip).limit(limit).all()
+    keyset = INTERACTION_KEYSET
+    query = _load_only(query, Interaction, fields, keyset, include_contact)
+    if include_contact:
+        query = _with_contact(query, Interaction, user_id)
+    return keyset.apply(query, limit, cursor=cursor, skip=skip).all()
 
-def get_interaction(db: Session, interaction_id: int):
-    return db.query(Interaction).filter(Interaction.id == interaction_id).first()
+def get_interaction(db: Session, interaction_id: int, owner_id: int):
+    return db.query(Interaction).filter(Interaction.id == interaction_id, Interaction.user_id == owner_id).first()
 
-def update_interaction(db: Session, interaction_id: int, interaction: InteractionUpdate):
-    db_interaction = db.query(Interaction).filter(Interaction.id == interaction_id).first()
-    if db_interaction:
-        update_data = interaction.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_interaction, field, value)
-        db.commit()
-        db.refresh(db_interaction)
-    return db_interaction
+def update_interaction(db: Session, interaction_id: int, interaction: InteractionUpdate, owner_id: int):
+    return _update_row(db, Interaction, interaction_id, interaction.dict(exclude_unset=True), owner_id)
 
-def delete_interaction(db: Session, interaction_id: int):
-    db_interaction = db.query(Interaction).filter(Interaction.id == interaction_id).first()
-    if db_interaction:
-        db.delete(db_interaction)
-        db.commit()
-        return True
-    return False
+def delete_interaction(db: Session, interaction_id: int, owner_id: int):
+    return _delete_row(db, Interaction, interaction_id, owner_id)
 
 # Task CRUD operations
 def create_task(db: Session, task: TaskCreate, owner_id: int):
-    db_task = Task(**task.dict(), owner_id=owner_id)
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
-    return db_task
+    return _insert_row(db, Task, task.dict(), owner_id)
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None):
+def get_tasks(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None, cursor: Optional[str] = None, filters: Optional[TaskFilter] = None, fields: Optional[List[str]] = None, include_contact: bool = False):
+    filters = filters or TaskFilter()
     query = db.query(Task)
     if user_id:
         query = query.filter(Task.owner_id == user_id)
-    return query.offset(skip).limit(limit).all()
+    if filters.status:
+        query = query.filter(Task.status.in_(filters.status))
+    if filters.priority:
+        query = query.filter(Task.priority.in_(filters.priority))
+    if filters.contact_id is not None:
+        query = query.filter(Task.contact_id == filters.contact_id)
+    if filters.due_after is not None:
+        query = query.filter(Task.due_date >= filters.due_after)
+    if filters.due_before is not None:
+        query = query.filter(Task.due_date < filters.due_before)
+    keyset = TASK_SORTS[filters.sort]
+    query = _load_only(query, Task, fields, keyset, include_contact)
+    if include_contact:
+        query = _with_contact(query, Task, user_id)
+    return keyset.apply(query, limit, cursor=cursor, skip=skip).all()
 
-def get_task(db: Session, task_id: int):
-    return db.query(Task).filter(Task.id == task_id).first()
+def get_task(db: Session, task_id: int, owner_id: int):
+    return db.query(Task).filter(Task.id == task_id, Task.owner_id == owner_id).first()
 
-def update_task(db: Session, task_id: int, task: TaskUpdate):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
-    if db_task:
-        update_data = task.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_task, field, value)
-        db.commit()
-        db.refresh(db_task)
-    return db_task
+def update_task(db: Session, task_id: int, task: TaskUpdate, owner_id: int):
+    return _update_row(db, Task, task_id, task.dict(exclude_unset=True), owner_id)
 
-def delete_task(db: Session, task_id: int):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
-    if db_task:
-        db.delete(db_task)
-        db.commit()
-        return True
-    return False
+def delete_task(db: Session, task_id: int, owner_id: int):
+    return _delete_row(db, Task, task_id, owner_id)
+
+OPEN_TASK_STATUSES = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+
+def get_due_tasks(db: Session, due_after: datetime, due_before: datetime):
+    """Open tasks of every owner due in [due_after, due_before), soonest first; a range scan of ix_tasks_status_due_date"""
+    return db.execute(
+        select(Task.id, Task.owner_id, Task.title, Task.due_date)
+        .where(Task.status.in_(OPEN_TASK_STATUSES), Task.due_date >= due_after, Task.due_date < due_before)
+        .order_by(Task.due_date, Task.id)
+    ).all()
 
 # Deal CRUD operations
 def create_deal(db: Session, deal: DealCreate, owner_id: int):
-    db_deal = Deal(**deal.dict(), owner_id=owner_id)
-    db.add(db_deal)
-    db.commit()
-    db.refresh(db_deal)
-    return db_deal
+    return _insert_row(db, Deal, deal.dict(), owner_id)
 
-def get_deals(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None):
+def get_deals(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[int] = None, cursor: Optional[str] = None, filters: Optional[DealFilter] = None, fields: Optional[List[str]] = None, include_contact: bool = False):
+    filters = filters or DealFilter()
     query = db.query(Deal)
     if user_id:
         query = query.filter(Deal.owner_id == user_id)
-    return query.offset(skip).limit(limit).all()
+    if filters.stage:
+        query = query.filter(Deal.stage.in_(filters.stage))
+    if filters.contact_id is not None:
+        query = query.filter(Deal.contact_id == filters.contact_id)
+    if filters.min_value is not None:
+        query = query.filter(Deal.value >= filters.min_value)
+    if filters.max_value is not None:
+        query = query.filter(Deal.value <= filters.max_value)
+    if filters.close_after is not None:
+        query = query.filter(Deal.expected_close_date >= filters.close_after)
+    if filters.close_before is not None:
+        query = query.filter(Deal.expected_close_date < filters.close_before)
+    keyset = DEAL_SORTS[filters.sort]
+    query = _load_only(query, Deal, fields, keyset, include_contact)
+    if include_contact:
+        query = _with_contact(query, Deal, user_id)
+    return keyset.apply(query, limit, cursor=cursor, skip=skip).all()
+
+def get_deal(db: Session, deal_id: int, owner_id: int):
+    return db.query(Deal).filter(Deal.id == deal_id, Deal.owner_id == owner_id).first()
+
+def update_deal(db: Session, deal_id: int, deal: DealUpdate, owner_id: int):
+    return _update_row(db, Deal, deal_id, deal.dict(exclude_unset=True), owner_id)
 
-def get_deal(db: Session, deal_id: int):
-    return db.query(Deal).filter(Deal.id == deal_id).first()
+def delete_deal(db: Session, deal_id: int, owner_id: int):
+    return _delete_row(db, Deal, deal_id, owner_id)
 
-def update_deal(db: Session, deal_id: int, deal: DealUpdate):
-    db_deal = db.query(Deal).filter(Deal.id == deal_id).first()
-    if db_deal:
-        update_data = deal.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_deal, field, value)
+# Bulk import
+def bulk_create(db: Session, model, rows: List[dict], owner_id: int):
+    """
+    Insert validated create-schema dicts for one owner as one batched INSERT, update the
+    owner_stats rollup once for the whole batch and commit them together.
+    """
+    if not rows:
+        return 0
+    now = datetime.utcnow()
+    try:
+        version = _bump_version(db, owner_id, model)
+        values = [{**row, "owner_id": owner_id, "created_at": now, "updated_at": now, "sync_version": version} for row in rows]
+        # Table-level insert with a parameter list runs as batched multi-row INSERTs, skipping
+        # per-row ORM bookkeeping; RETURNING (in parameter order) gives the new rows for the
+        # stage history and the write listeners
+        table = model.__table__
+        inserted = db.execute(insert(table).returning(*table.c, sort_by_parameter_order=True), values).all()
+        if model is Deal:
+            _add_stage_events(db, [_stage_event(row.id, owner_id, None, row.stage, now) for row in inserted if row.stage is not None])
+        deltas = {}
+        for row in values:
+            _add_rollup(deltas, _rollup_entry(row, model), 1)
+        _apply_rollup(db, deltas)
         db.commit()
-        db.refresh(db_deal)
-    return db_deal
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+    _notify(model, "create", inserted)
+    return len(values)
+
+# Batch mutations
+def apply_batch(db: Session, owner_id: int, operations: list, atomic: bool = False):
+    """
+    Apply validated (action, model, object_id, data) operations for one owner in one transaction.
+    Update and delete targets are loaded with one `id IN (...)` query per model and must belong
+    to the owner. Returns (committed, results) with the written row, True for a delete or None
+    for a missing target per operation; with `atomic`, a missing target rolls everything back.
+    """
+    targets = {}
+    for model in {model for action, model, object_id, data in operations if action != "create"}:
+        ids = {object_id for action, m, object_id, data in operations if m is model and action != "create"}
+        targets[model] = {row.id: row for row in db.query(model).filter(model.id.in_(ids), OWNER_COLUMNS[model] == owner_id)}
+
+    results, deltas, versions = [], {}, {}
+    # (deal, from stage, to stage) for the stage history, (action, model, row) for the write listeners
+    stage_changes, writes = [], []
+    def version(model):
+        if model not in versions:
+            versions[model] = _bump_version(db, owner_id, model)
+        return versions[model]
+
+    try:
+        for action, model, object_id, data in operations:
+            if action == "create":
+                row = model(**data, **{OWNER_COLUMNS[model].key: owner_id}, sync_version=version(model))
+                db.add(row)
+                _add_rollup(deltas, _rollup_entry(row), 1)
+                if model is Deal and row.stage is not None:
+                    stage_changes.append((row, None, row.stage))
+                writes.append((action, model, row))
+                results.append(row)
+                continue
+            row = targets[model].get(object_id)
+            if row is None:
+                results.append(None)
+                continue
+            _add_rollup(deltas, _rollup_entry(row), -1)
+            if action == "update":
+                old_stage = getattr(row, "stage", None)
+                for field, value in data.items():
+                    setattr(row, field, value)
+                if model is Deal and row.stage != old_stage and row.stage is not None:
+                    stage_changes.append((row, old_stage, row.stage))
+                row.sync_version = version(model)
+                _add_rollup(deltas, _rollup_entry(row), 1)
+                writes.append((action, model, row))
+                results.append(row)
+            else:
+                db.delete(row)
+                del targets[model][object_id]
+                writes.append((action, model, row))
+                db.add(Tombstone(owner_id=owner_id, collection=COLLECTIONS[model], object_id=object_id, sync_version=version(model)))
+                results.append(True)
 
-def delete_deal(db: Session, deal_id: int):
-    db_deal = db.query(Deal).filter(Deal.id == deal_id).first()
-    if db_deal:
-        db.delete(db_deal)
+        if atomic and any(result is None for result in results):
+            db.rollback()
+            return False, results
+        _apply_rollup(db, deltas)
+        if stage_changes:
+            _add_batch_stage_events(db, owner_id, stage_changes)
+        written = {}
+        for row in results:
+            if row is not None and row is not True:
+                written.setdefault(type(row), set()).add(row.id)
         db.commit()
-        return True
-    return False
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+    # Reload the written rows expired by the commit with one query per model, not one refresh each
+    for model, ids in written.items():
+        db.query(model).filter(model.id.in_(ids)).all()
+    for action, model, row in writes:
+        _notify(model, action, [row])
+    return True, results
+
+def _add_batch_stage_events(db: Session, owner_id: int, stage_changes: list):
+    """Stage events for a batch's (deal, from stage, to stage) changes, in order; from stage is None for new deals"""
+    db.flush()
+    now = datetime.utcnow()
+    entered_at = _stage_entered_at(db, {row.id: row.created_at for row, from_stage, to_stage in stage_changes if from_stage is not None})
+    events = []
+    for row, from_stage, to_stage in stage_changes:
+        events.append(_stage_event(row.id, owner_id, from_stage, to_stage, now, entered_at.get(row.id) if from_stage is not None else None))
+        # A deal moved twice in one batch spent no time in the intermediate stage
+        entered_at[row.id] = now
+    _add_stage_events(db, events)
+
+# Export
+EXPORT_COLUMNS = {
+    Contact: [Contact.id, Contact.first_name, Contact.last_name, Contact.email, Contact.phone, Contact.company,
+              Contact.position, Contact.status, Contact.notes, Contact.created_at, Contact.updated_at],
+    Interaction: [Interaction.id, Interaction.type, Interaction.subject, Interaction.notes, Interaction.contact_id,
+                  Interaction.scheduled_date, Interaction.created_at],
+    Task: [Task.id, Task.title, Task.description, Task.priority, Task.status, Task.due_date, Task.contact_id,
+           Task.created_at, Task.updated_at],
+    Deal: [Deal.id, Deal.title, Deal.description, Deal.value, Deal.stage, Deal.probability, Deal.expected_close_date,
+           Deal.contact_id, Deal.created_at, Deal.updated_at],
+}
+
+def export_statement(model, user_id: int, batch_size: int = 1000):
+    """Column-only SELECT of everything a user owns, streamed `batch_size` rows at a time as plain tuples"""
+    owner_column = Interaction.user_id if model is Interaction else model.owner_id
+    order = [Interaction.created_at.desc(), Interaction.id.desc()] if model is Interaction else [model.id]
+    return (
+        select(*EXPORT_COLUMNS[model])
+        .where(owner_column == user_id)
+        .order_by(*order)
+        .execution_options(yield_per=batch_size)
+    )
 
 # Dashboard statistics
 def get_dashboard_stats(db: Session, user_id: int):
-    # Contact statistics
-    total_contacts = db.query(Contact).filter(Contact.owner_id == user_id).count()
-    total_leads = db.query(Contact).filter(Contact.owner_id == user_id, Contact.status == ContactStatus.LEAD).count()
-    total_prospects = db.query(Contact).filter(Contact.owner_id == user_id, Contact.status == ContactStatus.PROSPECT).count()
-    total_customers = db.query(Contact).filter(Contact.owner_id == user_id, Contact.status == ContactStatus.CUSTOMER).count()
-    
-    # Task statistics
-    total_tasks = db.query(Task).filter(Task.owner_id == user_id).count()
-    pending_tasks = db.query(Task).filter(Task.owner_id == user_id, Task.status == TaskStatus.PENDING).count()
-    completed_tasks = db.query(Task).filter(Task.owner_id == user_id, Task.status == TaskStatus.COMPLETED).count()
-    
-    # Deal statistics
-    total_deals = db.query(Deal).filter(Deal.owner_id == user_id).count()
-    total_deal_value = db.query(func.sum(Deal.value)).filter(Deal.owner_id == user_id).scalar() or 0
-    
+    stats = db.get(OwnerStats, user_id)
+    if stats is None:
+        # Owners created before the rollup existed: aggregate on the fly without storing it, the
+        # row is created by their next write or by rebuild_stats
+        stats = OwnerStats(owner_id=user_id, **compute_owner_stats(db, user_id)[user_id])
+
     # Deals by stage
-    deals_by_stage = {}
-    for stage in DealStage:
-        count = db.query(Deal).filter(Deal.owner_id == user_id, Deal.stage == stage).count()
-        deals_by_stage[stage.value] = count
-    
+    deals_by_stage = {stage.value: getattr(stats, f"{stage.value}_deals") for stage in DealStage}
+
     # Recent interactions
     recent_interactions = db.query(Interaction).join(Contact).filter(Contact.owner_id == user_id).order_by(Interaction.created_at.desc()).limit(5).all()
-    
+
     return DashboardStats(
-        total_contacts=total_contacts,
-        total_leads=total_leads,
-        total_prospects=total_prospects,
-        total_customers=total_customers,
-        total_tasks=total_tasks,
-        pending_tasks=pending_tasks,
-        completed_tasks=completed_tasks,
-        total_deals=total_deals,
-        total_deal_value=total_deal_value,
+        total_contacts=stats.total_contacts,
+        total_leads=stats.lead_contacts,
+        total_prospects=stats.prospect_contacts,
+        total_customers=stats.customer_contacts,
+        total_tasks=stats.total_tasks,
+        pending_tasks=stats.pending_tasks,
+        completed_tasks=stats.completed_tasks,
+        total_deals=stats.total_deals,
+        total_deal_value=stats.total_deal_value,
         deals_by_stage=deals_by_stage,
         recent_interactions=recent_interactions
     )
+
+# Pipeline analytics: aggregates over every deal, rebuilt into the snapshot tables by
+# refresh_pipeline_snapshot (on a timer, see analytics.py), so /analytics/pipeline reads a
+# handful of pre-grouped rows per owner instead of scanning deals next to the write traffic
+FUNNEL_STAGES = [DealStage.PROSPECTING, DealStage.QUALIFICATION, DealStage.PROPOSAL, DealStage.NEGOTIATION, DealStage.CLOSED_WON]
+CLOSED_STAGES = (DealStage.CLOSED_WON, DealStage.CLOSED_LOST)
+
+def _close_month(db: Session, column):
+    """YYYY-MM of a datetime column; the format is inlined so GROUP BY matches the selected expression"""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(column, literal_column("'YYYY-MM'"))
+    return func.strftime(literal_column("'%Y-%m'"), column)
+
+def _days_since(db: Session, column, now: datetime):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.extract("epoch", literal(now) - column) / 86400.0
+    return func.julianday(literal(now)) - func.julianday(column)
+
+def refresh_pipeline_snapshot(db: Session):
+    """
+    Rebuild the pipeline snapshot tables for every owner with two grouped INSERT ... SELECTs,
+    so the aggregation runs inside the database and replaces the old snapshot in one transaction.
+    Time in stage runs from each deal's latest stage event, or its creation if it has none.
+    """
+    now = datetime.utcnow()
+    weighted = func.coalesce(func.sum(Deal.value * func.coalesce(Deal.probability, 0) / 100.0), 0)
+    total = func.coalesce(func.sum(Deal.value), 0)
+    entered = (
+        select(DealStageEvent.deal_id, func.max(DealStageEvent.changed_at).label("entered_at"))
+        .group_by(DealStageEvent.deal_id)
+        .subquery()
+    )
+    in_stage = _days_since(db, func.coalesce(entered.c.entered_at, Deal.created_at), now)
+    stages = (
+        select(Deal.owner_id, Deal.stage, func.count(Deal.id), total, weighted, func.coalesce(func.sum(in_stage), 0), literal(now))
+        .select_from(Deal)
+        .outerjoin(entered, entered.c.deal_id == Deal.id)
+        .where(Deal.owner_id.isnot(None), Deal.stage.isnot(None))
+        .group_by(Deal.owner_id, Deal.stage)
+    )
+    month = _close_month(db, Deal.expected_close_date)
+    forecast = (
+        select(Deal.owner_id, month, func.count(Deal.id), total, weighted, literal(now))
+        .where(Deal.owner_id.isnot(None), Deal.expected_close_date.isnot(None), Deal.stage.notin_(CLOSED_STAGES))
+        .group_by(Deal.owner_id, month)
+    )
+    try:
+        db.execute(delete(PipelineStageSnapshot))
+        db.execute(delete(PipelineForecastSnapshot))
+        db.execute(insert(PipelineStageSnapshot).from_select(
+            ["owner_id", "stage", "deal_count", "total_value", "weighted_value", "total_days_in_stage", "refreshed_at"], stages
+        ))
+        db.execute(insert(PipelineForecastSnapshot).from_select(
+            ["owner_id", "month", "deal_count", "total_value", "weighted_value", "refreshed_at"], forecast
+        ))
+        owners, deals = db.execute(
+            select(func.count(func.distinct(PipelineStageSnapshot.owner_id)), func.coalesce(func.sum(PipelineStageSnapshot.deal_count), 0))
+        ).one()
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+    return PipelineRefreshReport(refreshed_at=now, owners=owners, deals=deals)
+
+def _ratio(part, whole):
+    return part / whole if whole else None
+
+def get_pipeline_refreshed_at(db: Session):
+    """When the pipeline snapshot was last rebuilt, None if it is empty"""
+    return db.query(func.max(PipelineStageSnapshot.refreshed_at)).scalar()
+
+def get_pipeline_analytics(db: Session, owner_ids: Optional[List[int]] = None):
+    """Forecast, stage funnel and per-owner win rates from the latest snapshot, for `owner_ids` or everyone"""
+    stage_rows = db.query(PipelineStageSnapshot)
+    forecast_rows = db.query(PipelineForecastSnapshot)
+    if owner_ids is not None:
+        stage_rows = stage_rows.filter(PipelineStageSnapshot.owner_id.in_(owner_ids))
+        forecast_rows = forecast_rows.filter(PipelineForecastSnapshot.owner_id.in_(owner_ids))
+    refreshed_at = get_pipeline_refreshed_at(db)
+
+    months = {}
+    for row in forecast_rows:
+        totals = months.setdefault(row.month, [0, 0.0, 0.0])
+        totals[0] += row.deal_count
+        totals[1] += row.total_value
+        totals[2] += row.weighted_value
+
+    stages = {stage: [0, 0.0, 0.0, 0.0] for stage in DealStage}
+    owners = {}
+    for row in stage_rows:
+        for totals in (stages[row.stage], owners.setdefault(row.owner_id, {}).setdefault(row.stage, [0, 0.0, 0.0, 0.0])):
+            totals[0] += row.deal_count
+            totals[1] += row.total_value
+            totals[2] += row.weighted_value
+            totals[3] += row.total_days_in_stage
+
+    # Deals are counted as having passed every funnel stage before their current one; a lost
+    # deal's last open stage is not recorded, so it only counts towards the first
+    reached = [sum(stages[stage][0] for stage in FUNNEL_STAGES[index:]) for index in range(len(FUNNEL_STAGES))]
+    reached[0] += stages[DealStage.CLOSED_LOST][0]
+
+    def owner_pipeline(owner_id, by_stage):
+        won = by_stage.get(DealStage.CLOSED_WON, [0])[0]
+        lost = by_stage.get(DealStage.CLOSED_LOST, [0])[0]
+        return OwnerPipeline(
+            owner_id=owner_id,
+            open_deals=sum(totals[0] for stage, totals in by_stage.items() if stage not in CLOSED_STAGES),
+            won_deals=won,
+            lost_deals=lost,
+            win_rate=_ratio(won, won + lost),
+            weighted_value=sum(totals[2] for stage, totals in by_stage.items() if stage not in CLOSED_STAGES),
+            avg_days_in_stage={stage: _ratio(totals[3], totals[0]) for stage, totals in by_stage.items() if stage not in CLOSED_STAGES},
+        )
+
+    return PipelineAnalytics(
+        refreshed_at=refreshed_at,
+        forecast=[
+            ForecastMonth(month=month, deal_count=count, total_value=value, weighted_value=weighted)
+            for month, (count, value, weighted) in sorted(months.items())
+        ],
+        stages=[
+            StageSummary(stage=stage, deal_count=count, total_value=value, weighted_value=weighted, avg_days_in_stage=_ratio(days, count))
+            for stage, (count, value, weighted, days) in stages.items()
+        ],
+        conversion=[
+            StageConversion(from_stage=FUNNEL_STAGES[index], to_stage=FUNNEL_STAGES[index + 1], rate=_ratio(reached[index + 1], reached[index]))
+            for index in range(len(FUNNEL_STAGES) - 1)
+        ],
+        owners=[owner_pipeline(owner_id, by_stage) for owner_id, by_stage in sorted(owners.items())],
+    )
+
+# Stage history reports: every query is one range scan of ix_deal_stage_events_owner_id_changed_at
+def _stage_events(db: Session, owner_id: int, start: Optional[datetime], end: Optional[datetime], *columns):
+    query = db.query(*columns).filter(DealStageEvent.owner_id == owner_id)
+    if start is not None:
+        query = query.filter(DealStageEvent.changed_at >= start)
+    if end is not None:
+        query = query.filter(DealStageEvent.changed_at < end)
+    return query
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty list"""
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+def get_stage_durations(db: Session, owner_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Distribution of days spent in each stage, over the owner's deals that left it within [start, end)"""
+    durations = {}
+    rows = _stage_events(db, owner_id, start, end, DealStageEvent.from_stage, DealStageEvent.seconds_in_from_stage)
+    for stage, seconds in rows:
+        if stage is not None and seconds is not None:
+            durations.setdefault(stage, []).append(seconds / 86400)
+    stages = []
+    for stage in DealStage:
+        days = sorted(durations.get(stage, ()))
+        if days:
+            stages.append(StageDuration(
+                stage=stage, exits=len(days), avg_days=sum(days) / len(days), median_days=_percentile(days, 0.5),
+                p90_days=_percentile(days, 0.9), min_days=days[0], max_days=days[-1],
+            ))
+    return StageDurationReport(start=start, end=end, stages=stages)
+
+def get_stage_funnel(db: Session, owner_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    Funnel over the owner's deals that changed stage within [start, end): a deal that reached a
+    funnel stage counts towards every stage before it, so skipped stages do not break the chain
+    """
+    furthest, lost = {}, set()
+    for deal_id, stage in _stage_events(db, owner_id, start, end, DealStageEvent.deal_id, DealStageEvent.to_stage):
+        if stage == DealStage.CLOSED_LOST:
+            lost.add(deal_id)
+        else:
+            furthest[deal_id] = max(furthest.get(deal_id, 0), FUNNEL_STAGES.index(stage))
+    # Lost deals entered the funnel even if their earlier stages fall outside the range
+    for deal_id in lost:
+        furthest.setdefault(deal_id, 0)
+    reached = [sum(1 for index in furthest.values() if index >= step) for step in range(len(FUNNEL_STAGES))]
+    steps = [
+        FunnelStep(stage=stage, deals=reached[step], conversion_rate=_ratio(reached[step], reached[step - 1]) if step else None)
+        for step, stage in enumerate(FUNNEL_STAGES)
+    ]
+    return FunnelReport(start=start, end=end, steps=steps, lost=len(lost))
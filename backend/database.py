@@ -1,7 +1,13 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,12 +15,227 @@ load_dotenv()
 # Database URL - using SQLite for simplicity, can be changed to PostgreSQL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./zencrm.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Serve requests through the async drivers (aiosqlite / asyncpg) instead of the threadpool
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+def async_url(url: str):
+    """The async-driver equivalent of a sync database URL"""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+
+# SQLite tuning, applied to every new connection
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),  # negative means KiB, not pages
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+}
+
+class _PoolWaitStats:
+    """Pool mixin that records how long checkouts wait for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+class TimedQueuePool(_PoolWaitStats, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_PoolWaitStats, AsyncAdaptedQueuePool):
+    pass
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def engine_options(url, async_driver: bool = False) -> dict:
+    """create_engine keyword arguments for the configured pool and driver"""
+    url = make_url(url)
+    options = {}
+    if url.get_backend_name() == "sqlite" and not async_driver:
+        options["connect_args"] = {"check_same_thread": False}
+    # In-memory SQLite keeps its single-connection pool; anything else gets the sized, timed pool
+    if not _is_memory_sqlite(url):
+        options.update(
+            poolclass=TimedAsyncQueuePool if async_driver else TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    return options
+
+def tune_sqlite(engine):
+    """Apply SQLITE_PRAGMAS to every connection the engine opens (no-op for other databases)"""
+    if engine.url.get_backend_name() != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in SQLITE_PRAGMAS.items():
+            if pragma == "journal_mode" and _is_memory_sqlite(engine.url):
+                continue
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+def pool_stats(engine) -> dict:
+    """Current occupancy and checkout wait times of an engine's pool"""
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    if isinstance(pool, _PoolWaitStats):
+        with pool._stats_lock:
+            stats.update(
+                checkouts=pool.checkouts,
+                wait_ms_total=pool.wait_seconds_total * 1000,
+                wait_ms_avg=pool.wait_seconds_total * 1000 / pool.checkouts if pool.checkouts else 0.0,
+                wait_ms_max=pool.wait_seconds_max * 1000,
+            )
+    return stats
+
+def time_statements(engine, record):
+    """
+    Call record(statement, seconds) after every statement `engine` executes. Returns a function
+    that removes the hooks again, so an uninstrumented engine pays nothing.
+    """
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._statement_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record(statement, time.perf_counter() - context._statement_started)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+    def remove():
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", after_cursor_execute)
+    return remove
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+tune_sqlite(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if DB_ASYNC:
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, async_driver=True))
+    tune_sqlite(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
 Base = declarative_base()
 
+class Database:
+    """
+    Request-scoped database handle for async endpoints.
+
+    `run` calls a sync crud function with the request's session: on an AsyncSession it
+    goes through run_sync, so the queries are awaited on the async driver without
+    tying up a thread; on a plain Session it runs in the threadpool like a sync route.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn, *args, **kwargs):
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(self._run_and_release, fn, *args, **kwargs)
+
+    async def stream(self, statement):
+        """
+        Yield the result rows of `statement` in partitions (sized by its yield_per option)
+        from a server-side cursor, holding the connection until the stream is exhausted.
+        """
+        if isinstance(self.session, AsyncSession):
+            result = await self.session.stream(statement)
+            async for partition in result.partitions():
+                yield partition
+            return
+        try:
+            result = await run_in_threadpool(self.session.execute, statement)
+            partitions = result.partitions()
+            while True:
+                partition = await run_in_threadpool(next, partitions, None)
+                if partition is None:
+                    break
+                yield partition
+        finally:
+            self.session.close()
+
+    async def close(self):
+        """Return the session's connection to the pool now, for requests that outlive their queries"""
+        if isinstance(self.session, AsyncSession):
+            await self.session.close()
+        else:
+            self.session.close()
+
+    def _run_and_release(self, fn, *args, **kwargs):
+        try:
+            return fn(self.session, *args, **kwargs)
+        finally:
+            # Return the connection before leaving the worker thread. A session that kept
+            # it while waiting for its next threadpool slot could starve the workers that
+            # are blocked on the pool, deadlocking until pool_timeout. Loaded objects stay
+            # readable after close().
+            self.session.close()
+
+# Dependency to get DB session; shared by the endpoints and the auth dependency
+# so each request uses a single session
+async def get_database():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield Database(session)
+    else:
+        db = SessionLocal()
+        try:
+            yield Database(db)
+        finally:
+            db.close()
+
+# Sync session for scripts and maintenance commands
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
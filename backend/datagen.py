@@ -0,0 +1,249 @@
+"""
+Seeded synthetic CRM data for benchmarks and load tests
+
+Each generated user gets a book of contacts whose size follows a log-normal distribution (a few
+heavy users, a long tail of light ones). Contacts carry interactions, tasks and deals in
+proportions that depend on their status, deals walk the stage funnel with a matching
+deal_stage_events history, and the owner_stats rollups are rebuilt at the end, so every
+endpoint sees the same shape of data it would in production. The same seed always produces the
+same rows.
+"""
+import math
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import (
+    User, Contact, Interaction, Task, Deal, DealStageEvent,
+    ContactStatus, InteractionType, TaskPriority, TaskStatus, DealStage,
+)
+
+# Every generated user can log in with this password
+PASSWORD = "password"
+
+FIRST_NAMES = ["Ada", "Alan", "Grace", "Linus", "Margaret", "Dennis", "Barbara", "Ken", "Radia", "Edsger",
+               "Frances", "Donald", "Katherine", "John", "Hedy", "Tim", "Shafi", "Guido", "Anita", "Bjarne"]
+LAST_NAMES = ["Lovelace", "Turing", "Hopper", "Torvalds", "Hamilton", "Ritchie", "Liskov", "Thompson", "Perlman",
+              "Dijkstra", "Allen", "Knuth", "Johnson", "McCarthy", "Lamarr", "Berners-Lee", "Goldwasser", "van Rossum",
+              "Borg", "Stroustrup"]
+POSITIONS = ["CEO", "CTO", "VP Sales", "Head of Operations", "Engineering Manager", "Procurement Lead", "Founder", None]
+
+CONTACT_STATUS_WEIGHTS = {ContactStatus.LEAD: 55, ContactStatus.PROSPECT: 30, ContactStatus.CUSTOMER: 15}
+INTERACTION_TYPE_WEIGHTS = {InteractionType.EMAIL: 40, InteractionType.CALL: 30, InteractionType.MEETING: 15, InteractionType.NOTE: 15}
+TASK_PRIORITY_WEIGHTS = {TaskPriority.LOW: 25, TaskPriority.MEDIUM: 45, TaskPriority.HIGH: 22, TaskPriority.URGENT: 8}
+# Mean interactions and tasks per contact, and the chance a contact has a deal, by status
+INTERACTIONS_PER_CONTACT = {ContactStatus.LEAD: 1.0, ContactStatus.PROSPECT: 3.0, ContactStatus.CUSTOMER: 6.0}
+TASKS_PER_CONTACT = {ContactStatus.LEAD: 0.5, ContactStatus.PROSPECT: 1.5, ContactStatus.CUSTOMER: 1.0}
+DEAL_CHANCE = {ContactStatus.LEAD: 0.1, ContactStatus.PROSPECT: 0.5, ContactStatus.CUSTOMER: 0.9}
+
+FUNNEL = [DealStage.PROSPECTING, DealStage.QUALIFICATION, DealStage.PROPOSAL, DealStage.NEGOTIATION]
+# Chance a deal moves on from each funnel stage, and the chance a deal that stops is lost
+# rather than still open
+ADVANCE_CHANCE = {DealStage.PROSPECTING: 0.7, DealStage.QUALIFICATION: 0.6, DealStage.PROPOSAL: 0.55, DealStage.NEGOTIATION: 0.6}
+LOST_CHANCE = 0.5
+STAGE_PROBABILITY = {
+    DealStage.PROSPECTING: 10, DealStage.QUALIFICATION: 25, DealStage.PROPOSAL: 50,
+    DealStage.NEGOTIATION: 75, DealStage.CLOSED_WON: 100, DealStage.CLOSED_LOST: 0,
+}
+
+
+@dataclass
+class GeneratedData:
+    users: int
+    contacts: int
+    interactions: int
+    tasks: int
+    deals: int
+    stage_events: int
+    user_ids: range
+
+
+def _weighted(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Knuth's method; the means used here are small
+    limit, count, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def _between(rng: random.Random, start: datetime, end: datetime) -> datetime:
+    return start + (end - start) * rng.random()
+
+
+class _Batches:
+    """Buffers rows per table and inserts them in chunks, parents first"""
+
+    def __init__(self, conn, size: int):
+        self.conn = conn
+        self.size = size
+        self.rows = {table: [] for table in (User, Contact, Interaction, Task, Deal, DealStageEvent)}
+        self.counts = dict.fromkeys(self.rows, 0)
+
+    def add(self, table, row: dict):
+        self.rows[table].append(row)
+        self.counts[table] += 1
+        if len(self.rows[table]) >= self.size:
+            self.flush()
+
+    def flush(self):
+        for table, rows in self.rows.items():
+            if rows:
+                self.conn.execute(insert(table), rows)
+                rows.clear()
+
+
+def _sequence_updates():
+    """
+    Statements moving each PostgreSQL id sequence past the ids generate() set explicitly, which
+    the sequences never see; otherwise the next insert through the API reuses an existing id
+    """
+    return [
+        select(func.setval(
+            func.pg_get_serial_sequence(table.__tablename__, "id"),
+            select(func.max(table.id)).scalar_subquery(),
+        ))
+        for table in (User, Contact, Interaction, Task, Deal)
+    ]
+
+
+def generate(
+    engine,
+    users: int,
+    contacts_per_user: int = 200,
+    seed: int = 42,
+    now: Optional[datetime] = None,
+    hashed_password: Optional[str] = None,
+    batch_size: int = 5000,
+) -> GeneratedData:
+    """
+    Add `users` users (user<id>@example.com) with their CRM data to the database behind
+    `engine`, creating the tables if needed. `contacts_per_user` is the median book size.
+    Ids continue after the existing rows, so a populated database can be grown; on PostgreSQL the
+    id sequences are then moved past them.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    if hashed_password is None:
+        from auth import get_password_hash
+        hashed_password = get_password_hash(PASSWORD)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        next_id = {
+            table: (conn.execute(select(func.max(table.id))).scalar() or 0) + 1
+            for table in (User, Contact, Interaction, Task, Deal)
+        }
+        batches = _Batches(conn, batch_size)
+        first_user = next_id[User]
+
+        for user_id in range(first_user, first_user + users):
+            user_created = now - timedelta(days=rng.uniform(30, 1095))
+            batches.add(User, {
+                "id": user_id, "email": f"user{user_id}@example.com", "hashed_password": hashed_password,
+                "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "created_at": user_created, "updated_at": user_created,
+            })
+            book = max(1, round(contacts_per_user * rng.lognormvariate(0, 0.6)))
+            for _ in range(book):
+                contact_id = next_id[Contact]
+                next_id[Contact] += 1
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                status = _weighted(rng, CONTACT_STATUS_WEIGHTS)
+                # Skewed towards recent contacts, as a growing book would be
+                created = user_created + (now - user_created) * (1 - rng.random() ** 2)
+                batches.add(Contact, {
+                    "id": contact_id, "first_name": first, "last_name": last,
+                    "email": f"{first}.{last}{contact_id}@example.com".lower().replace(" ", ""),
+                    "phone": f"+1-555-{rng.randint(0, 9999):04d}" if rng.random() < 0.6 else None,
+                    "company": f"Company {rng.randint(1, 2000)}", "position": rng.choice(POSITIONS),
+                    "status": status, "notes": "Met at the conference." if rng.random() < 0.2 else None,
+                    "owner_id": user_id, "created_at": created, "updated_at": _between(rng, created, now),
+                })
+
+                for _ in range(_poisson(rng, INTERACTIONS_PER_CONTACT[status])):
+                    at = _between(rng, created, now)
+                    kind = _weighted(rng, INTERACTION_TYPE_WEIGHTS)
+                    batches.add(Interaction, {
+                        "id": next_id[Interaction], "type": kind, "subject": f"{kind.value.title()} with {first}",
+                        "contact_id": contact_id, "user_id": user_id,
+                        "scheduled_date": at + timedelta(days=rng.randint(1, 14)) if kind == InteractionType.MEETING else None,
+                        "created_at": at, "updated_at": at,
+                    })
+                    next_id[Interaction] += 1
+
+                for _ in range(_poisson(rng, TASKS_PER_CONTACT[status])):
+                    at = _between(rng, created, now)
+                    due = at + timedelta(days=rng.uniform(1, 30))
+                    if due < now:
+                        task_status = TaskStatus.COMPLETED if rng.random() < 0.8 else rng.choice([TaskStatus.PENDING, TaskStatus.CANCELLED])
+                    else:
+                        task_status = TaskStatus.IN_PROGRESS if rng.random() < 0.3 else TaskStatus.PENDING
+                    batches.add(Task, {
+                        "id": next_id[Task], "title": f"Follow up with {first} {last}",
+                        "priority": _weighted(rng, TASK_PRIORITY_WEIGHTS), "status": task_status, "due_date": due,
+                        "contact_id": contact_id, "owner_id": user_id, "created_at": at, "updated_at": at,
+                    })
+                    next_id[Task] += 1
+
+                if rng.random() < DEAL_CHANCE[status]:
+                    _add_deal(rng, batches, next_id[Deal], contact_id, user_id, status, _between(rng, created, now), now)
+                    next_id[Deal] += 1
+        batches.flush()
+        if conn.dialect.name == "postgresql":
+            for statement in _sequence_updates():
+                conn.execute(statement)
+
+    db = sessionmaker(bind=engine)()
+    try:
+        import crud
+        crud.rebuild_stats(db)
+    finally:
+        db.close()
+    counts = batches.counts
+    return GeneratedData(
+        users=counts[User], contacts=counts[Contact], interactions=counts[Interaction], tasks=counts[Task],
+        deals=counts[Deal], stage_events=counts[DealStageEvent], user_ids=range(first_user, first_user + users),
+    )
+
+
+def _add_deal(rng, batches, deal_id, contact_id, user_id, contact_status, created, now):
+    """A deal that walked the funnel from prospecting, with one stage event per move"""
+    batches.add(DealStageEvent, {
+        "deal_id": deal_id, "owner_id": user_id, "from_stage": None, "to_stage": DealStage.PROSPECTING,
+        "changed_at": created, "seconds_in_from_stage": None,
+    })
+    stage, entered = DealStage.PROSPECTING, created
+    while stage in FUNNEL:
+        # Customers' deals mostly close won; everyone else's stall or drop out along the way
+        advance = 0.95 if contact_status == ContactStatus.CUSTOMER else ADVANCE_CHANCE[stage]
+        if rng.random() < advance:
+            next_stage = FUNNEL[FUNNEL.index(stage) + 1] if stage != DealStage.NEGOTIATION else DealStage.CLOSED_WON
+        elif rng.random() < LOST_CHANCE:
+            next_stage = DealStage.CLOSED_LOST
+        else:
+            break
+        moved = entered + timedelta(days=rng.uniform(2, 30))
+        if moved >= now:
+            break
+        batches.add(DealStageEvent, {
+            "deal_id": deal_id, "owner_id": user_id, "from_stage": stage, "to_stage": next_stage,
+            "changed_at": moved, "seconds_in_from_stage": (moved - entered).total_seconds(),
+        })
+        stage, entered = next_stage, moved
+
+    batches.add(Deal, {
+        "id": deal_id, "title": f"Deal {deal_id}", "value": round(rng.lognormvariate(math.log(5000), 1.0), 2),
+        "stage": stage, "probability": STAGE_PROBABILITY[stage],
+        "expected_close_date": created + timedelta(days=rng.randint(30, 120)),
+        "contact_id": contact_id, "owner_id": user_id, "created_at": created, "updated_at": entered,
+    })
@@ -0,0 +1,181 @@
+"""
+Owner-scoped change feed: crud writes are published through a broker and fanned out to the
+/events subscribers of this process
+"""
+import abc
+import asyncio
+import itertools
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import orjson
+
+import crud
+from crud import COLLECTIONS, OWNER_COLUMNS
+from models import Contact, Deal, Interaction, Task
+from schemas import ContactResponse, DealResponse, InteractionResponse, TaskResponse
+from serialization import RowSerializer
+
+# Events buffered per subscriber; a subscriber that falls this far behind is told to resync
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+# Seconds between SSE keep-alive comments on an idle stream
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+# Which broker carries events between processes, see BROKERS
+EVENTS_BROKER = os.getenv("EVENTS_BROKER", "local")
+
+EVENT_ROWS = {
+    Contact: RowSerializer(ContactResponse),
+    Interaction: RowSerializer(InteractionResponse),
+    Task: RowSerializer(TaskResponse),
+    Deal: RowSerializer(DealResponse),
+}
+
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    """One /events stream: a bounded queue that is replaced by a resync event when it overflows"""
+
+    def __init__(self, owner_id: int, maxsize: int = EVENTS_QUEUE_SIZE):
+        self.owner_id = owner_id
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Never block the publisher on a slow reader: drop what it has not read and tell it
+            # to catch up from /sync instead
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+class EventHub:
+    """This process's subscribers by owner; deliver() must run on the event loop"""
+
+    def __init__(self):
+        self.subscribers = {}
+        self.delivered = 0
+
+    def deliver(self, owner_id: int, event: dict):
+        for subscription in self.subscribers.get(owner_id, ()):
+            subscription.put(event)
+            self.delivered += 1
+
+    @asynccontextmanager
+    async def subscribe(self, owner_id: int):
+        subscription = Subscription(owner_id)
+        self.subscribers.setdefault(owner_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self.subscribers[owner_id]
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.subscribers[owner_id]
+
+
+class Broker(abc.ABC):
+    """
+    Carries events from the process that made a write to every process serving /events.
+    start() is given the local hub's deliver(owner_id, event), to be called on the event loop
+    for each event received; publish() may be called from any thread and must not block.
+    A shared broker (e.g. Redis pub/sub or Postgres LISTEN/NOTIFY) lets several workers see
+    each other's writes.
+    """
+
+    # True when events never leave this process, so writes with no local subscriber can be skipped
+    local_only = False
+
+    @abc.abstractmethod
+    async def start(self, deliver):
+        ...
+
+    async def stop(self):
+        pass
+
+    @abc.abstractmethod
+    def publish(self, owner_id: int, event: dict):
+        ...
+
+
+class LocalBroker(Broker):
+    """In-process broker: events only reach subscribers of the worker that made the write"""
+
+    local_only = True
+
+    def __init__(self):
+        self._loop = None
+        self._deliver = None
+
+    async def start(self, deliver):
+        self._loop = asyncio.get_running_loop()
+        self._deliver = deliver
+
+    async def stop(self):
+        self._loop = self._deliver = None
+
+    def publish(self, owner_id: int, event: dict):
+        loop, deliver = self._loop, self._deliver
+        if loop is not None:
+            loop.call_soon_threadsafe(deliver, owner_id, event)
+
+
+BROKERS = {"local": LocalBroker}
+
+
+class ChangeFeed:
+    """Publishes crud writes (as a write listener) through `broker` and delivers them to `hub`"""
+
+    def __init__(self, broker: Optional[Broker] = None, hub: Optional[EventHub] = None):
+        self.broker = broker or BROKERS[EVENTS_BROKER]()
+        self.hub = hub or EventHub()
+        self._ids = itertools.count(1)
+
+    async def start(self):
+        await self.broker.start(self.hub.deliver)
+        crud.WRITE_LISTENERS.append(self.row_written)
+
+    async def stop(self):
+        if self.row_written in crud.WRITE_LISTENERS:
+            crud.WRITE_LISTENERS.remove(self.row_written)
+        await self.broker.stop()
+
+    def row_written(self, model, action: str, row):
+        owner_id = getattr(row, OWNER_COLUMNS[model].key)
+        if owner_id is None or (self.broker.local_only and owner_id not in self.hub.subscribers):
+            return
+        event = {"type": "change", "collection": COLLECTIONS[model], "action": action, "id": row.id}
+        if action != "delete":
+            event["version"] = row.sync_version
+            event["data"] = EVENT_ROWS[model].one(row)
+        self.broker.publish(owner_id, event)
+
+    def format(self, event: dict) -> bytes:
+        """One server-sent event; the id is per process and only orders events within a stream"""
+        return b"id: %d\nevent: %s\ndata: %s\n\n" % (next(self._ids), event["type"].encode(), orjson.dumps(event))
+
+    async def stream(self, owner_id: int):
+        """
+        SSE body for one owner, with keep-alive comments while idle. Runs until the client
+        disconnects, when the response cancels it and the subscription is dropped.
+        """
+        async with self.hub.subscribe(owner_id) as subscription:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield self.format(event)
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,59 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+
+from fastapi.responses import StreamingResponse
+
+from crud import EXPORT_COLUMNS, export_statement
+from database import Database
+
+# Rows fetched from the cursor per round trip / response chunk
+EXPORT_BATCH_SIZE = 1000
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+async def _csv_chunks(header, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    async for rows in partitions:
+        writer.writerows([[_plain(value) for value in row] for row in rows])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def _ndjson_chunks(header, partitions):
+    async for rows in partitions:
+        yield "".join(json.dumps(dict(zip(header, map(_plain, row)))) + "\n" for row in rows)
+
+def export_response(db: Database, model, user_id: int, export_format: ExportFormat, filename: str) -> StreamingResponse:
+    """
+    Stream everything `user_id` owns in `model` as CSV or NDJSON. Rows come straight off a
+    server-side cursor as tuples, so memory stays flat however many rows are exported.
+    """
+    header = [column.key for column in EXPORT_COLUMNS[model]]
+    partitions = db.stream(export_statement(model, user_id, EXPORT_BATCH_SIZE))
+    chunks = _csv_chunks(header, partitions) if export_format == ExportFormat.CSV else _ndjson_chunks(header, partitions)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'},
+    )
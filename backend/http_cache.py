@@ -0,0 +1,61 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from auth import get_current_user
+from crud import get_collection_versions
+from database import Database, get_database
+from models import User
+
+
+def _validators(owner_id: int, versions: dict, request: Request):
+    """Weak ETag over the owner's collection versions and the exact request, plus the latest change time"""
+    state = ",".join(f"{name}={version}" for name, (version, _) in sorted(versions.items()))
+    key = f"{owner_id}|{state}|{request.url.path}?{request.url.query}"
+    etag = f'W/"{hashlib.blake2b(key.encode(), digest_size=12).hexdigest()}"'
+    changed = [changed_at for _, changed_at in versions.values() if changed_at is not None]
+    return etag, max(changed) if changed else None
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since; weak comparison
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since
+    return False
+
+
+def conditional_get(*collections: str):
+    """
+    Dependency for GET endpoints whose response only depends on the current user's `collections`.
+    Answers a matching If-None-Match / If-Modified-Since with 304 before the endpoint loads any rows;
+    otherwise sets ETag/Last-Modified on the response and returns those headers, for endpoints
+    that build their own Response object.
+    """
+    async def dependency(
+        request: Request,
+        response: Response,
+        db: Database = Depends(get_database),
+        current_user: User = Depends(get_current_user),
+    ) -> dict:
+        versions = await db.run(get_collection_versions, current_user.id, list(collections))
+        etag, last_modified = _validators(current_user.id, versions, request)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+        if _not_modified(request, etag, last_modified):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return headers
+    return dependency
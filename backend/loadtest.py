@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+HTTP load test of the API
+
+Generates a throwaway SQLite database with datagen.py and drives it with concurrent
+keep-alive clients, each request made as a random generated user on a weighted mix of routes
+(or just --path). Modes `sync` and `async` (DB_ASYNC) start a real `uvicorn main:app`;
+`inprocess` calls the ASGI app directly, so no server, sockets or second process are needed.
+Reports throughput and p50/p95/p99 per route; --save-baseline/--baseline store and check
+them as JSON. --login-clients adds workers that only log in, to measure logins/s and what a
+login burst does to the latency of everything else.
+
+Usage:
+    python loadtest.py --modes sync,async --clients 200 --duration 15
+    python loadtest.py --modes inprocess --clients 20 --duration 10 --save-baseline load.json
+    python loadtest.py --modes inprocess --clients 20 --duration 10 --baseline load.json
+    python loadtest.py --modes sync --clients 20 --login-clients 50 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+# Imported first: keeps the app's import-time setup off the real database
+from benchmark import RESULTS, add_baseline_arguments, make_engine, report_baseline, summarize
+from auth import create_access_token
+from datagen import LAST_NAMES, PASSWORD, generate
+
+# method, path, JSON body and relative weight of each route in the default mix
+ROUTE_MIX = [
+    ("GET", "/contacts?limit=20", None, 25),
+    ("GET", "/contacts/search?q={last_name}", None, 10),
+    ("GET", "/interactions?limit=20", None, 10),
+    ("GET", "/tasks?status=pending&sort=due_date&limit=20", None, 15),
+    ("GET", "/deals?stage=proposal&stage=negotiation&limit=20", None, 10),
+    ("GET", "/dashboard/stats", None, 15),
+    ("GET", "/analytics/pipeline", None, 5),
+    ("POST", "/contacts", {"first_name": "Load", "last_name": "Test", "status": "lead"}, 10),
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path, mode, port):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", DB_ASYNC="true" if mode == "async" else "false")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+
+def in_process_transport(engine):
+    """ASGI transport into main.app with its sessions bound to `engine`"""
+    from sqlalchemy.orm import sessionmaker
+    import database
+    import main
+
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    async def load_database():
+        session = Session()
+        try:
+            yield database.Database(session)
+        finally:
+            session.close()
+
+    main.app.dependency_overrides[database.get_database] = load_database
+    return httpx.ASGITransport(app=main.app)
+
+
+async def drive(client_options, routes, tokens, clients, duration, seed=0, emails=(), login_clients=0):
+    """
+    Run `clients` workers on `routes` and `login_clients` workers logging in as `emails` for
+    `duration` seconds; returns {route label: [latency ms]} and the error count
+    """
+    latencies = {f"{method} {path.split('?')[0]}": [] for method, path, _, _ in routes}
+    latencies["POST /token"] = []
+    errors = 0
+    weights = [weight for *_, weight in routes]
+    # A connection per worker, so login workers are not held back by the pool
+    connections = clients + login_clients
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(limits=limits, timeout=30, **client_options) as http:
+        stop_at = time.monotonic() + duration
+
+        async def worker(rng):
+            nonlocal errors
+            while time.monotonic() < stop_at:
+                method, path, body, _ = rng.choices(routes, weights)[0]
+                headers = {"Authorization": f"Bearer {rng.choice(tokens)}"}
+                url = path.format(last_name=rng.choice(LAST_NAMES))
+                start = time.perf_counter()
+                try:
+                    response = await http.request(method, url, json=body, headers=headers)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies[f"{method} {path.split('?')[0]}"].append((time.perf_counter() - start) * 1000)
+
+        async def login_worker(rng):
+            nonlocal errors
+            while time.monotonic() < stop_at:
+                start = time.perf_counter()
+                try:
+                    response = await http.post("/token", data={"username": rng.choice(emails), "password": PASSWORD})
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies["POST /token"].append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(
+            *[worker(random.Random(seed + i)) for i in range(clients)],
+            *[login_worker(random.Random(seed - i - 1)) for i in range(login_clients)],
+        )
+    return latencies, errors
+
+
+def report(mode, latencies, errors, duration):
+    # "all" is the API traffic; logins are reported on their own
+    combined = [latency for label, route in latencies.items() if label != "POST /token" for latency in route]
+    for label, timings in [("all", combined), *sorted(latencies.items())]:
+        if not timings:
+            continue
+        summary = RESULTS[f"{mode} {label}"] = summarize(timings, duration)
+        print(f"{mode:<9} {label:<26} req/s={summary['throughput']:>8.1f}  p50={summary['p50']:>8.1f}ms  "
+              f"p95={summary['p95']:>8.1f}ms  p99={summary['p99']:>8.1f}ms")
+    print(f"{mode:<9} errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="sync,async",
+                        help="comma-separated: sync (threadpool), async (DB_ASYNC) and/or inprocess (ASGI, no server)")
+    parser.add_argument("--clients", type=int, default=200, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per mode")
+    parser.add_argument("--users", type=int, default=20, help="users to generate")
+    parser.add_argument("--contacts-per-user", type=int, default=500, help="median contacts per generated user")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the generated data and the request mix")
+    parser.add_argument("--path", help="request only this GET endpoint instead of the route mix")
+    parser.add_argument("--login-clients", type=int, default=0, help="extra clients that only POST /token")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    routes = [("GET", args.path, None, 1)] if args.path else ROUTE_MIX
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load.db")
+        engine = make_engine(db_path)
+        data = generate(engine, args.users, args.contacts_per_user, seed=args.seed)
+        print(f"generated {data.users} users, {data.contacts} contacts, {data.deals} deals, "
+              f"{data.tasks} tasks, {data.interactions} interactions")
+        emails = [f"user{user_id}@example.com" for user_id in data.user_ids]
+        tokens = [create_access_token({"sub": email}) for email in emails]
+        load = dict(tokens=tokens, clients=args.clients, duration=args.duration, seed=args.seed,
+                    emails=emails, login_clients=args.login_clients)
+        for mode in args.modes.split(","):
+            if mode == "inprocess":
+                client_options = {"transport": in_process_transport(engine), "base_url": "http://loadtest"}
+                latencies, errors = asyncio.run(drive(client_options, routes, **load))
+            else:
+                port = free_port()
+                process = start_server(db_path, mode, port)
+                try:
+                    client_options = {"base_url": f"http://127.0.0.1:{port}"}
+                    latencies, errors = asyncio.run(drive(client_options, routes, **load))
+                finally:
+                    process.terminate()
+                    process.wait()
+            report(mode, latencies, errors, args.duration)
+        engine.dispose()
+    sys.exit(report_baseline(args, RESULTS, vars(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,46 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Union
+import asyncio
+import inspect
 import os
 from dotenv import load_dotenv
 
-from database import SessionLocal, engine, Base
-from models import User, Contact, Interaction, Task, Deal
+from database import engine, async_engine, pool_stats, Base, Database, SessionLocal, get_database
+from models import User, UserRole, Contact, Interaction, Task, Deal
 from schemas import (
     UserCreate, UserResponse, UserLogin,
     ContactCreate, ContactResponse, ContactUpdate,
     InteractionCreate, InteractionUpdate, InteractionResponse,
     TaskCreate, TaskResponse, TaskUpdate,
     DealCreate, DealResponse, DealUpdate,
-    DashboardStats
+    ContactFilter, TaskFilter, DealFilter,
+    ListInclude, InteractionWithContact, TaskWithContact, DealWithContact, ContactOverview,
+    BatchRequest, BatchResponse, SyncResponse, DashboardStats, PipelineAnalytics, StageDurationReport, FunnelReport, RebuildStatsReport, PipelineRefreshReport, CacheStats, PoolStats, SlowQueries, BulkImportReport, Page
 )
-from auth import get_password_hash, verify_password, create_access_token, get_current_user
+from pagination import Pagination, InvalidCursor, cursor_mode, encode_sync_token, decode_sync_token
+from bulk import import_records
+from batch import run_batch
+from export import ExportFormat, export_response
+from serialization import ORJSONResponse, RowSerializer
+from http_cache import conditional_get
+from analytics import ANALYTICS_REFRESH_SECONDS, refresh_periodically
+from reminders import REMINDERS_ENABLED, ReminderScheduler, make_sink
+from events import change_feed
+from metrics import METRICS_ENABLED, MetricsMiddleware, metrics
+from auth import hash_password, check_password, create_access_token, create_stream_token, STREAM_TOKEN_EXPIRE_SECONDS, get_current_user, get_current_admin, get_stream_user, user_cache
 from crud import (
-    create_user, get_user_by_email, get_users,
-    create_contact, get_contacts, get_contact, update_contact, delete_contact,
+    create_user, get_user_by_email, update_password_hash, get_users,
+    create_contact, get_contacts, search_contacts, get_contact, get_contact_overview, update_contact, delete_contact,
     create_interaction, get_interactions, get_interaction, update_interaction, delete_interaction, get_interactions_by_contact,
     create_task, get_tasks, get_task, update_task, delete_task,
     create_deal, get_deals, get_deal, update_deal, delete_deal,
-    get_dashboard_stats
+    get_changes, get_dashboard_stats, get_pipeline_analytics, get_stage_durations, get_stage_funnel, rebuild_stats, refresh_pipeline_snapshot,
+    USER_KEYSET, INTERACTION_KEYSET, CONTACT_SORTS, TASK_SORTS, DEAL_SORTS
 )
 
 load_dotenv()
@@ -32,7 +48,26 @@ load_dotenv()
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="ZenCRM API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the analytics snapshot fresh in the background; see analytics.py
+    refresher = asyncio.create_task(refresh_periodically()) if ANALYTICS_REFRESH_SECONDS > 0 else None
+    # Task due-date reminders; see reminders.py
+    reminders = ReminderScheduler(SessionLocal, make_sink()) if REMINDERS_ENABLED else None
+    if reminders is not None:
+        reminders.start()
+    # Publish crud writes to /events subscribers; see events.py
+    await change_feed.start()
+    yield
+    await change_feed.stop()
+    if refresher is not None:
+        refresher.cancel()
+        with suppress(asyncio.CancelledError):
+            await refresher
+    if reminders is not None:
+        await reminders.stop()
+
+app = FastAPI(title="ZenCRM API", version="1.0.0", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -43,189 +78,371 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally: 
-        db.close()
+# Per-route latency and SQL metrics, served at /metrics; see metrics.py
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+if METRICS_ENABLED:
+    metrics.enable([engine, async_engine.sync_engine if async_engine is not None else None])
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 # Default endpoint
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to ZenCRM API"}
 
 # Authentication endpoints
 @app.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = get_user_by_email(db, email=user.email)
+async def register(user: UserCreate, db: Database = Depends(get_database)):
+    db_user = await db.run(get_user_by_email, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
-    db_user = create_user(db, user, hashed_password)
+    hashed_password = await hash_password(user.password)
+    db_user = await db.run(create_user, user, hashed_password)
     return db_user
 
 @app.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Database = Depends(get_database)):
+    user = await db.run(get_user_by_email, email=form_data.username)
+    verified, new_hash = await check_password(form_data.password, user.hashed_password) if user else (False, None)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # Read before the rehash commit, which expires `user` and an AsyncSession cannot reload it here
+    email = user.email
+    if new_hash is not None:
+        # Stored with older argon2 parameters; upgrade it now that we have the password
+        await db.run(update_password_hash, user.id, new_hash)
     
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(data={"sub": email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 # User endpoints
 @app.get("/users/me", response_model=UserResponse)
-def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
-@app.get("/users", response_model=List[UserResponse])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    users = get_users(db, skip=skip, limit=limit)
-    return users
+@app.get("/users", response_model=Union[Page[UserResponse], List[UserResponse]])
+async def read_users(limit: int = 100, cursor: Optional[str] = None, pagination: Optional[Pagination] = None, skip: int = 0, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    if not cursor_mode(pagination, cursor, skip):
+        return USER_ROWS.response(await db.run(get_users, skip=skip, limit=limit))
+    users = await db.run(get_users, limit=limit + 1, cursor=cursor)
+    return USER_ROWS.response(USER_KEYSET.page(users, limit))
+
+def query_params(model):
+    """Dependency reading the fields of `model` from the query string; list fields repeat (?stage=a&stage=b)"""
+    def dependency(**params):
+        return model(**params)
+    dependency.__signature__ = inspect.Signature([
+        inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=field.annotation, default=Query(field.default))
+        for name, field in model.model_fields.items()
+    ])
+    return dependency
+
+def field_params(schema):
+    """Dependency for ?fields=a,b: the requested subset of `schema`'s fields, or None for all of them"""
+    def dependency(fields: Optional[str] = None) -> Optional[List[str]]:
+        if not fields:
+            return None
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in schema.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        return names
+    return dependency
+
+# List responses are serialized straight from the rows (see serialization.RowSerializer)
+USER_ROWS = RowSerializer(UserResponse)
+CONTACT_ROWS = RowSerializer(ContactResponse)
+INTERACTION_ROWS = RowSerializer(InteractionResponse)
+TASK_ROWS = RowSerializer(TaskResponse)
+DEAL_ROWS = RowSerializer(DealResponse)
+CONTACT_OVERVIEW = RowSerializer(ContactOverview)
+# ?include=contact: the same lists with each row's contact embedded
+INCLUDE_CONTACT_ROWS = {
+    Interaction: RowSerializer(InteractionWithContact),
+    Task: RowSerializer(TaskWithContact),
+    Deal: RowSerializer(DealWithContact),
+}
+
+def include_fields(fields: Optional[List[str]], include: Optional[ListInclude]) -> Optional[List[str]]:
+    """Keep an included relation in the response when ?fields= narrows it"""
+    return [*fields, include.value] if fields and include else fields
 
 # Contact endpoints
 @app.post("/contacts", response_model=ContactResponse)
-def create_contact_endpoint(contact: ContactCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return create_contact(db, contact, current_user.id)
+async def create_contact_endpoint(contact: ContactCreate, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await db.run(create_contact, contact, current_user.id)
+
+@app.post("/contacts/bulk", response_model=BulkImportReport)
+async def bulk_create_contacts_endpoint(request: Request, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await import_records(db, request, ContactCreate, Contact, current_user.id)
+
+@app.get("/contacts", response_model=Union[Page[ContactResponse], List[ContactResponse]])
+async def read_contacts(limit: int = 100, cursor: Optional[str] = None, pagination: Optional[Pagination] = None, skip: int = 0, filters: ContactFilter = Depends(query_params(ContactFilter)), fields: Optional[List[str]] = Depends(field_params(ContactResponse)), cache: dict = Depends(conditional_get("contacts")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    if not cursor_mode(pagination, cursor, skip):
+        return CONTACT_ROWS.response(await db.run(get_contacts, skip=skip, limit=limit, user_id=current_user.id, filters=filters, fields=fields), fields, headers=cache)
+    contacts = await db.run(get_contacts, limit=limit + 1, cursor=cursor, user_id=current_user.id, filters=filters, fields=fields)
+    return CONTACT_ROWS.response(CONTACT_SORTS[filters.sort].page(contacts, limit), fields, headers=cache)
+
+@app.get("/contacts/search", response_model=List[ContactResponse])
+async def search_contacts_endpoint(q: str, skip: int = 0, limit: int = Query(20, le=100), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await db.run(search_contacts, current_user.id, q, skip=skip, limit=limit)
 
-@app.get("/contacts", response_model=List[ContactResponse])
-def read_contacts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    contacts = get_contacts(db, skip=skip, limit=limit, user_id=current_user.id)
-    return contacts
+@app.get("/contacts/export")
+async def export_contacts(export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return export_response(db, Contact, current_user.id, export_format, "contacts")
 
 @app.get("/contacts/{contact_id}", response_model=ContactResponse)
-def read_contact(contact_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    contact = get_contact(db, contact_id=contact_id)
+async def read_contact(contact_id: int, cache: dict = Depends(conditional_get("contacts")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    contact = await db.run(get_contact, contact_id, current_user.id)
     if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
     return contact
 
+@app.get("/contacts/{contact_id}/overview", response_model=ContactOverview)
+async def read_contact_overview(contact_id: int, cache: dict = Depends(conditional_get("contacts", "interactions", "tasks", "deals")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    contact = await db.run(get_contact_overview, contact_id, current_user.id)
+    if contact is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return ORJSONResponse(CONTACT_OVERVIEW.one(contact), headers=cache)
+
 @app.put("/contacts/{contact_id}", response_model=ContactResponse)
-def update_contact_endpoint(contact_id: int, contact: ContactUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_contact = update_contact(db, contact_id, contact)
+async def update_contact_endpoint(contact_id: int, contact: ContactUpdate, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    db_contact = await db.run(update_contact, contact_id, contact, current_user.id)
     if db_contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
     return db_contact
 
 @app.delete("/contacts/{contact_id}")
-def delete_contact_endpoint(contact_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    success = delete_contact(db, contact_id)
+async def delete_contact_endpoint(contact_id: int, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    success = await db.run(delete_contact, contact_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Contact not found")
     return {"message": "Contact deleted successfully"}
 
 # Interaction endpoints
 @app.post("/interactions", response_model=InteractionResponse)
-def create_interaction_endpoint(interaction: InteractionCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return create_interaction(db, interaction, current_user.id)
+async def create_interaction_endpoint(interaction: InteractionCreate, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await db.run(create_interaction, interaction, current_user.id)
 
-@app.get("/interactions", response_model=List[InteractionResponse])
-def read_interactions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    interactions = get_interactions(db, skip=skip, limit=limit, user_id=current_user.id)
-    return interactions
+@app.get("/interactions", response_model=Union[Page[InteractionResponse], List[InteractionResponse]])
+async def read_interactions(limit: int = 100, cursor: Optional[str] = None, pagination: Optional[Pagination] = None, skip: int = 0, fields: Optional[List[str]] = Depends(field_params(InteractionResponse)), include: Optional[ListInclude] = None, cache: dict = Depends(conditional_get("interactions", "contacts")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    rows = INCLUDE_CONTACT_ROWS[Interaction] if include else INTERACTION_ROWS
+    if not cursor_mode(pagination, cursor, skip):
+        return rows.response(await db.run(get_interactions, skip=skip, limit=limit, user_id=current_user.id, fields=fields, include_contact=include is not None), include_fields(fields, include), headers=cache)
+    interactions = await db.run(get_interactions, limit=limit + 1, cursor=cursor, user_id=current_user.id, fields=fields, include_contact=include is not None)
+    return rows.response(INTERACTION_KEYSET.page(interactions, limit), include_fields(fields, include), headers=cache)
+
+@app.get("/interactions/export")
+async def export_interactions(export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return export_response(db, Interaction, current_user.id, export_format, "interactions")
 
 @app.get("/interactions/{interaction_id}", response_model=InteractionResponse)
-def read_interaction(interaction_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    interaction = get_interaction(db, interaction_id=interaction_id)
+async def read_interaction(interaction_id: int, cache: dict = Depends(conditional_get("interactions")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    interaction = await db.run(get_interaction, interaction_id, current_user.id)
     if interaction is None:
         raise HTTPException(status_code=404, detail="Interaction not found")
     return interaction
 
 @app.put("/interactions/{interaction_id}", response_model=InteractionResponse)
-def update_interaction_endpoint(interaction_id: int, interaction: InteractionUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_interaction = update_interaction(db, interaction_id, interaction)
+async def update_interaction_endpoint(interaction_id: int, interaction: InteractionUpdate, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    db_interaction = await db.run(update_interaction, interaction_id, interaction, current_user.id)
     if db_interaction is None:
         raise HTTPException(status_code=404, detail="Interaction not found")
     return db_interaction
 
 @app.delete("/interactions/{interaction_id}")
-def delete_interaction_endpoint(interaction_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    success = delete_interaction(db, interaction_id)
+async def delete_interaction_endpoint(interaction_id: int, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    success = await db.run(delete_interaction, interaction_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Interaction not found")
     return {"message": "Interaction deleted successfully"}
 
 @app.get("/contacts/{contact_id}/interactions", response_model=List[InteractionResponse])
-def read_contact_interactions(contact_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    interactions = get_interactions_by_contact(db, contact_id)
-    return interactions
+async def read_contact_interactions(contact_id: int, cache: dict = Depends(conditional_get("interactions")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    interactions = await db.run(get_interactions_by_contact, contact_id, current_user.id)
+    return INTERACTION_ROWS.response(interactions, headers=cache)
 
 # Task endpoints
 @app.post("/tasks", response_model=TaskResponse)
-def create_task_endpoint(task: TaskCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return create_task(db, task, current_user.id)
+async def create_task_endpoint(task: TaskCreate, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await db.run(create_task, task, current_user.id)
+
+@app.post("/tasks/bulk", response_model=BulkImportReport)
+async def bulk_create_tasks_endpoint(request: Request, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await import_records(db, request, TaskCreate, Task, current_user.id)
+
+@app.get("/tasks", response_model=Union[Page[TaskResponse], List[TaskResponse]])
+async def read_tasks(limit: int = 100, cursor: Optional[str] = None, pagination: Optional[Pagination] = None, skip: int = 0, filters: TaskFilter = Depends(query_params(TaskFilter)), fields: Optional[List[str]] = Depends(field_params(TaskResponse)), include: Optional[ListInclude] = None, cache: dict = Depends(conditional_get("tasks", "contacts")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    rows = INCLUDE_CONTACT_ROWS[Task] if include else TASK_ROWS
+    if not cursor_mode(pagination, cursor, skip):
+        return rows.response(await db.run(get_tasks, skip=skip, limit=limit, user_id=current_user.id, filters=filters, fields=fields, include_contact=include is not None), include_fields(fields, include), headers=cache)
+    tasks = await db.run(get_tasks, limit=limit + 1, cursor=cursor, user_id=current_user.id, filters=filters, fields=fields, include_contact=include is not None)
+    return rows.response(TASK_SORTS[filters.sort].page(tasks, limit), include_fields(fields, include), headers=cache)
 
-@app.get("/tasks", response_model=List[TaskResponse])
-def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    tasks = get_tasks(db, skip=skip, limit=limit, user_id=current_user.id)
-    return tasks
+@app.get("/tasks/export")
+async def export_tasks(export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return export_response(db, Task, current_user.id, export_format, "tasks")
 
 @app.get("/tasks/{task_id}", response_model=TaskResponse)
-def read_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    task = get_task(db, task_id=task_id)
+async def read_task(task_id: int, cache: dict = Depends(conditional_get("tasks")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    task = await db.run(get_task, task_id, current_user.id)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
 
 @app.put("/tasks/{task_id}", response_model=TaskResponse)
-def update_task_endpoint(task_id: int, task: TaskUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_task = update_task(db, task_id, task)
+async def update_task_endpoint(task_id: int, task: TaskUpdate, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    db_task = await db.run(update_task, task_id, task, current_user.id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
 
 @app.delete("/tasks/{task_id}")
-def delete_task_endpoint(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    success = delete_task(db, task_id)
+async def delete_task_endpoint(task_id: int, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    success = await db.run(delete_task, task_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Task not found")
     return {"message": "Task deleted successfully"}
 
 # Deal endpoints
 @app.post("/deals", response_model=DealResponse)
-def create_deal_endpoint(deal: DealCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return create_deal(db, deal, current_user.id)
+async def create_deal_endpoint(deal: DealCreate, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await db.run(create_deal, deal, current_user.id)
 
-@app.get("/deals", response_model=List[DealResponse])
-def read_deals(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    deals = get_deals(db, skip=skip, limit=limit, user_id=current_user.id)
-    return deals
+@app.post("/deals/bulk", response_model=BulkImportReport)
+async def bulk_create_deals_endpoint(request: Request, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await import_records(db, request, DealCreate, Deal, current_user.id)
+
+@app.get("/deals", response_model=Union[Page[DealResponse], List[DealResponse]])
+async def read_deals(limit: int = 100, cursor: Optional[str] = None, pagination: Optional[Pagination] = None, skip: int = 0, filters: DealFilter = Depends(query_params(DealFilter)), fields: Optional[List[str]] = Depends(field_params(DealResponse)), include: Optional[ListInclude] = None, cache: dict = Depends(conditional_get("deals", "contacts")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    rows = INCLUDE_CONTACT_ROWS[Deal] if include else DEAL_ROWS
+    if not cursor_mode(pagination, cursor, skip):
+        return rows.response(await db.run(get_deals, skip=skip, limit=limit, user_id=current_user.id, filters=filters, fields=fields, include_contact=include is not None), include_fields(fields, include), headers=cache)
+    deals = await db.run(get_deals, limit=limit + 1, cursor=cursor, user_id=current_user.id, filters=filters, fields=fields, include_contact=include is not None)
+    return rows.response(DEAL_SORTS[filters.sort].page(deals, limit), include_fields(fields, include), headers=cache)
+
+@app.get("/deals/export")
+async def export_deals(export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return export_response(db, Deal, current_user.id, export_format, "deals")
 
 @app.get("/deals/{deal_id}", response_model=DealResponse)
-def read_deal(deal_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    deal = get_deal(db, deal_id=deal_id)
+async def read_deal(deal_id: int, cache: dict = Depends(conditional_get("deals")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    deal = await db.run(get_deal, deal_id, current_user.id)
     if deal is None:
         raise HTTPException(status_code=404, detail="Deal not found")
     return deal
 
 @app.put("/deals/{deal_id}", response_model=DealResponse)
-def update_deal_endpoint(deal_id: int, deal: DealUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_deal = update_deal(db, deal_id, deal)
+async def update_deal_endpoint(deal_id: int, deal: DealUpdate, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    db_deal = await db.run(update_deal, deal_id, deal, current_user.id)
     if db_deal is None:
         raise HTTPException(status_code=404, detail="Deal not found")
     return db_deal
 
 @app.delete("/deals/{deal_id}")
-def delete_deal_endpoint(deal_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    success = delete_deal(db, deal_id)
+async def delete_deal_endpoint(deal_id: int, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    success = await db.run(delete_deal, deal_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Deal not found")
     return {"message": "Deal deleted successfully"}
 
+# Batch endpoints
+@app.post("/batch", response_model=BatchResponse)
+async def batch_endpoint(batch: BatchRequest, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await run_batch(db, batch, current_user.id)
+
+# Sync endpoints
+@app.get("/sync", response_model=SyncResponse)
+async def sync_endpoint(since: Optional[str] = None, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    changes = await db.run(get_changes, current_user.id, decode_sync_token(since) if since else None)
+    return ORJSONResponse({
+        "token": encode_sync_token(changes["versions"]),
+        "reset": changes["reset"],
+        "contacts": CONTACT_ROWS.dicts(changes["contacts"]),
+        "interactions": INTERACTION_ROWS.dicts(changes["interactions"]),
+        "tasks": TASK_ROWS.dicts(changes["tasks"]),
+        "deals": DEAL_ROWS.dicts(changes["deals"]),
+        "deleted": changes["deleted"],
+    })
+
+# Change feed endpoints
+@app.post("/events/token")
+async def events_token(current_user: User = Depends(get_current_user)):
+    return {"stream_token": create_stream_token(current_user.email), "expires_in": STREAM_TOKEN_EXPIRE_SECONDS}
+
+@app.get("/events")
+async def events(current_user: User = Depends(get_stream_user)):
+    return StreamingResponse(
+        change_feed.stream(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # Dashboard endpoints
 @app.get("/dashboard/stats", response_model=DashboardStats)
-def get_dashboard_stats_endpoint(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return get_dashboard_stats(db, current_user.id)
+async def get_dashboard_stats_endpoint(cache: dict = Depends(conditional_get("contacts", "interactions", "tasks", "deals")), db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await db.run(get_dashboard_stats, current_user.id)
+
+# Analytics endpoints
+@app.get("/analytics/pipeline", response_model=PipelineAnalytics)
+async def pipeline_analytics(db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    # Admins see the whole team, everyone else their own deals
+    owner_ids = None if current_user.role == UserRole.ADMIN else [current_user.id]
+    return await db.run(get_pipeline_analytics, owner_ids)
+
+@app.get("/analytics/stage-durations", response_model=StageDurationReport)
+async def stage_durations(start: Optional[datetime] = None, end: Optional[datetime] = None, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await db.run(get_stage_durations, current_user.id, start, end)
+
+@app.get("/analytics/funnel", response_model=FunnelReport)
+async def stage_funnel(start: Optional[datetime] = None, end: Optional[datetime] = None, db: Database = Depends(get_database), current_user: User = Depends(get_current_user)):
+    return await db.run(get_stage_funnel, current_user.id, start, end)
+
+# Admin endpoints
+@app.post("/admin/rebuild-stats", response_model=RebuildStatsReport)
+async def rebuild_stats_endpoint(db: Database = Depends(get_database), current_user: User = Depends(get_current_admin)):
+    return await db.run(rebuild_stats)
+
+@app.post("/admin/refresh-analytics", response_model=PipelineRefreshReport)
+async def refresh_analytics_endpoint(db: Database = Depends(get_database), current_user: User = Depends(get_current_admin)):
+    return await db.run(refresh_pipeline_snapshot)
+
+@app.get("/admin/cache-stats", response_model=CacheStats)
+async def cache_stats_endpoint(current_user: User = Depends(get_current_admin)):
+    return {"user_cache": user_cache.stats()}
+
+@app.get("/admin/pool-stats", response_model=PoolStats, response_model_by_alias=True)
+async def pool_stats_endpoint(current_user: User = Depends(get_current_admin)):
+    return {
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine) if async_engine is not None else None,
+    }
+
+@app.get("/admin/slow-queries", response_model=SlowQueries)
+async def slow_queries_endpoint(current_user: User = Depends(get_current_admin)):
+    return {
+        "threshold_ms": metrics.slow_query_seconds * 1000,
+        "total": metrics.slow_query_count,
+        "samples": list(reversed(metrics.slow_queries)),
+    }
+
+# Prometheus scrape endpoint; unauthenticated like most exporters, so keep it off the public
+# listener (or leave METRICS_ENABLED unset) in production
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 if __name__ == "__main__":
     import uvicorn
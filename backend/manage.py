@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the ZenCRM backend
+
+Usage:
+    python manage.py rebuild-stats
+    python manage.py refresh-analytics
+    python manage.py generate --users 50 --contacts-per-user 200 --seed 42
+    python manage.py set-role --email admin@example.com --role admin
+"""
+import argparse
+
+from database import SessionLocal, engine, Base
+from crud import rebuild_stats, refresh_pipeline_snapshot, set_user_role
+from datagen import PASSWORD, generate
+from models import UserRole
+
+
+def cmd_rebuild_stats(args):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        report = rebuild_stats(db)
+    finally:
+        db.close()
+    print(f"Checked {report.owners_checked} owners")
+    for owner_id in report.missing_owners:
+        print(f"owner {owner_id}: rollup row was missing, created")
+    for drift in report.drift:
+        print(f"owner {drift.owner_id}: {drift.field} stored={drift.stored} actual={drift.actual}")
+    if not report.missing_owners and not report.drift:
+        print("No drift found")
+
+
+def cmd_refresh_analytics(args):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        report = refresh_pipeline_snapshot(db)
+    finally:
+        db.close()
+    print(f"Pipeline snapshot refreshed at {report.refreshed_at:%Y-%m-%d %H:%M:%S}: {report.deals} deals, {report.owners} owners")
+
+
+def cmd_generate(args):
+    data = generate(engine, args.users, args.contacts_per_user, seed=args.seed)
+    print(f"Generated {data.users} users (user{data.user_ids.start}@example.com.. with password {PASSWORD!r}), "
+          f"{data.contacts} contacts, {data.interactions} interactions, {data.tasks} tasks, "
+          f"{data.deals} deals, {data.stage_events} stage events")
+
+
+def cmd_set_role(args):
+    if not args.email:
+        raise SystemExit("set-role needs --email")
+    db = SessionLocal()
+    try:
+        user = set_user_role(db, args.email, UserRole(args.role))
+    finally:
+        db.close()
+    if user is None:
+        raise SystemExit(f"No user with email {args.email}")
+    # Running servers pick the change up once their cached copy of the user expires (USER_CACHE_TTL_SECONDS)
+    print(f"{args.email} is now {args.role}")
+
+
+COMMANDS = {
+    "rebuild-stats": cmd_rebuild_stats,
+    "refresh-analytics": cmd_refresh_analytics,
+    "generate": cmd_generate,
+    "set-role": cmd_set_role,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--users", type=int, default=10, help="generate: users to add")
+    parser.add_argument("--contacts-per-user", type=int, default=200, help="generate: median contacts per user")
+    parser.add_argument("--seed", type=int, default=42, help="generate: random seed")
+    parser.add_argument("--email", help="set-role: the user's email")
+    parser.add_argument("--role", choices=[role.value for role in UserRole], default=UserRole.ADMIN.value, help="set-role: role to grant")
+    args = parser.parse_args()
+    COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Per-route request metrics: latency histograms, SQL statement counts and time, slow-query
+samples, a Server-Timing header and a Prometheus /metrics rendering
+"""
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+
+from database import time_statements
+
+# Instrument requests and statements; when off the middleware only checks this flag and the
+# engines carry no hooks
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+# Statements slower than this are kept as samples for /admin/slow-queries
+METRICS_SLOW_QUERY_MS = float(os.getenv("METRICS_SLOW_QUERY_MS", "100"))
+METRICS_SLOW_QUERY_SAMPLES = int(os.getenv("METRICS_SLOW_QUERY_SAMPLES", "100"))
+
+# Latency histogram bucket bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# [statements, seconds, scope] of the request being served; worker threads see it through the
+# context that run_in_threadpool copies
+_request_db = ContextVar("request_db", default=None)
+
+
+class RouteStats:
+    __slots__ = ("buckets", "latency_sum", "requests", "statements", "db_seconds", "statuses")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.requests = 0
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.statuses = {}
+
+
+class RequestMetrics:
+    def __init__(self, slow_query_ms: float = METRICS_SLOW_QUERY_MS, samples: int = METRICS_SLOW_QUERY_SAMPLES):
+        self.enabled = False
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.routes = {}  # (method, route) -> RouteStats
+        self.slow_queries = deque(maxlen=samples)
+        self.slow_query_count = 0
+        self._lock = threading.Lock()
+        self._unhook = []
+
+    def enable(self, engines):
+        if self.enabled:
+            return
+        self._unhook = [time_statements(engine, self.record_statement) for engine in engines if engine is not None]
+        self.enabled = True
+
+    def disable(self):
+        for unhook in self._unhook:
+            unhook()
+        self._unhook = []
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.routes.clear()
+            self.slow_queries.clear()
+            self.slow_query_count = 0
+
+    def record_statement(self, statement: str, seconds: float):
+        current = _request_db.get()
+        if current is not None:
+            current[0] += 1
+            current[1] += seconds
+        if seconds >= self.slow_query_seconds:
+            with self._lock:
+                self.slow_query_count += 1
+                self.slow_queries.append({
+                    "statement": statement, "duration_ms": seconds * 1000, "at": datetime.utcnow(),
+                    "route": _route(current[2]) if current is not None else None,
+                })
+
+    def record_request(self, method: str, route: str, status: int, seconds: float, statements: int, db_seconds: float):
+        with self._lock:
+            stats = self.routes.get((method, route))
+            if stats is None:
+                stats = self.routes[(method, route)] = RouteStats()
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            stats.latency_sum += seconds
+            stats.requests += 1
+            stats.statements += statements
+            stats.db_seconds += db_seconds
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                "# HELP zencrm_http_request_duration_seconds Request latency by route",
+                "# TYPE zencrm_http_request_duration_seconds histogram",
+            ]
+            for (method, route), stats in routes:
+                labels = f'method="{method}",route="{_escape(route)}"'
+                cumulative = 0
+                for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), stats.buckets):
+                    cumulative += count
+                    lines.append(f'zencrm_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"zencrm_http_request_duration_seconds_sum{{{labels}}} {stats.latency_sum}")
+                lines.append(f"zencrm_http_request_duration_seconds_count{{{labels}}} {stats.requests}")
+            lines += [
+                "# HELP zencrm_http_requests_total Requests by route and status code",
+                "# TYPE zencrm_http_requests_total counter",
+            ]
+            for (method, route), stats in routes:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'zencrm_http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+            lines += [
+                "# HELP zencrm_db_statements_total SQL statements executed while serving each route",
+                "# TYPE zencrm_db_statements_total counter",
+            ]
+            for (method, route), stats in routes:
+                lines.append(f'zencrm_db_statements_total{{method="{method}",route="{_escape(route)}"}} {stats.statements}')
+            lines += [
+                "# HELP zencrm_db_duration_seconds_total Time spent in SQL statements while serving each route",
+                "# TYPE zencrm_db_duration_seconds_total counter",
+            ]
+            for (method, route), stats in routes:
+                lines.append(f'zencrm_db_duration_seconds_total{{method="{method}",route="{_escape(route)}"}} {stats.db_seconds}')
+            lines += [
+                f"# HELP zencrm_db_slow_queries_total Statements slower than {self.slow_query_seconds * 1000:g}ms",
+                "# TYPE zencrm_db_slow_queries_total counter",
+                f"zencrm_db_slow_queries_total {self.slow_query_count}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def _route(scope) -> str:
+    """The matched route's path template, so /contacts/1 and /contacts/2 share a series"""
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each HTTP request and the SQL it runs, by route template. Adds
+    Server-Timing (total, db) to the response headers. Passes straight through when disabled.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if not self.metrics.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        current = [0, 0.0, scope]
+        token = _request_db.set(current)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                timing = f'total;dur={total_ms:.1f}, db;dur={current[1] * 1000:.1f};desc="{current[0]} statements"'
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_db.reset(token)
+            self.metrics.record_request(scope["method"], _route(scope), status, time.perf_counter() - started, current[0], current[1])
+
+
+metrics = RequestMetrics()
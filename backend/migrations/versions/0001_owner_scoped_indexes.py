@@ -0,0 +1,45 @@
+"""Composite indexes for owner-scoped queries
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables themselves are created by Base.metadata.create_all() in main.py, which also
+# creates these indexes on a fresh database, hence if_not_exists.
+INDEXES = [
+    ("ix_contacts_owner_id_status", "contacts", ["owner_id", "status"]),
+    ("ix_contacts_owner_id_id", "contacts", ["owner_id", "id"]),
+    ("ix_interactions_user_id_created_at", "interactions", ["user_id", sa.text("created_at DESC"), sa.text("id DESC")]),
+    ("ix_interactions_contact_id_created_at", "interactions", ["contact_id", sa.text("created_at DESC")]),
+    ("ix_tasks_owner_id_status", "tasks", ["owner_id", "status"]),
+    ("ix_tasks_owner_id_id", "tasks", ["owner_id", "id"]),
+    ("ix_tasks_contact_id", "tasks", ["contact_id"]),
+    ("ix_deals_owner_id_stage", "deals", ["owner_id", "stage"]),
+    ("ix_deals_owner_id_id", "deals", ["owner_id", "id"]),
+    ("ix_deals_contact_id", "deals", ["contact_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,36 @@
+"""Owner-scoped indexes for the list sort options
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_contacts_owner_id_last_name", "contacts", ["owner_id", "last_name", "id"]),
+    ("ix_tasks_owner_id_due_date", "tasks", ["owner_id", "due_date", "id"]),
+    ("ix_deals_owner_id_value", "deals", ["owner_id", "value", "id"]),
+    ("ix_deals_owner_id_expected_close_date", "deals", ["owner_id", "expected_close_date", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,60 @@
+"""Row sync versions, interactions.updated_at and tombstones for /sync
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Existing rows keep a NULL sync_version: clients without a token get them in the full sync
+SYNCED = [("contacts", "owner_id"), ("interactions", "user_id"), ("tasks", "owner_id"), ("deals", "owner_id")]
+
+
+def _has_column(table: str, column: str) -> bool:
+    # Databases built by main.py's create_all already have the columns of the current models
+    return column in {existing["name"] for existing in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Plain ALTER TABLE rather than batch mode: a batch table rebuild would drop the contacts FTS triggers
+    if not _has_column("interactions", "updated_at"):
+        op.add_column("interactions", sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.execute("UPDATE interactions SET updated_at = created_at")
+    for table, owner in SYNCED:
+        if not _has_column(table, "sync_version"):
+            op.add_column(table, sa.Column("sync_version", sa.Integer(), nullable=True))
+        op.create_index(f"ix_{table}_{owner}_sync_version", table, [owner, "sync_version"], if_not_exists=True)
+    op.create_table(
+        "tombstones",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("collection", sa.String(), nullable=False),
+        sa.Column("object_id", sa.Integer(), nullable=False),
+        sa.Column("sync_version", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_tombstones_owner_id_collection_sync_version", "tombstones",
+                    ["owner_id", "collection", "sync_version"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tombstones_owner_id_collection_sync_version", table_name="tombstones", if_exists=True)
+    op.drop_table("tombstones", if_exists=True)
+    for table, owner in reversed(SYNCED):
+        op.drop_index(f"ix_{table}_{owner}_sync_version", table_name=table, if_exists=True)
+        op.drop_column(table, "sync_version")
+    op.drop_column("interactions", "updated_at")
@@ -0,0 +1,58 @@
+"""Pipeline analytics snapshot tables for /analytics/pipeline
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEAL_STAGE = sa.Enum(
+    "PROSPECTING", "QUALIFICATION", "PROPOSAL", "NEGOTIATION", "CLOSED_WON", "CLOSED_LOST", name="dealstage", create_type=False
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Both tables are filled by the first refresh (the app's background task or manage.py refresh-analytics)
+    op.create_table(
+        "pipeline_stage_snapshots",
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("stage", DEAL_STAGE, primary_key=True),
+        sa.Column("deal_count", sa.Integer(), nullable=False),
+        sa.Column("total_value", sa.Float(), nullable=False),
+        sa.Column("weighted_value", sa.Float(), nullable=False),
+        sa.Column("total_days_in_stage", sa.Float(), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_pipeline_stage_snapshots_refreshed_at", "pipeline_stage_snapshots", ["refreshed_at"], if_not_exists=True
+    )
+    op.create_table(
+        "pipeline_forecast_snapshots",
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("month", sa.String(), primary_key=True),
+        sa.Column("deal_count", sa.Integer(), nullable=False),
+        sa.Column("total_value", sa.Float(), nullable=False),
+        sa.Column("weighted_value", sa.Float(), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("pipeline_forecast_snapshots", if_exists=True)
+    op.drop_index("ix_pipeline_stage_snapshots_refreshed_at", table_name="pipeline_stage_snapshots", if_exists=True)
+    op.drop_table("pipeline_stage_snapshots", if_exists=True)
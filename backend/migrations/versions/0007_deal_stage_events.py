@@ -0,0 +1,50 @@
+"""Append-only deal stage history
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEAL_STAGE = sa.Enum(
+    "PROSPECTING", "QUALIFICATION", "PROPOSAL", "NEGOTIATION", "CLOSED_WON", "CLOSED_LOST", name="dealstage", create_type=False
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No backfill: past stage changes were never recorded, and existing deals count their
+    # current stage from created_at until their next move
+    op.create_table(
+        "deal_stage_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("deal_id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("from_stage", DEAL_STAGE, nullable=True),
+        sa.Column("to_stage", DEAL_STAGE, nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+        sa.Column("seconds_in_from_stage", sa.Float(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_deal_stage_events_owner_id_changed_at", "deal_stage_events", ["owner_id", "changed_at"], if_not_exists=True
+    )
+    op.create_index("ix_deal_stage_events_deal_id", "deal_stage_events", ["deal_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_deal_stage_events_deal_id", table_name="deal_stage_events", if_exists=True)
+    op.drop_index("ix_deal_stage_events_owner_id_changed_at", table_name="deal_stage_events", if_exists=True)
+    op.drop_table("deal_stage_events", if_exists=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Boolean, Enum, Index, DDL, event
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -72,12 +72,57 @@ class Contact(Base):
     owner_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sync_version = Column(Integer)
 
     # Relationships
     owner = relationship("User", back_populates="contacts")
-    interactions = relationship("Interaction", back_populates="contact")
-    tasks = relationship("Task", back_populates="contact")
-    deals = relationship("Deal", back_populates="contact")
+    interactions = relationship("Interaction", back_populates="contact", order_by="(Interaction.created_at.desc(), Interaction.id.desc())")
+    tasks = relationship("Task", back_populates="contact", order_by="Task.id")
+    deals = relationship("Deal", back_populates="contact", order_by="Deal.id")
+
+    __table_args__ = (
+        Index("ix_contacts_owner_id_status", "owner_id", "status"),
+        Index("ix_contacts_owner_id_id", "owner_id", "id"),
+        Index("ix_contacts_owner_id_last_name", "owner_id", "last_name", "id"),
+        Index("ix_contacts_owner_id_sync_version", "owner_id", "sync_version"),
+    )
+
+# Full-text search over contacts: an external-content FTS5 table kept in sync by triggers on
+# SQLite, a generated tsvector column with a GIN index on PostgreSQL. owner_id is indexed as a
+# token so the MATCH itself is owner-scoped; its bm25 weight is 0 so it never affects ranking.
+CONTACT_SEARCH_COLUMNS = ["first_name", "last_name", "email", "company", "position", "notes"]
+
+_fts_columns = ", ".join(["owner_id"] + CONTACT_SEARCH_COLUMNS)
+_new_values = ", ".join(f"new.{name}" for name in ["id", "owner_id"] + CONTACT_SEARCH_COLUMNS)
+_old_values = ", ".join(f"old.{name}" for name in ["id", "owner_id"] + CONTACT_SEARCH_COLUMNS)
+
+CONTACT_SEARCH_DDL = {
+    "sqlite": [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5({_fts_columns}, "
+        "content='contacts', content_rowid='id', prefix='2 3 4 5 6', tokenize='unicode61 remove_diacritics 2')",
+        "INSERT INTO contacts_fts(contacts_fts, rank) VALUES ('rank', 'bm25(0.0, 10.0, 10.0, 5.0, 5.0, 2.0, 1.0)')",
+        f"CREATE TRIGGER IF NOT EXISTS contacts_fts_insert AFTER INSERT ON contacts BEGIN "
+        f"INSERT INTO contacts_fts(rowid, {_fts_columns}) VALUES ({_new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS contacts_fts_delete AFTER DELETE ON contacts BEGIN "
+        f"INSERT INTO contacts_fts(contacts_fts, rowid, {_fts_columns}) VALUES ('delete', {_old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS contacts_fts_update AFTER UPDATE OF {_fts_columns} ON contacts BEGIN "
+        f"INSERT INTO contacts_fts(contacts_fts, rowid, {_fts_columns}) VALUES ('delete', {_old_values}); "
+        f"INSERT INTO contacts_fts(rowid, {_fts_columns}) VALUES ({_new_values}); END",
+    ],
+    "postgresql": [
+        "ALTER TABLE contacts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(email, '') || ' ' || coalesce(company, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(position, '')), 'C') || "
+        "setweight(to_tsvector('simple', coalesce(notes, '')), 'D')) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_contacts_search_vector ON contacts USING GIN (search_vector)",
+    ],
+}
+
+for _dialect, _statements in CONTACT_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Contact.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+event.listen(Contact.__table__, "before_drop", DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"))
 
 class Interaction(Base):
     __tablename__ = "interactions"
@@ -90,11 +135,19 @@ class Interaction(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     scheduled_date = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sync_version = Column(Integer)
 
     # Relationships
     contact = relationship("Contact", back_populates="interactions")
     user = relationship("User", back_populates="interactions")
 
+    __table_args__ = (
+        Index("ix_interactions_user_id_created_at", "user_id", created_at.desc(), id.desc()),
+        Index("ix_interactions_contact_id_created_at", "contact_id", created_at.desc()),
+        Index("ix_interactions_user_id_sync_version", "user_id", "sync_version"),
+    )
+
 class Task(Base):
     __tablename__ = "tasks"
 
@@ -108,11 +161,21 @@ class Task(Base):
     owner_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sync_version = Column(Integer)
 
     # Relationships
     contact = relationship("Contact", back_populates="tasks")
     owner = relationship("User", back_populates="tasks")
 
+    __table_args__ = (
+        Index("ix_tasks_owner_id_status", "owner_id", "status"),
+        Index("ix_tasks_owner_id_id", "owner_id", "id"),
+        Index("ix_tasks_contact_id", "contact_id"),
+        Index("ix_tasks_owner_id_due_date", "owner_id", "due_date", "id"),
+        Index("ix_tasks_owner_id_sync_version", "owner_id", "sync_version"),
+        Index("ix_tasks_status_due_date", "status", "due_date"),
+    )
+
 class Deal(Base):
     __tablename__ = "deals"
 
@@ -127,7 +190,111 @@ class Deal(Base):
     owner_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sync_version = Column(Integer)
 
     # Relationships
     contact = relationship("Contact", back_populates="deals")
     owner = relationship("User", back_populates="deals")
+
+    __table_args__ = (
+        Index("ix_deals_owner_id_stage", "owner_id", "stage"),
+        Index("ix_deals_owner_id_id", "owner_id", "id"),
+        Index("ix_deals_contact_id", "contact_id"),
+        Index("ix_deals_owner_id_value", "owner_id", "value", "id"),
+        Index("ix_deals_owner_id_expected_close_date", "owner_id", "expected_close_date", "id"),
+        Index("ix_deals_owner_id_sync_version", "owner_id", "sync_version"),
+    )
+
+class OwnerStats(Base):
+    """Per-owner rollup of dashboard counters, maintained by the crud write paths"""
+    __tablename__ = "owner_stats"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_contacts = Column(Integer, default=0, nullable=False)
+    lead_contacts = Column(Integer, default=0, nullable=False)
+    prospect_contacts = Column(Integer, default=0, nullable=False)
+    customer_contacts = Column(Integer, default=0, nullable=False)
+    total_tasks = Column(Integer, default=0, nullable=False)
+    pending_tasks = Column(Integer, default=0, nullable=False)
+    in_progress_tasks = Column(Integer, default=0, nullable=False)
+    completed_tasks = Column(Integer, default=0, nullable=False)
+    cancelled_tasks = Column(Integer, default=0, nullable=False)
+    total_deals = Column(Integer, default=0, nullable=False)
+    prospecting_deals = Column(Integer, default=0, nullable=False)
+    qualification_deals = Column(Integer, default=0, nullable=False)
+    proposal_deals = Column(Integer, default=0, nullable=False)
+    negotiation_deals = Column(Integer, default=0, nullable=False)
+    closed_won_deals = Column(Integer, default=0, nullable=False)
+    closed_lost_deals = Column(Integer, default=0, nullable=False)
+    total_deal_value = Column(Float, default=0, nullable=False)
+
+class CollectionVersion(Base):
+    """Per-owner change counter for each collection, bumped by the crud write paths; backs ETag/Last-Modified"""
+    __tablename__ = "collection_versions"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    collection = Column(String, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    changed_at = Column(DateTime)
+
+class Tombstone(Base):
+    """Record of a deleted row, so /sync can report deletions to clients holding a copy of it"""
+    __tablename__ = "tombstones"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    collection = Column(String, nullable=False)
+    object_id = Column(Integer, nullable=False)
+    sync_version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_tombstones_owner_id_collection_sync_version", "owner_id", "collection", "sync_version"),
+    )
+
+class DealStageEvent(Base):
+    """
+    Append-only history of deal stage changes, written by the crud deal writes. Each event keeps
+    how long the deal spent in the stage it left; rows outlive their deal, so deal_id has no FK.
+    """
+    __tablename__ = "deal_stage_events"
+
+    id = Column(Integer, primary_key=True)
+    deal_id = Column(Integer, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    from_stage = Column(Enum(DealStage))  # NULL when the deal was created
+    to_stage = Column(Enum(DealStage), nullable=False)
+    changed_at = Column(DateTime, nullable=False)
+    seconds_in_from_stage = Column(Float)
+
+    __table_args__ = (
+        Index("ix_deal_stage_events_owner_id_changed_at", "owner_id", "changed_at"),
+        Index("ix_deal_stage_events_deal_id", "deal_id"),
+    )
+
+class PipelineStageSnapshot(Base):
+    """Deals per owner and stage, rebuilt wholesale by crud.refresh_pipeline_snapshot; read by /analytics/pipeline"""
+    __tablename__ = "pipeline_stage_snapshots"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    stage = Column(Enum(DealStage), primary_key=True)
+    deal_count = Column(Integer, nullable=False)
+    total_value = Column(Float, nullable=False)
+    weighted_value = Column(Float, nullable=False)
+    total_days_in_stage = Column(Float, nullable=False)
+    refreshed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_pipeline_stage_snapshots_refreshed_at", "refreshed_at"),
+    )
+
+class PipelineForecastSnapshot(Base):
+    """Open deals per owner and expected close month, rebuilt alongside PipelineStageSnapshot"""
+    __tablename__ = "pipeline_forecast_snapshots"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(String, primary_key=True)  # YYYY-MM
+    deal_count = Column(Integer, nullable=False)
+    total_value = Column(Float, nullable=False)
+    weighted_value = Column(Float, nullable=False)
+    refreshed_at = Column(DateTime, nullable=False)
@@ -0,0 +1,128 @@
+import base64
+import enum
+import json
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, false, or_, DateTime
+
+
+class Pagination(str, enum.Enum):
+    CURSOR = "cursor"
+    OFFSET = "offset"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Keyset:
+    """
+    Sort order of a list query. A cursor is the opaque encoding of these column
+    values for the last row of a page, so the next page starts with an indexed
+    range condition instead of an OFFSET scan.
+    """
+
+    def __init__(self, *columns, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+        # Columns the app always fills (they have a default) are treated as NOT NULL so the
+        # cursor condition stays a plain index range
+        self.nullable = {column.key for column in columns if column.nullable and column.default is None}
+
+    def encode(self, row) -> str:
+        values = []
+        for column in self.columns:
+            value = getattr(row, column.key)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError
+            if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+                raise ValueError
+            return [
+                datetime.fromisoformat(value) if isinstance(column.type, DateTime) and value is not None else value
+                for column, value in zip(self.columns, values)
+            ]
+        except (ValueError, TypeError):
+            # Not base64/JSON, the wrong shape, or a value of the wrong type for its column
+            raise InvalidCursor("Invalid cursor")
+
+    # NULLs sort as the smallest value: first when ascending, last when descending (SQLite's
+    # default, spelled out for PostgreSQL), so a cursor can resume inside or after a NULL run.
+    def _order(self, column):
+        nullable = column.key in self.nullable
+        if self.descending:
+            return column.desc().nulls_last() if nullable else column.desc()
+        return column.asc().nulls_first() if nullable else column.asc()
+
+    @staticmethod
+    def _equal(column, value):
+        return column.is_(None) if value is None else column == value
+
+    def _beyond(self, column, value):
+        if self.descending:
+            if value is None:
+                return false()
+            return or_(column < value, column.is_(None)) if column.key in self.nullable else column < value
+        return column.is_not(None) if value is None else column > value
+
+    def apply(self, query, limit: int, cursor: Optional[str] = None, skip: int = 0):
+        """Order `query` by the keyset and limit it to one page, after `cursor` or else at offset `skip`"""
+        if cursor:
+            values = self.decode(cursor)
+            clauses = []
+            for i, column in enumerate(self.columns):
+                ties = [self._equal(c, v) for c, v in zip(self.columns[:i], values[:i])]
+                clauses.append(and_(*ties, self._beyond(column, values[i])))
+            query = query.filter(or_(*clauses))
+        query = query.order_by(*[self._order(column) for column in self.columns])
+        if skip and not cursor:
+            query = query.offset(skip)
+        return query.limit(limit)
+
+    def page(self, rows: list, limit: int) -> dict:
+        """Build the paginated envelope from up to `limit + 1` rows; the extra row only signals that more exist"""
+        items = rows[:limit]
+        next_cursor = self.encode(items[-1]) if len(rows) > limit and items else None
+        return {"items": items, "next_cursor": next_cursor}
+
+
+def cursor_mode(pagination: Optional[Pagination], cursor: Optional[str], skip: int) -> bool:
+    """
+    Whether a list request pages by cursor. Offset pages (a plain array) stay the default for
+    existing clients; ?pagination=cursor, or passing a cursor, opts in to the Page envelope.
+    """
+    if pagination is None:
+        pagination = Pagination.OFFSET if cursor is None else Pagination.CURSOR
+    if pagination == Pagination.OFFSET:
+        if cursor is not None:
+            raise InvalidCursor("cursor is only supported with pagination=cursor")
+        return False
+    reject_skip(skip)
+    return True
+
+
+def reject_skip(skip: int):
+    """Cursor mode pages with next_cursor only; a skip there would otherwise be silently ignored"""
+    if skip:
+        raise InvalidCursor("skip is only supported with pagination=offset; pass next_cursor as cursor instead")
+
+
+def encode_sync_token(versions: dict) -> str:
+    """Opaque /sync token for the {collection: version} the client is now up to date with"""
+    return base64.urlsafe_b64encode(json.dumps(versions, sort_keys=True).encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> dict:
+    try:
+        versions = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if not isinstance(versions, dict) or not all(isinstance(value, int) for value in versions.values()):
+            raise ValueError
+        return versions
+    except ValueError:
+        raise InvalidCursor("Invalid sync token")
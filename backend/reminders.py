@@ -0,0 +1,215 @@
+"""
+In-process scheduler for task due-date reminders
+"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import urllib.request
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+import crud
+from crud import OPEN_TASK_STATUSES, get_due_tasks
+from models import Task
+
+# Run the scheduler in this process. Off by default: every worker that enables it sends its own
+# copy of each reminder, so with several workers enable it in exactly one of them
+REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "false").lower() in ("1", "true", "yes")
+# How far ahead the heap is loaded; the next window is read when this one runs out
+REMINDER_HORIZON_SECONDS = float(os.getenv("REMINDER_HORIZON_SECONDS", "3600"))
+# How far back the startup sweep reports tasks that became overdue while the app was down
+REMINDER_CATCHUP_SECONDS = float(os.getenv("REMINDER_CATCHUP_SECONDS", "86400"))
+# Where reminders go: "log" or "webhook" (POSTed as JSON to REMINDER_WEBHOOK_URL)
+REMINDER_SINK = os.getenv("REMINDER_SINK", "log")
+REMINDER_WEBHOOK_URL = os.getenv("REMINDER_WEBHOOK_URL", "")
+
+# Reminders sent later than this after the due date are reported as overdue; writes setting a
+# due date further in the past do not schedule one
+OVERDUE_AFTER = timedelta(minutes=1)
+# Pause before retrying a failed window load
+LOAD_RETRY_SECONDS = 30
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Reminder:
+    task_id: int
+    owner_id: int
+    title: str
+    due_date: datetime
+    overdue: bool
+
+
+class LogSink:
+    async def send(self, reminder: Reminder):
+        state = "overdue" if reminder.overdue else "due"
+        logger.info("Task %s of owner %s is %s (due %s): %s",
+                    reminder.task_id, reminder.owner_id, state, reminder.due_date.isoformat(), reminder.title)
+
+
+class WebhookSink:
+    """POSTs each reminder as JSON to `url`; a stub for a real notification service"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, body: bytes):
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+    async def send(self, reminder: Reminder):
+        body = json.dumps({**asdict(reminder), "due_date": reminder.due_date.isoformat()}).encode()
+        await run_in_threadpool(self._post, body)
+
+
+def make_sink(name: str = REMINDER_SINK):
+    if name == "webhook":
+        return WebhookSink(REMINDER_WEBHOOK_URL)
+    if name == "log":
+        return LogSink()
+    raise ValueError(f"Unknown reminder sink: {name}")
+
+
+class ReminderScheduler:
+    """
+    Min-heap of the open tasks due before the end of the loaded window, read with one indexed
+    (status, due_date) range query per window and kept current by the crud write listener, so
+    nothing polls the tasks table. Entries replaced by a later write stay in the heap and are
+    skipped when popped. `clock` returns the current UTC time.
+    """
+
+    def __init__(self, session_factory, sink, horizon: float = REMINDER_HORIZON_SECONDS, catchup: float = REMINDER_CATCHUP_SECONDS, clock=datetime.utcnow):
+        self.session_factory = session_factory
+        self.sink = sink
+        self.clock = clock
+        self.horizon = timedelta(seconds=horizon)
+        self.catchup = timedelta(seconds=catchup)
+        self.sent = 0
+        self._heap = []  # (due_date, task_id)
+        self._scheduled = {}  # task_id -> (due_date, owner_id, title), the live heap entries
+        self._loaded_until: Optional[datetime] = None
+        self._touched = None  # ids written while a window is loading, which the load must not overwrite
+        self._loop = None
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()  # set while run() waits with nothing left due
+        self._runner = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        crud.WRITE_LISTENERS.append(self.task_written)
+        self._runner = asyncio.create_task(self.run())
+        return self._runner
+
+    async def stop(self):
+        if self.task_written in crud.WRITE_LISTENERS:
+            crud.WRITE_LISTENERS.remove(self.task_written)
+        if self._runner is not None:
+            self._runner.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._runner
+            self._runner = None
+
+    def __len__(self):
+        return len(self._scheduled)
+
+    def wake(self):
+        """Re-check the clock now instead of at the next due date"""
+        self._idle.clear()
+        self._wake.set()
+
+    async def wait_idle(self):
+        """Wait until everything due has been sent and run() is waiting again"""
+        await self._idle.wait()
+
+    def task_written(self, model, action: str, row):
+        """crud write listener; may be called from a worker thread, so the change is applied on the loop"""
+        if model is not Task or self._loop is None:
+            return
+        if action == "delete" or row.status not in OPEN_TASK_STATUSES:
+            due_date = None
+        else:
+            due_date = row.due_date
+        self._loop.call_soon_threadsafe(self._apply, row.id, row.owner_id, row.title, due_date)
+
+    def _apply(self, task_id: int, owner_id: int, title: str, due_date: Optional[datetime]):
+        if self._touched is not None:
+            self._touched.add(task_id)
+        self._scheduled.pop(task_id, None)
+        if due_date is None or self._loaded_until is None or due_date >= self._loaded_until:
+            return
+        if due_date <= self.clock() - OVERDUE_AFTER:
+            return  # e.g. an edit to a task whose reminder already went out
+        self._push(task_id, owner_id, title, due_date)
+        if self._heap[0] == (due_date, task_id):
+            self.wake()
+
+    def _push(self, task_id: int, owner_id: int, title: str, due_date: datetime):
+        self._scheduled[task_id] = (due_date, owner_id, title)
+        heapq.heappush(self._heap, (due_date, task_id))
+
+    def _load_window(self, start: datetime, end: datetime):
+        db = self.session_factory()
+        try:
+            return get_due_tasks(db, start, end)
+        finally:
+            db.close()
+
+    async def _load(self, start: datetime, end: datetime):
+        # Writes from now on are scheduled by the listener; the ones racing this read win over it
+        previous, self._loaded_until = self._loaded_until, end
+        self._touched = set()
+        try:
+            rows = await run_in_threadpool(self._load_window, start, end)
+        except Exception:
+            self._loaded_until = previous
+            raise
+        finally:
+            touched, self._touched = self._touched, None
+        for task_id, owner_id, title, due_date in rows:
+            if task_id not in touched and task_id not in self._scheduled:
+                self._push(task_id, owner_id, title, due_date)
+
+    async def _send_due(self, now: datetime):
+        while self._heap and self._heap[0][0] <= now:
+            due_date, task_id = heapq.heappop(self._heap)
+            entry = self._scheduled.get(task_id)
+            if entry is None or entry[0] != due_date:
+                continue  # superseded by a later write
+            del self._scheduled[task_id]
+            reminder = Reminder(task_id, entry[1], entry[2], due_date, overdue=now - due_date > OVERDUE_AFTER)
+            try:
+                await self.sink.send(reminder)
+                self.sent += 1
+            except Exception:
+                logger.exception("Sending reminder for task %s failed", task_id)
+
+    async def run(self):
+        first_window_start = self.clock() - self.catchup
+        while True:
+            now = self.clock()
+            if self._loaded_until is None or now >= self._loaded_until:
+                try:
+                    await self._load(self._loaded_until or first_window_start, now + self.horizon)
+                except Exception:
+                    logger.exception("Loading due tasks failed")
+                    await asyncio.sleep(LOAD_RETRY_SECONDS)
+                continue
+            # Cleared before sending, so a write or wake() during a slow send is not lost
+            self._wake.clear()
+            await self._send_due(now)
+            wake_at = min(self._heap[0][0], self._loaded_until) if self._heap else self._loaded_until
+            if not self._wake.is_set():
+                self._idle.set()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max((wake_at - now).total_seconds(), 0))
+            except asyncio.TimeoutError:
+                pass
@@ -1,13 +1,20 @@
-from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, validator
+from typing import Optional, List, Dict, Generic, TypeVar
+import enum
 from datetime import datetime
 from models import UserRole, ContactStatus, InteractionType, TaskPriority, TaskStatus, DealStage
 
+T = TypeVar("T")
+
+# Pagination schemas
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 # User schemas
 class UserBase(BaseModel):
     email: EmailStr
     full_name: str
-    role: UserRole = UserRole.USER
 
 class UserCreate(UserBase):
     password: str
@@ -21,6 +28,7 @@ class UserCreate(UserBase):
 
 class UserResponse(UserBase):
     id: int
+    role: UserRole
     is_active: bool
     created_at: datetime
     updated_at: datetime
@@ -59,6 +67,16 @@ class ContactResponse(ContactBase):
     class Config:
         from_attributes = True
 
+class ContactSummary(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    email: Optional[str] = None
+    company: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 # Interaction schemas
 class InteractionBase(BaseModel):
     type: InteractionType
@@ -77,6 +95,7 @@ class InteractionResponse(InteractionBase):
     contact_id: int
     user_id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -130,6 +149,118 @@ class DealResponse(DealBase):
     class Config:
         from_attributes = True
 
+# Embedded relations (?include=contact, /contacts/{id}/overview)
+class ListInclude(str, enum.Enum):
+    CONTACT = "contact"
+
+class InteractionWithContact(InteractionResponse):
+    contact: Optional[ContactSummary] = None
+
+class TaskWithContact(TaskResponse):
+    contact: Optional[ContactSummary] = None
+
+class DealWithContact(DealResponse):
+    contact: Optional[ContactSummary] = None
+
+class ContactOverview(ContactResponse):
+    interactions: List[InteractionResponse] = []
+    tasks: List[TaskResponse] = []
+    deals: List[DealResponse] = []
+
+# List filter schemas (query parameters); a leading "-" in a sort value means descending
+class ContactSort(str, enum.Enum):
+    ID = "id"
+    ID_DESC = "-id"
+    LAST_NAME = "last_name"
+    LAST_NAME_DESC = "-last_name"
+
+class ContactFilter(BaseModel):
+    status: List[ContactStatus] = []
+    sort: ContactSort = ContactSort.ID
+
+class TaskSort(str, enum.Enum):
+    ID = "id"
+    ID_DESC = "-id"
+    DUE_DATE = "due_date"
+    DUE_DATE_DESC = "-due_date"
+
+class TaskFilter(BaseModel):
+    status: List[TaskStatus] = []
+    priority: List[TaskPriority] = []
+    contact_id: Optional[int] = None
+    due_after: Optional[datetime] = None
+    due_before: Optional[datetime] = None
+    sort: TaskSort = TaskSort.ID
+
+class DealSort(str, enum.Enum):
+    ID = "id"
+    ID_DESC = "-id"
+    VALUE = "value"
+    VALUE_DESC = "-value"
+    EXPECTED_CLOSE_DATE = "expected_close_date"
+    EXPECTED_CLOSE_DATE_DESC = "-expected_close_date"
+
+class DealFilter(BaseModel):
+    stage: List[DealStage] = []
+    contact_id: Optional[int] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    close_after: Optional[datetime] = None
+    close_before: Optional[datetime] = None
+    sort: DealSort = DealSort.ID
+
+# Bulk import schemas
+class BulkRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class BulkImportReport(BaseModel):
+    received: int
+    created: int
+    failed: int
+    errors: List[BulkRowError]
+
+# Batch mutation schemas
+class BatchAction(str, enum.Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+class BatchEntity(str, enum.Enum):
+    CONTACTS = "contacts"
+    INTERACTIONS = "interactions"
+    TASKS = "tasks"
+    DEALS = "deals"
+
+class BatchOperation(BaseModel):
+    action: BatchAction
+    entity: BatchEntity
+    id: Optional[int] = None
+    data: dict = {}
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., max_length=500)
+    atomic: bool = False
+
+class BatchResult(BaseModel):
+    status: int
+    data: Optional[dict] = None
+    errors: List[str] = []
+
+class BatchResponse(BaseModel):
+    committed: bool
+    results: List[BatchResult]
+
+# Sync schemas
+class SyncResponse(BaseModel):
+    token: str
+    reset: List[str]
+    contacts: List[ContactResponse]
+    interactions: List[InteractionResponse]
+    tasks: List[TaskResponse]
+    deals: List[DealResponse]
+    deleted: Dict[str, List[int]]
+
 # Dashboard schemas
 class DashboardStats(BaseModel):
     total_contacts: int
@@ -143,3 +274,122 @@ class DashboardStats(BaseModel):
     total_deal_value: float
     deals_by_stage: dict
     recent_interactions: List[InteractionResponse]
+
+# Analytics schemas
+class ForecastMonth(BaseModel):
+    month: str
+    deal_count: int
+    total_value: float
+    weighted_value: float
+
+class StageSummary(BaseModel):
+    stage: DealStage
+    deal_count: int
+    total_value: float
+    weighted_value: float
+    avg_days_in_stage: Optional[float] = None
+
+class StageConversion(BaseModel):
+    from_stage: DealStage
+    to_stage: DealStage
+    rate: Optional[float] = None
+
+class OwnerPipeline(BaseModel):
+    owner_id: int
+    open_deals: int
+    won_deals: int
+    lost_deals: int
+    win_rate: Optional[float] = None
+    weighted_value: float
+    avg_days_in_stage: Dict[DealStage, Optional[float]]
+
+class StageDuration(BaseModel):
+    stage: DealStage
+    exits: int
+    avg_days: float
+    median_days: float
+    p90_days: float
+    min_days: float
+    max_days: float
+
+class StageDurationReport(BaseModel):
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    stages: List[StageDuration]
+
+class FunnelStep(BaseModel):
+    stage: DealStage
+    deals: int
+    conversion_rate: Optional[float] = None
+
+class FunnelReport(BaseModel):
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    steps: List[FunnelStep]
+    lost: int
+
+class PipelineAnalytics(BaseModel):
+    refreshed_at: Optional[datetime] = None
+    forecast: List[ForecastMonth]
+    stages: List[StageSummary]
+    conversion: List[StageConversion]
+    owners: List[OwnerPipeline]
+
+# Admin schemas
+class StatsDrift(BaseModel):
+    owner_id: int
+    field: str
+    stored: Optional[float]
+    actual: float
+
+class RebuildStatsReport(BaseModel):
+    owners_checked: int
+    missing_owners: List[int]
+    drift: List[StatsDrift]
+
+class PipelineRefreshReport(BaseModel):
+    refreshed_at: datetime
+    owners: int
+    deals: int
+
+class CacheCounters(BaseModel):
+    size: int
+    maxsize: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+class CacheStats(BaseModel):
+    user_cache: CacheCounters
+
+class PoolStatus(BaseModel):
+    pool_class: str
+    size: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    max_overflow: Optional[int] = None
+    checkouts: Optional[int] = None
+    wait_ms_total: Optional[float] = None
+    wait_ms_avg: Optional[float] = None
+    wait_ms_max: Optional[float] = None
+
+class PoolStats(BaseModel):
+    sync: PoolStatus
+    async_: Optional[PoolStatus] = Field(None, alias="async")
+
+    class Config:
+        populate_by_name = True
+
+class SlowQuery(BaseModel):
+    statement: str
+    duration_ms: float
+    at: datetime
+    route: Optional[str] = None
+
+class SlowQueries(BaseModel):
+    threshold_ms: float
+    total: int
+    samples: List[SlowQuery]
@@ -0,0 +1,71 @@
+from operator import attrgetter
+from typing import List, Optional, get_args, get_origin
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, which encodes datetimes, enums and UUIDs natively"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _nested_schema(annotation):
+    """(schema, many) for a field holding a schema, an Optional one or a list of them; otherwise None"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    if get_origin(annotation) is list:
+        found = _nested_schema(get_args(annotation)[0])
+        return (found[0], True) if found else None
+    for arg in get_args(annotation):
+        if arg is not type(None):
+            found = _nested_schema(arg)
+            if found:
+                return found
+    return None
+
+
+class RowSerializer:
+    """
+    Turns ORM rows straight into dicts of a response schema's fields. Rows read from the
+    database are trusted, so this skips the per-row from_attributes validation (including
+    EmailStr checks) that response_model would repeat on every list item.
+    """
+
+    def __init__(self, schema):
+        self.names = list(schema.model_fields)
+        self._get = attrgetter(*self.names)
+        # Fields holding related rows (e.g. an embedded contact) get serialized recursively
+        self.nested = {}
+        for name, field in schema.model_fields.items():
+            found = _nested_schema(field.annotation)
+            if found:
+                self.nested[name] = (RowSerializer(found[0]), found[1])
+
+    def dicts(self, rows, fields: Optional[List[str]] = None) -> List[dict]:
+        names, get = (self.names, self._get) if fields is None else (fields, attrgetter(*fields))
+        if len(names) == 1:
+            items = [{names[0]: get(row)} for row in rows]
+        else:
+            items = [dict(zip(names, get(row))) for row in rows]
+        for name in (self.nested.keys() & set(names)) if self.nested else ():
+            serializer, many = self.nested[name]
+            for item in items:
+                value = item[name]
+                if many:
+                    item[name] = serializer.dicts(value)
+                elif value is not None:
+                    item[name] = serializer.dicts([value])[0]
+        return items
+
+    def one(self, row) -> dict:
+        return self.dicts([row])[0]
+
+    def response(self, result, fields: Optional[List[str]] = None, headers: Optional[dict] = None) -> ORJSONResponse:
+        """Serialize a list of rows, or a page envelope of them, keeping only `fields` if given"""
+        if isinstance(result, dict):
+            return ORJSONResponse({**result, "items": self.dicts(result["items"], fields)}, headers=headers)
+        return ORJSONResponse(self.dicts(result, fields), headers=headers)
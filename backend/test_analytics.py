@@ -0,0 +1,152 @@
+"""
+Tests for the pipeline analytics snapshot and /analytics/pipeline
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import analytics
+from crud import create_user, create_contact, create_deal, update_deal, get_pipeline_analytics, refresh_pipeline_snapshot, set_user_role
+from models import DealStage, UserRole
+from schemas import UserCreate, ContactCreate, DealCreate, DealUpdate
+
+
+def _deal(db, owner_id, contact_id, stage, value, probability=0, close=None):
+    return create_deal(db, DealCreate(
+        title="d", stage=stage, value=value, probability=probability, expected_close_date=close, contact_id=contact_id
+    ), owner_id)
+
+
+@pytest.fixture
+def owners(db):
+    owner = create_user(db, UserCreate(email="owner@example.com", full_name="Owner", password="secret1"), "x")
+    other = create_user(db, UserCreate(email="other@example.com", full_name="Other", password="secret1"), "x")
+    contact = create_contact(db, ContactCreate(first_name="A", last_name="B"), owner.id)
+    _deal(db, owner.id, contact.id, DealStage.PROSPECTING, 100.0, 10, datetime(2026, 11, 3))
+    _deal(db, owner.id, contact.id, DealStage.PROPOSAL, 200.0, 50, datetime(2026, 11, 20))
+    _deal(db, owner.id, contact.id, DealStage.NEGOTIATION, 400.0, 75, datetime(2026, 12, 1))
+    _deal(db, owner.id, contact.id, DealStage.NEGOTIATION, None, 90)
+    _deal(db, owner.id, contact.id, DealStage.CLOSED_WON, 1000.0, 100, datetime(2026, 11, 1))
+    _deal(db, owner.id, contact.id, DealStage.CLOSED_LOST, 300.0, 0, datetime(2026, 11, 1))
+    _deal(db, other.id, contact.id, DealStage.PROPOSAL, 50.0, 20, datetime(2026, 11, 15))
+    return owner.id, other.id
+
+
+def test_refresh_reports_snapshot(db, owners):
+    report = refresh_pipeline_snapshot(db)
+    assert report.owners == 2
+    assert report.deals == 7
+
+
+def test_forecast_weights_open_deals_by_close_month(db, owners):
+    owner_id, _ = owners
+    refresh_pipeline_snapshot(db)
+    analytics = get_pipeline_analytics(db, [owner_id])
+
+    forecast = {month.month: month for month in analytics.forecast}
+    # Closed deals and deals without a close date stay out of the forecast
+    assert list(forecast) == ["2026-11", "2026-12"]
+    assert forecast["2026-11"].deal_count == 2
+    assert forecast["2026-11"].total_value == 300.0
+    assert forecast["2026-11"].weighted_value == pytest.approx(10.0 + 100.0)
+    assert forecast["2026-12"].weighted_value == pytest.approx(300.0)
+
+
+def test_stages_conversion_and_win_rate(db, owners):
+    owner_id, _ = owners
+    refresh_pipeline_snapshot(db)
+    analytics = get_pipeline_analytics(db, [owner_id])
+
+    stages = {stage.stage: stage for stage in analytics.stages}
+    assert stages[DealStage.NEGOTIATION].deal_count == 2
+    assert stages[DealStage.NEGOTIATION].total_value == 400.0
+    assert stages[DealStage.QUALIFICATION].deal_count == 0
+    assert stages[DealStage.QUALIFICATION].avg_days_in_stage is None
+    assert stages[DealStage.PROPOSAL].avg_days_in_stage >= 0
+
+    # Funnel: 6 deals entered, 4 got past prospecting (the lost one only counts at the top)
+    rates = {(conversion.from_stage, conversion.to_stage): conversion.rate for conversion in analytics.conversion}
+    assert rates[(DealStage.PROSPECTING, DealStage.QUALIFICATION)] == pytest.approx(4 / 6)
+    assert rates[(DealStage.QUALIFICATION, DealStage.PROPOSAL)] == 1.0
+    assert rates[(DealStage.NEGOTIATION, DealStage.CLOSED_WON)] == pytest.approx(1 / 3)
+
+    [owner] = analytics.owners
+    assert (owner.owner_id, owner.open_deals, owner.won_deals, owner.lost_deals) == (owner_id, 4, 1, 1)
+    assert owner.win_rate == 0.5
+    assert owner.weighted_value == pytest.approx(10.0 + 100.0 + 300.0)
+    assert set(owner.avg_days_in_stage) == {DealStage.PROSPECTING, DealStage.PROPOSAL, DealStage.NEGOTIATION}
+
+
+def test_snapshot_only_changes_on_refresh(db, owners):
+    owner_id, _ = owners
+    assert get_pipeline_analytics(db, [owner_id]).refreshed_at is None
+
+    first = refresh_pipeline_snapshot(db)
+    update_deal(db, 1, DealUpdate(stage=DealStage.CLOSED_WON), owner_id)
+    assert get_pipeline_analytics(db, [owner_id]).owners[0].won_deals == 1
+
+    refresh_pipeline_snapshot(db)
+    analytics = get_pipeline_analytics(db, [owner_id])
+    assert analytics.owners[0].won_deals == 2
+    assert analytics.refreshed_at >= first.refreshed_at
+
+
+def test_refresher_skips_a_snapshot_another_worker_just_rebuilt(db, engine, owners, monkeypatch):
+    monkeypatch.setattr(analytics, "SessionLocal", sessionmaker(bind=engine))
+    first = analytics.refresh_pipeline(fresh_for=60)
+    assert first is not None
+    assert analytics.refresh_pipeline(fresh_for=60) is None
+    assert analytics.refresh_pipeline(fresh_for=0).refreshed_at > first.refreshed_at
+
+
+def test_register_cannot_pick_a_role(client, db):
+    response = client.post("/register", json={"email": "admin@example.com", "password": "secret1", "full_name": "Admin", "role": "admin"})
+    assert response.json()["role"] == "user"
+
+    assert set_user_role(db, "admin@example.com", UserRole.ADMIN).role == UserRole.ADMIN
+    assert set_user_role(db, "nobody@example.com", UserRole.ADMIN) is None
+
+
+def test_lifespan_waits_for_the_cancelled_refresher(engine, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    stopped = []
+
+    async def refresh_periodically():
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            # Cleanup that still needs the loop, like closing a session
+            await asyncio.sleep(0.01)
+            stopped.append(True)
+            raise
+
+    monkeypatch.setattr(main, "ANALYTICS_REFRESH_SECONDS", 60)
+    monkeypatch.setattr(main, "refresh_periodically", refresh_periodically)
+    with TestClient(main.app):
+        assert stopped == []
+    assert stopped == [True]
+
+
+def test_pipeline_endpoint_scopes_to_user_and_admin_sees_team(client, auth_headers, db):
+    client.post("/register", json={"email": "admin@example.com", "password": "secret1", "full_name": "Admin"})
+    set_user_role(db, "admin@example.com", UserRole.ADMIN)
+    admin_token = client.post("/token", data={"username": "admin@example.com", "password": "secret1"}).json()["access_token"]
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+
+    contact = client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers).json()
+    client.post("/deals", json={"title": "d", "value": 10, "stage": "closed_won", "contact_id": contact["id"]}, headers=auth_headers)
+    client.post("/deals", json={"title": "d", "value": 10, "stage": "closed_lost", "contact_id": contact["id"]}, headers=admin_headers)
+
+    assert client.post("/admin/refresh-analytics", headers=auth_headers).status_code == 403
+    report = client.post("/admin/refresh-analytics", headers=admin_headers).json()
+    assert (report["owners"], report["deals"]) == (2, 2)
+
+    mine = client.get("/analytics/pipeline", headers=auth_headers).json()
+    assert [owner["win_rate"] for owner in mine["owners"]] == [1.0]
+    team = client.get("/analytics/pipeline", headers=admin_headers).json()
+    assert sorted(owner["win_rate"] for owner in team["owners"]) == [0.0, 1.0]
+    assert team["refreshed_at"] == report["refreshed_at"]
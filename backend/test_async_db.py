@@ -0,0 +1,101 @@
+"""
+Runs the API against an AsyncSession on aiosqlite, the DB_ASYNC=true request path
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import auth
+import crud
+import database
+import main
+from database import Base
+from models import User
+from schemas import UserCreate
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    async_engine = create_async_engine(database.async_url(f"sqlite:///{path}"), poolclass=NullPool)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+    async def override_get_database():
+        async with AsyncSessionLocal() as session:
+            yield database.Database(session)
+
+    main.app.dependency_overrides[database.get_database] = override_get_database
+    auth.user_cache.clear()
+    with TestClient(main.app) as client:
+        yield client
+    main.app.dependency_overrides.clear()
+
+
+def test_async_request_path(async_client):
+    async_client.post("/register", json={"email": "owner@example.com", "password": "secret1", "full_name": "Owner"})
+    token = async_client.post("/token", data={"username": "owner@example.com", "password": "secret1"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    contact = async_client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=headers).json()
+    async_client.put(f"/contacts/{contact['id']}", json={"status": "customer"}, headers=headers)
+    deal = async_client.post("/deals", json={"title": "d", "value": 10, "contact_id": contact["id"]}, headers=headers)
+
+    assert deal.status_code == 200
+    assert async_client.get("/contacts", headers=headers).json()[0]["status"] == "customer"
+    stats = async_client.get("/dashboard/stats", headers=headers).json()
+    assert stats["total_customers"] == 1
+    assert stats["total_deal_value"] == 10
+    assert async_client.get("/deals/export?format=ndjson", headers=headers).json()["title"] == "d"
+    assert async_client.get("/contacts?fields=status", headers=headers).json() == [{"status": "customer"}]
+
+
+def test_async_login_rehashes_outdated_hash(async_client, tmp_path):
+    async_client.post("/register", json={"email": "old@example.com", "password": "secret1", "full_name": "Old"})
+    old_context = CryptContext(schemes=["argon2"], argon2__rounds=2, argon2__memory_cost=1024, argon2__parallelism=1)
+    sync_engine = create_engine(f"sqlite:///{tmp_path / 'async.db'}")
+    try:
+        with sync_engine.begin() as conn:
+            conn.execute(update(User).where(User.email == "old@example.com").values(hashed_password=old_context.hash("secret1")))
+
+        # Storing the new hash commits the AsyncSession, which expires the user the login loaded
+        response = async_client.post("/token", data={"username": "old@example.com", "password": "secret1"})
+        assert response.status_code == 200
+        with sync_engine.connect() as conn:
+            upgraded = conn.execute(select(User.hashed_password).where(User.email == "old@example.com")).scalar()
+        assert not auth.pwd_context.needs_update(upgraded)
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        assert async_client.get("/users/me", headers=headers).json()["email"] == "old@example.com"
+    finally:
+        sync_engine.dispose()
+
+
+def test_stream_user_is_resolved_without_holding_a_connection(tmp_path):
+    path = tmp_path / "stream.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    with sessionmaker(bind=sync_engine)() as db:
+        user_id = crud.create_user(db, UserCreate(email="owner@example.com", full_name="Owner", password="secret1"), "x").id
+    sync_engine.dispose()
+    async_engine = create_async_engine(database.async_url(f"sqlite:///{path}"))
+    token = auth.create_stream_token("owner@example.com")
+    auth.user_cache.clear()
+
+    async def run():
+        async with async_sessionmaker(async_engine)() as session:
+            user = await auth.get_stream_user(token=None, stream_token=token, db=database.Database(session))
+            # /events streams for as long as the client stays; its session must already be released
+            assert not session.in_transaction()
+            assert async_engine.pool.checkedout() == 0
+        await async_engine.dispose()
+        return user
+
+    assert asyncio.run(run()).id == user_id
@@ -2,7 +2,17 @@
 """
 Test script for authentication functions using Argon2
 """
-from auth import get_password_hash, verify_password
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy.orm import sessionmaker
+
+import auth
+from auth import PasswordHashPool, get_password_hash, verify_password
+from models import User
 
 def test_password_hashing():
     """Test password hashing with various lengths using Argon2"""
@@ -53,5 +63,46 @@ def test_password_hashing():
     print("✅ Argon2 password hashing test completed!")
     print("✅ All passwords handled securely without truncation!")
 
+
+def test_login_rehashes_outdated_hash(client, engine):
+    client.post("/register", json={"email": "old@example.com", "password": "secret1", "full_name": "Old"})
+    old_context = CryptContext(schemes=["argon2"], argon2__rounds=2, argon2__memory_cost=1024, argon2__parallelism=1)
+    db = sessionmaker(bind=engine)()
+    try:
+        db.query(User).filter(User.email == "old@example.com").update({"hashed_password": old_context.hash("secret1")})
+        db.commit()
+
+        assert client.post("/token", data={"username": "old@example.com", "password": "wrong1"}).status_code == 401
+        assert auth.pwd_context.needs_update(db.query(User.hashed_password).filter(User.email == "old@example.com").scalar())
+
+        assert client.post("/token", data={"username": "old@example.com", "password": "secret1"}).status_code == 200
+        db.expire_all()
+        upgraded = db.query(User.hashed_password).filter(User.email == "old@example.com").scalar()
+        assert not auth.pwd_context.needs_update(upgraded)
+        assert auth.verify_password("secret1", upgraded)
+        assert client.post("/token", data={"username": "old@example.com", "password": "secret1"}).status_code == 200
+    finally:
+        db.close()
+
+
+def test_password_pool_refuses_when_full():
+    pool = PasswordHashPool(workers=1, queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as refused:
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        return refused.value
+
+    refused = asyncio.run(scenario())
+    assert refused.status_code == 503 and refused.headers["Retry-After"] == "1"
+    assert pool.rejected == 1 and pool.pending == 0
+    pool.executor.shutdown()
+
+
 if __name__ == "__main__":
     test_password_hashing()
@@ -0,0 +1,75 @@
+"""
+Tests for POST /batch
+"""
+
+
+def _contact(client, headers, name="A"):
+    return client.post("/contacts", json={"first_name": name, "last_name": "B"}, headers=headers).json()
+
+
+def test_mixed_batch_commits_valid_operations(client, auth_headers, count_statements):
+    contact = _contact(client, auth_headers)
+    deals = [client.post("/deals", json={"title": f"D{i}", "contact_id": contact["id"]}, headers=auth_headers).json() for i in range(3)]
+    count_statements.clear()
+
+    response = client.post("/batch", json={"operations": [
+        *[{"action": "update", "entity": "deals", "id": deal["id"], "data": {"stage": "proposal"}} for deal in deals[:2]],
+        {"action": "delete", "entity": "deals", "id": deals[2]["id"]},
+        {"action": "create", "entity": "tasks", "data": {"title": "Follow up", "contact_id": contact["id"]}},
+        {"action": "update", "entity": "deals", "id": 999, "data": {"stage": "proposal"}},
+        {"action": "create", "entity": "tasks", "data": {}},
+    ]}, headers=auth_headers).json()
+
+    assert response["committed"] is True
+    assert [result["status"] for result in response["results"]] == [200, 200, 200, 201, 404, 422]
+    assert response["results"][0]["data"]["stage"] == "proposal"
+    assert response["results"][3]["data"]["title"] == "Follow up"
+    assert response["results"][5]["errors"] == ["title: Field required"]
+    # All deal targets come from one IN query, and the batch is a single transaction
+    deal_selects = [statement for statement in count_statements if statement.startswith("SELECT") and "FROM deals" in statement]
+    assert len(deal_selects) == 2 and " IN (" in deal_selects[0]
+
+    stats = client.get("/dashboard/stats", headers=auth_headers).json()
+    assert stats["total_deals"] == 2 and stats["deals_by_stage"]["proposal"] == 2 and stats["total_tasks"] == 1
+
+
+def test_atomic_batch_rolls_back_on_any_failure(client, auth_headers):
+    contact = _contact(client, auth_headers)
+    operations = [
+        {"action": "update", "entity": "contacts", "id": contact["id"], "data": {"status": "customer"}},
+        {"action": "delete", "entity": "contacts", "id": 999},
+    ]
+    response = client.post("/batch", json={"operations": operations, "atomic": True}, headers=auth_headers).json()
+
+    assert response["committed"] is False
+    assert [result["status"] for result in response["results"]] == [424, 404]
+    assert client.get(f"/contacts/{contact['id']}", headers=auth_headers).json()["status"] == "lead"
+
+    invalid = [operations[0], {"action": "update", "entity": "contacts"}]
+    response = client.post("/batch", json={"operations": invalid, "atomic": True}, headers=auth_headers).json()
+    assert [result["status"] for result in response["results"]] == [424, 422]
+
+
+def test_batch_only_touches_own_rows(client, auth_headers, other_headers):
+    theirs = _contact(client, other_headers)
+
+    response = client.post("/batch", json={"operations": [
+        {"action": "delete", "entity": "contacts", "id": theirs["id"]},
+    ]}, headers=auth_headers).json()
+
+    assert response["results"] == [{"status": 404, "data": None, "errors": ["not found"]}]
+    assert client.get(f"/contacts/{theirs['id']}", headers=other_headers).status_code == 200
+
+
+def test_batch_created_interactions_leave_the_rollup_alone(client, auth_headers):
+    contact = _contact(client, auth_headers)
+    before = client.get("/dashboard/stats", headers=auth_headers).json()
+
+    response = client.post("/batch", json={"operations": [
+        {"action": "create", "entity": "interactions", "data": {"type": "call", "subject": "S", "contact_id": contact["id"]}},
+    ]}, headers=auth_headers).json()
+
+    assert [result["status"] for result in response["results"]] == [201]
+    after = client.get("/dashboard/stats", headers=auth_headers).json()
+    assert {key: after[key] for key in before if key != "recent_interactions"} == {key: before[key] for key in before if key != "recent_interactions"}
+    assert [interaction["subject"] for interaction in after["recent_interactions"]] == ["S"]
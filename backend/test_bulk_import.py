@@ -0,0 +1,72 @@
+"""
+Tests for the bulk import endpoints
+"""
+import json
+
+import bulk
+
+
+def test_json_array_import_reports_invalid_rows(client, auth_headers):
+    rows = [
+        {"first_name": "Ada", "last_name": "Lovelace", "status": "customer"},
+        {"first_name": "NoLastName"},
+        {"first_name": "Alan", "last_name": "Turing", "email": "not-an-email"},
+        "not an object",
+    ]
+
+    report = client.post("/contacts/bulk", json=rows, headers=auth_headers).json()
+
+    assert (report["received"], report["created"], report["failed"]) == (4, 1, 3)
+    assert [error["row"] for error in report["errors"]] == [2, 3, 4]
+    assert report["errors"][0]["errors"] == ["last_name: Field required"]
+    stats = client.get("/dashboard/stats", headers=auth_headers).json()
+    assert (stats["total_contacts"], stats["total_customers"]) == (1, 1)
+
+
+def test_ndjson_import_in_chunks(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(bulk, "BULK_CHUNK_SIZE", 3)
+    lines = [json.dumps({"title": f"Task {i}", "priority": "high"}) for i in range(7)]
+    lines.insert(4, "{broken json")
+    body = "\n".join(lines) + "\n"
+
+    report = client.post("/tasks/bulk", content=body, headers={**auth_headers, "Content-Type": "application/x-ndjson"}).json()
+
+    assert (report["received"], report["created"], report["failed"]) == (8, 7, 1)
+    assert report["errors"][0]["row"] == 5
+    tasks = client.get("/tasks", headers=auth_headers).json()
+    assert [task["title"] for task in tasks] == [f"Task {i}" for i in range(7)]
+
+
+def test_csv_import_with_quoted_newlines_and_defaults(client, auth_headers):
+    contact = client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers).json()
+    body = (
+        "title,value,stage,contact_id,description\r\n"
+        f'Big deal,1000.5,proposal,{contact["id"]},"two\nlines"\r\n'
+        f"Small deal,,,{contact['id']},\r\n"
+        "Broken,abc,proposal,1,\r\n"
+    )
+
+    report = client.post("/deals/bulk", content=body, headers={**auth_headers, "Content-Type": "text/csv"}).json()
+
+    assert (report["created"], report["failed"]) == (2, 1)
+    assert report["errors"][0]["row"] == 3
+    deals = client.get("/deals", headers=auth_headers).json()
+    assert deals[0]["description"] == "two\nlines"
+    assert deals[1]["stage"] == "prospecting"
+    assert client.get("/dashboard/stats", headers=auth_headers).json()["total_deal_value"] == 1000.5
+
+
+def test_unsupported_content_type(client, auth_headers):
+    response = client.post("/contacts/bulk", content="x", headers={**auth_headers, "Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+
+def test_non_utf8_body_is_rejected_with_its_line(client, auth_headers):
+    body = '{"title": "Fine"}\n'.encode() + '{"title": "caf\xe9"}\n'.encode("latin-1")
+    response = client.post("/tasks/bulk", content=body, headers={**auth_headers, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Line 2 is not valid UTF-8")
+
+    response = client.post("/deals/bulk", content="title\r\nna\xefve\r\n".encode("latin-1"), headers={**auth_headers, "Content-Type": "text/csv"})
+    assert response.status_code == 400
+    assert "Line 2" in response.json()["detail"]
@@ -0,0 +1,104 @@
+"""
+Tests for the aggregated dashboard statistics
+"""
+from crud import (
+    create_user, create_contact, create_task, create_deal, create_interaction, get_dashboard_stats,
+    update_contact, update_task, update_deal, delete_contact, delete_deal, compute_owner_stats, rebuild_stats, ROLLUP_COLUMNS
+)
+from models import OwnerStats, ContactStatus, TaskStatus, DealStage, InteractionType
+from schemas import UserCreate, ContactCreate, ContactUpdate, TaskCreate, TaskUpdate, DealCreate, DealUpdate, InteractionCreate
+
+
+def _seed(db):
+    owner = create_user(db, UserCreate(email="owner@example.com", full_name="Owner", password="secret1"), "x")
+    other = create_user(db, UserCreate(email="other@example.com", full_name="Other", password="secret1"), "x")
+    contact = None
+    for status in (ContactStatus.LEAD, ContactStatus.LEAD, ContactStatus.PROSPECT, ContactStatus.CUSTOMER):
+        contact = create_contact(db, ContactCreate(first_name="A", last_name="B", status=status), owner.id)
+    create_contact(db, ContactCreate(first_name="C", last_name="D"), other.id)
+    for status in (TaskStatus.PENDING, TaskStatus.PENDING, TaskStatus.COMPLETED, TaskStatus.CANCELLED):
+        create_task(db, TaskCreate(title="t", status=status), owner.id)
+    create_deal(db, DealCreate(title="d", value=100.0, stage=DealStage.PROPOSAL, contact_id=contact.id), owner.id)
+    create_deal(db, DealCreate(title="d", value=50.5, stage=DealStage.PROPOSAL, contact_id=contact.id), owner.id)
+    create_deal(db, DealCreate(title="d", stage=DealStage.CLOSED_WON, contact_id=contact.id), owner.id)
+    create_deal(db, DealCreate(title="d", value=999.0, contact_id=contact.id), other.id)
+    create_interaction(db, InteractionCreate(type=InteractionType.CALL, subject="hi", contact_id=contact.id), owner.id)
+    return owner
+
+
+def test_dashboard_stats_values(db):
+    owner = _seed(db)
+    stats = get_dashboard_stats(db, owner.id)
+
+    assert stats.total_contacts == 4
+    assert stats.total_leads == 2
+    assert stats.total_prospects == 1
+    assert stats.total_customers == 1
+    assert stats.total_tasks == 4
+    assert stats.pending_tasks == 2
+    assert stats.completed_tasks == 1
+    assert stats.total_deals == 3
+    assert stats.total_deal_value == 150.5
+    assert stats.deals_by_stage == {
+        "prospecting": 0,
+        "qualification": 0,
+        "proposal": 2,
+        "negotiation": 0,
+        "closed_won": 1,
+        "closed_lost": 0,
+    }
+    assert len(stats.recent_interactions) == 1
+
+
+def test_dashboard_stats_query_count_is_constant(db, count_statements):
+    owner_id = _seed(db).id
+    count_statements.clear()
+
+    get_dashboard_stats(db, owner_id)
+
+    # One rollup row plus the recent interactions
+    assert len(count_statements) == 2
+
+
+def _stored(db, owner_id):
+    row = db.get(OwnerStats, owner_id)
+    db.refresh(row)
+    return {column: getattr(row, column) for column in ROLLUP_COLUMNS}
+
+
+def test_rollup_follows_writes(db):
+    owner_id = _seed(db).id
+    contact_id = create_contact(db, ContactCreate(first_name="E", last_name="F"), owner_id).id
+    task_id = create_task(db, TaskCreate(title="t"), owner_id).id
+    deal_id = create_deal(db, DealCreate(title="d", value=10.0, contact_id=contact_id), owner_id).id
+
+    update_contact(db, contact_id, ContactUpdate(status=ContactStatus.CUSTOMER), owner_id)
+    update_task(db, task_id, TaskUpdate(status=TaskStatus.COMPLETED), owner_id)
+    update_deal(db, deal_id, DealUpdate(stage=DealStage.NEGOTIATION, value=25.0), owner_id)
+    assert _stored(db, owner_id) == compute_owner_stats(db, owner_id)[owner_id]
+
+    delete_deal(db, deal_id, owner_id)
+    delete_contact(db, contact_id, owner_id)
+    assert _stored(db, owner_id) == compute_owner_stats(db, owner_id)[owner_id]
+
+
+def test_rebuild_stats_reports_and_fixes_drift(db):
+    owner_id = _seed(db).id
+    db.get(OwnerStats, owner_id).lead_contacts = 99
+    db.commit()
+
+    report = rebuild_stats(db)
+
+    assert [(d.owner_id, d.field, d.stored, d.actual) for d in report.drift] == [(owner_id, "lead_contacts", 99, 2)]
+    assert get_dashboard_stats(db, owner_id).total_leads == 2
+    assert rebuild_stats(db).drift == []
+
+
+def test_dashboard_stats_without_rollup_row_does_not_write(db):
+    owner_id = _seed(db).id
+    db.query(OwnerStats).filter(OwnerStats.owner_id == owner_id).delete()
+    db.commit()
+
+    assert get_dashboard_stats(db, owner_id).total_leads == 2
+    assert db.get(OwnerStats, owner_id) is None
+    assert not db.new and not db.dirty
@@ -0,0 +1,66 @@
+"""
+Tests for connection pool configuration and SQLite tuning
+"""
+import threading
+
+from sqlalchemy import create_engine, text
+
+from database import engine_options, tune_sqlite, pool_stats, TimedQueuePool
+
+
+def test_sqlite_connections_are_tuned(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    engine = create_engine(url, **engine_options(url))
+    tune_sqlite(engine)
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+    engine.dispose()
+
+
+def test_concurrent_writers_wait_instead_of_failing(tmp_path):
+    url = f"sqlite:///{tmp_path / 'writers.db'}"
+    engine = create_engine(url, **engine_options(url))
+    tune_sqlite(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE counter (n INTEGER)"))
+    errors = []
+
+    def write():
+        try:
+            for _ in range(20):
+                with engine.begin() as conn:
+                    conn.execute(text("INSERT INTO counter VALUES (1)"))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM counter")).scalar() == 160
+    engine.dispose()
+
+
+def test_pool_stats_report_checkouts(tmp_path):
+    url = f"sqlite:///{tmp_path / 'stats.db'}"
+    engine = create_engine(url, **engine_options(url))
+
+    with engine.connect():
+        stats = pool_stats(engine)
+
+    assert isinstance(engine.pool, TimedQueuePool)
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["wait_ms_max"] >= 0
+    engine.dispose()
+
+
+def test_memory_sqlite_keeps_default_pool():
+    assert "poolclass" not in engine_options("sqlite://")
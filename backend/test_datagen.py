@@ -0,0 +1,55 @@
+"""
+Synthetic data generator used by the benchmarks and load tests
+"""
+from datetime import datetime
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+import crud
+from datagen import generate
+from models import Contact, Deal, DealStageEvent, User
+
+NOW = datetime(2025, 6, 1)
+
+
+def _generate(seed):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    generate(engine, 3, contacts_per_user=30, seed=seed, now=NOW, hashed_password="x")
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(select(Deal.id, Deal.owner_id, Deal.stage, Deal.value).order_by(Deal.id))]
+
+
+def test_same_seed_same_data():
+    assert _generate(7) == _generate(7)
+    assert _generate(7) != _generate(8)
+
+
+def test_generated_rows_are_consistent(engine, db):
+    data = generate(engine, 4, contacts_per_user=25, seed=1, now=NOW, hashed_password="x")
+    assert data.users == db.query(User).count() == 4
+    assert data.contacts == db.query(Contact).count()
+    # Rollups were rebuilt, so there is nothing left to fix
+    report = crud.rebuild_stats(db)
+    assert report.drift == [] and report.missing_owners == []
+    # Every deal's history starts at creation and ends in its current stage
+    latest = dict(db.execute(
+        select(DealStageEvent.deal_id, DealStageEvent.to_stage)
+        .where(DealStageEvent.id.in_(select(func.max(DealStageEvent.id)).group_by(DealStageEvent.deal_id)))
+    ).all())
+    assert latest == {deal.id: deal.stage for deal in db.query(Deal)}
+    assert db.query(DealStageEvent).filter(DealStageEvent.from_stage.is_(None)).count() == data.deals
+
+    # Ids continue after the existing rows
+    more = generate(engine, 1, contacts_per_user=5, seed=2, now=NOW, hashed_password="x")
+    assert list(more.user_ids) == [5]
+
+
+def test_postgresql_sequences_are_moved_past_generated_ids():
+    from sqlalchemy.dialects import postgresql
+    from datagen import _sequence_updates
+
+    sql = [str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+           for statement in _sequence_updates()]
+    assert len(sql) == 5
+    assert sql[0].startswith("SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT max(users.id)")
@@ -0,0 +1,141 @@
+"""
+Tests for the /events change feed
+"""
+import asyncio
+
+import orjson
+import pytest
+from starlette.concurrency import run_in_threadpool
+
+import crud
+import main
+from crud import create_user, create_contact, create_task, update_task, delete_task, bulk_create
+from events import Broker, ChangeFeed, EventHub, LocalBroker, Subscription, RESYNC
+from models import Task, TaskStatus
+from schemas import UserCreate, ContactCreate, TaskCreate, TaskUpdate
+
+
+@pytest.fixture
+def owners(db):
+    owner = create_user(db, UserCreate(email="owner@example.com", full_name="Owner", password="secret1"), "x")
+    other = create_user(db, UserCreate(email="other@example.com", full_name="Other", password="secret1"), "x")
+    return owner.id, other.id
+
+
+def _drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_slow_subscriber_is_told_to_resync():
+    async def run():
+        subscription = Subscription(owner_id=1, maxsize=3)
+        for number in range(5):
+            subscription.put({"type": "change", "id": number})
+        return subscription
+
+    subscription = asyncio.run(run())
+    # The queue never grows past its bound; the overflow replaced the backlog with one resync
+    assert _drain(subscription) == [RESYNC, {"type": "change", "id": 4}]
+    assert subscription.dropped == 3
+
+
+def test_brokers_must_implement_start_and_publish():
+    class Incomplete(Broker):
+        async def start(self, deliver):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_crud_writes_reach_only_the_owners_subscribers(db, owners):
+    owner_id, other_id = owners
+
+    async def run():
+        feed = ChangeFeed(LocalBroker(), EventHub())
+        await feed.start()
+        try:
+            async with feed.hub.subscribe(owner_id) as mine, feed.hub.subscribe(other_id) as theirs:
+                # Writes run in worker threads behind the API
+                task = await run_in_threadpool(create_task, db, TaskCreate(title="t"), owner_id)
+                await run_in_threadpool(update_task, db, task.id, TaskUpdate(status=TaskStatus.COMPLETED), owner_id)
+                await run_in_threadpool(delete_task, db, task.id, owner_id)
+                await run_in_threadpool(bulk_create, db, Task, [TaskCreate(title="b").model_dump()] * 2, other_id)
+                await asyncio.sleep(0.05)
+                return task.id, _drain(mine), _drain(theirs)
+        finally:
+            await feed.stop()
+
+    task_id, mine, theirs = asyncio.run(run())
+    assert [(event["collection"], event["action"], event["id"]) for event in mine] == [
+        ("tasks", "create", task_id), ("tasks", "update", task_id), ("tasks", "delete", task_id)
+    ]
+    assert mine[1]["data"]["status"] == TaskStatus.COMPLETED and mine[1]["version"] == 2
+    assert "data" not in mine[2]
+    assert [event["action"] for event in theirs] == ["create", "create"]
+    assert crud.WRITE_LISTENERS == []
+
+
+def test_events_endpoint_streams_server_sent_events(client, auth_headers, db, monkeypatch):
+    feed = ChangeFeed(LocalBroker(), EventHub())
+    monkeypatch.setattr(main, "change_feed", feed)
+    token = client.post("/events/token", headers=auth_headers).json()["stream_token"]
+    owner_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    assert client.get("/events").status_code == 401
+
+    async def run():
+        await feed.start()
+        sent, disconnected = [], asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if b"event: change" in message.get("body", b""):
+                disconnected.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": "/events", "raw_path": b"/events", "root_path": "", "query_string": f"stream_token={token}".encode(),
+            "headers": [(b"host", b"testserver")], "client": ("testclient", 50000), "server": ("testserver", 80),
+        }
+        request = asyncio.create_task(main.app(scope, receive, send))
+        while owner_id not in feed.hub.subscribers:
+            await asyncio.sleep(0.01)
+        await run_in_threadpool(create_contact, db, ContactCreate(first_name="Ada", last_name="L"), owner_id)
+        await asyncio.wait_for(request, timeout=5)
+        await feed.stop()
+        return sent
+
+    sent = asyncio.run(run())
+    start = sent[0]
+    assert start["status"] == 200 and (b"content-type", b"text/event-stream; charset=utf-8") in start["headers"]
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    assert body.startswith(b"retry: 3000\n\n")
+    data = [line for line in body.split(b"\n") if line.startswith(b"data: ")]
+    event = orjson.loads(data[0][len(b"data: "):])
+    assert (event["collection"], event["action"], event["data"]["first_name"]) == ("contacts", "create", "Ada")
+    # The subscription is dropped with the connection
+    assert feed.hub.subscribers == {}
+
+
+def test_events_url_only_takes_short_lived_stream_tokens(client, auth_headers, monkeypatch):
+    import auth
+
+    access_token = auth_headers["Authorization"].split()[1]
+    issued = client.post("/events/token", headers=auth_headers).json()
+    assert issued["expires_in"] == auth.STREAM_TOKEN_EXPIRE_SECONDS
+    # The long-lived access token stays out of URLs, and a stream token opens nothing but /events
+    assert client.get("/events", params={"stream_token": access_token}).status_code == 401
+    assert client.get("/events", params={"access_token": access_token}).status_code == 401
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {issued['stream_token']}"}).status_code == 401
+    assert client.post("/events/token").status_code == 401
+
+    monkeypatch.setattr(auth, "STREAM_TOKEN_EXPIRE_SECONDS", -1)
+    expired = client.post("/events/token", headers=auth_headers).json()["stream_token"]
+    assert client.get("/events", params={"stream_token": expired}).status_code == 401
@@ -0,0 +1,49 @@
+"""
+Tests for the streaming export endpoints
+"""
+import csv
+import io
+import json
+
+import export
+
+
+def test_csv_export_streams_every_owned_row(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    rows = [{"first_name": f"First {i}", "last_name": "Last", "status": "customer"} for i in range(5)]
+    rows[0]["notes"] = 'quoted "notes",\nacross lines'
+    client.post("/contacts/bulk", json=rows, headers=auth_headers)
+
+    response = client.get("/contacts/export", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="contacts.csv"'
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    assert [record["first_name"] for record in records] == [f"First {i}" for i in range(5)]
+    assert records[0]["notes"] == 'quoted "notes",\nacross lines'
+    assert records[0]["status"] == "customer"
+
+
+def test_ndjson_export_is_owner_scoped(client, auth_headers, other_headers):
+    contact = client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers).json()
+    client.post("/deals", json={"title": "Deal", "value": 250.0, "stage": "proposal", "contact_id": contact["id"]}, headers=auth_headers)
+    other_contact = client.post("/contacts", json={"first_name": "C", "last_name": "D"}, headers=other_headers).json()
+    assert client.post("/deals", json={"title": "Not mine", "contact_id": other_contact["id"]}, headers=other_headers).status_code == 200
+
+    response = client.get("/deals/export?format=ndjson", headers=auth_headers)
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    deals = [json.loads(line) for line in response.text.splitlines()]
+    assert len(deals) == 1
+    assert (deals[0]["title"], deals[0]["value"], deals[0]["stage"]) == ("Deal", 250.0, "proposal")
+    assert deals[0]["created_at"]
+    theirs = client.get("/deals/export?format=ndjson", headers=other_headers).text.splitlines()
+    assert [json.loads(line)["title"] for line in theirs] == ["Not mine"]
+
+
+def test_export_of_nothing_and_unknown_format(client, auth_headers):
+    assert client.get("/tasks/export", headers=auth_headers).text.strip() == (
+        "id,title,description,priority,status,due_date,contact_id,created_at,updated_at"
+    )
+    assert client.get("/interactions/export?format=xml", headers=auth_headers).status_code == 422
@@ -0,0 +1,55 @@
+"""
+Tests for the filter and sort query parameters of the list endpoints
+"""
+
+
+def collect(client, headers, path, **params):
+    """Follow next_cursor through every page, two rows at a time"""
+    items, cursor = [], None
+    while True:
+        page = client.get(path, params={**params, "pagination": "cursor", "limit": 2, **({"cursor": cursor} if cursor else {})}, headers=headers).json()
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return items
+
+
+def test_deal_filters(client, auth_headers):
+    contact, other = [client.post("/contacts", json={"first_name": "A", "last_name": name}, headers=auth_headers).json() for name in "BC"]
+    for title, value, stage, close, contact_id in [
+        ("small", 100, "prospecting", "2026-01-10T00:00:00", other["id"]),
+        ("mid", 500, "proposal", "2026-02-10T00:00:00", contact["id"]),
+        ("big", 900, "negotiation", "2026-03-10T00:00:00", contact["id"]),
+        ("won", 700, "closed_won", None, other["id"]),
+    ]:
+        assert client.post("/deals", json={"title": title, "value": value, "stage": stage, "expected_close_date": close, "contact_id": contact_id}, headers=auth_headers).status_code == 200
+
+    def titles(**params):
+        return [deal["title"] for deal in collect(client, auth_headers, "/deals", **params)]
+
+    assert titles(stage=["proposal", "negotiation"]) == ["mid", "big"]
+    assert titles(min_value=500, max_value=800) == ["mid", "won"]
+    assert titles(close_after="2026-02-01T00:00:00", close_before="2026-03-01T00:00:00") == ["mid"]
+    assert titles(contact_id=contact["id"], sort="-value") == ["big", "mid"]
+    assert client.get("/deals?stage=nonsense", headers=auth_headers).status_code == 422
+    assert client.get("/deals?sort=title", headers=auth_headers).status_code == 422
+
+
+def test_sort_pages_through_nulls(client, auth_headers):
+    for title, due in [("b", "2026-05-01T00:00:00"), ("none1", None), ("a", "2026-04-01T00:00:00"), ("none2", None), ("c", "2026-06-01T00:00:00")]:
+        client.post("/tasks", json={"title": title, "due_date": due, "priority": "high" if title != "c" else "low"}, headers=auth_headers)
+
+    assert [t["title"] for t in collect(client, auth_headers, "/tasks", sort="due_date")] == ["none1", "none2", "a", "b", "c"]
+    assert [t["title"] for t in collect(client, auth_headers, "/tasks", sort="-due_date")] == ["c", "b", "a", "none2", "none1"]
+    assert [t["title"] for t in collect(client, auth_headers, "/tasks", sort="-due_date", priority="high")] == ["b", "a", "none2", "none1"]
+    offset = client.get("/tasks?pagination=offset&sort=due_date&skip=1&limit=2", headers=auth_headers).json()
+    assert [t["title"] for t in offset] == ["none2", "a"]
+
+
+def test_contact_status_filter_and_name_sort(client, auth_headers):
+    for first, last, status in [("Zed", "Young", "lead"), ("Amy", "Adams", "customer"), ("Bob", "Brown", "lead")]:
+        client.post("/contacts", json={"first_name": first, "last_name": last, "status": status}, headers=auth_headers)
+
+    leads = collect(client, auth_headers, "/contacts", status="lead", sort="last_name")
+
+    assert [c["last_name"] for c in leads] == ["Brown", "Young"]
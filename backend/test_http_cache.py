@@ -0,0 +1,70 @@
+"""
+Tests for ETag / Last-Modified conditional GETs on the read endpoints
+"""
+
+
+def test_if_none_match_returns_304_without_loading_rows(client, auth_headers, count_statements):
+    client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers)
+    first = client.get("/contacts", headers=auth_headers)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"') and first.headers["cache-control"] == "private, no-cache"
+    assert "last-modified" in first.headers
+
+    count_statements.clear()
+    cached = client.get("/contacts", headers={**auth_headers, "If-None-Match": etag})
+
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert not any("FROM contacts" in statement for statement in count_statements)
+
+
+def test_writes_and_query_string_change_the_etag(client, auth_headers):
+    contact = client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers).json()
+    etag = client.get("/contacts", headers=auth_headers).headers["etag"]
+    assert client.get("/contacts?limit=1", headers=auth_headers).headers["etag"] != etag
+    # Writes to another collection leave the contacts ETag alone
+    client.post("/tasks", json={"title": "T"}, headers=auth_headers)
+    assert client.get("/contacts", headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+    client.put(f"/contacts/{contact['id']}", json={"company": "Acme"}, headers=auth_headers)
+    response = client.get("/contacts", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200 and response.json()[0]["company"] == "Acme"
+
+    item = client.get(f"/contacts/{contact['id']}", headers=auth_headers)
+    assert client.get(f"/contacts/{contact['id']}", headers={**auth_headers, "If-None-Match": item.headers["etag"]}).status_code == 304
+    client.delete(f"/contacts/{contact['id']}", headers=auth_headers)
+    assert client.get("/contacts", headers={**auth_headers, "If-None-Match": response.headers["etag"]}).status_code == 200
+
+
+def test_dashboard_and_if_modified_since(client, auth_headers):
+    stats = client.get("/dashboard/stats", headers=auth_headers)
+    assert client.get("/dashboard/stats", headers={**auth_headers, "If-None-Match": stats.headers["etag"]}).status_code == 304
+    client.post("/tasks", json={"title": "T"}, headers=auth_headers)
+    assert client.get("/dashboard/stats", headers={**auth_headers, "If-None-Match": stats.headers["etag"]}).status_code == 200
+
+    last_modified = client.get("/tasks", headers=auth_headers).headers["last-modified"]
+    assert client.get("/tasks", headers={**auth_headers, "If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/tasks", headers={**auth_headers, "If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}).status_code == 200
+
+
+def test_etags_are_per_owner(client, auth_headers, other_headers):
+    etag = client.get("/deals", headers=auth_headers).headers["etag"]
+    assert client.get("/deals", headers={**other_headers, "If-None-Match": etag}).status_code == 200
+
+
+def test_single_items_are_owner_scoped(client, auth_headers, other_headers):
+    contact = client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers).json()
+    rows = {
+        "contacts": contact,
+        "interactions": client.post("/interactions", json={"type": "call", "subject": "S", "contact_id": contact["id"]}, headers=auth_headers).json(),
+        "tasks": client.post("/tasks", json={"title": "T"}, headers=auth_headers).json(),
+        "deals": client.post("/deals", json={"title": "D", "contact_id": contact["id"]}, headers=auth_headers).json(),
+    }
+
+    for collection, row in rows.items():
+        mine = client.get(f"/{collection}/{row['id']}", headers=auth_headers)
+        assert mine.status_code == 200
+        # Neither the row nor a 304 for the owner's ETag leaks to another user
+        assert client.get(f"/{collection}/{row['id']}", headers=other_headers).status_code == 404
+        assert client.get(f"/{collection}/{row['id']}", headers={**other_headers, "If-None-Match": mine.headers["etag"]}).status_code == 404
+    assert client.get(f"/contacts/{contact['id']}/interactions", headers=other_headers).json() == []
@@ -0,0 +1,67 @@
+"""
+Tests for ?include=contact and /contacts/{id}/overview: related rows are eager-loaded in a fixed number of queries
+"""
+
+
+def _count_selects(statements, call):
+    statements.clear()
+    response = call()
+    return response, len([statement for statement in statements if statement.startswith("SELECT")])
+
+
+def _seed(client, headers, contacts):
+    ids = []
+    for i in range(contacts):
+        contact = client.post("/contacts", json={"first_name": f"F{i}", "last_name": "L", "email": f"f{i}@example.com"}, headers=headers).json()
+        client.post("/deals", json={"title": f"D{i}", "contact_id": contact["id"]}, headers=headers)
+        client.post("/tasks", json={"title": f"T{i}", "contact_id": contact["id"]}, headers=headers)
+        client.post("/interactions", json={"type": "call", "subject": f"S{i}", "contact_id": contact["id"]}, headers=headers)
+        ids.append(contact["id"])
+    return ids
+
+
+def test_include_contact_uses_a_fixed_number_of_queries(client, auth_headers, count_statements):
+    _seed(client, auth_headers, 2)
+    counts = {}
+    for path in ["/deals?include=contact", "/tasks?include=contact", "/interactions?include=contact"]:
+        response, counts[path] = _count_selects(count_statements, lambda: client.get(path, headers=auth_headers))
+        items = response.json()
+        assert sorted(item["contact"]["first_name"] for item in items) == ["F0", "F1"]
+        assert items[0]["contact"].keys() == {"id", "first_name", "last_name", "email", "company"}
+
+    _seed(client, auth_headers, 8)
+    for path, count in counts.items():
+        response, more = _count_selects(count_statements, lambda: client.get(path, headers=auth_headers))
+        assert len(response.json()) == 10
+        assert more == count, path
+
+    narrowed = client.get("/deals?include=contact&fields=title", headers=auth_headers).json()[0]
+    assert narrowed == {"title": "D0", "contact": narrowed["contact"]} and narrowed["contact"]["first_name"] == "F0"
+    assert "contact" not in client.get("/deals", headers=auth_headers).json()[0]
+
+
+def test_overview_uses_a_fixed_number_of_queries(client, auth_headers, count_statements):
+    few = _seed(client, auth_headers, 1)[0]
+    many = _seed(client, auth_headers, 1)[0]
+    for i in range(5):
+        client.post("/deals", json={"title": f"Extra{i}", "contact_id": many}, headers=auth_headers)
+        client.post("/interactions", json={"type": "note", "subject": f"N{i}", "contact_id": many}, headers=auth_headers)
+
+    small, small_count = _count_selects(count_statements, lambda: client.get(f"/contacts/{few}/overview", headers=auth_headers))
+    large, large_count = _count_selects(count_statements, lambda: client.get(f"/contacts/{many}/overview", headers=auth_headers))
+
+    assert small_count == large_count
+    overview = large.json()
+    assert overview["first_name"] == "F0" and len(overview["deals"]) == 6 and len(overview["tasks"]) == 1
+    # Newest interaction first
+    assert [interaction["subject"] for interaction in overview["interactions"]][:2] == ["N4", "N3"]
+
+
+def test_includes_are_owner_scoped(client, auth_headers, other_headers):
+    contact_id = _seed(client, auth_headers, 1)[0]
+
+    assert client.get(f"/contacts/{contact_id}/overview", headers=other_headers).status_code == 404
+    # A row pointing at someone else's contact does not reveal it
+    client.post("/tasks", json={"title": "Theirs", "contact_id": contact_id}, headers=other_headers)
+    assert client.get("/tasks?include=contact", headers=other_headers).json()[0]["contact"] is None
+    assert [task["title"] for task in client.get(f"/contacts/{contact_id}/overview", headers=auth_headers).json()["tasks"]] == ["T0"]
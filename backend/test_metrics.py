@@ -0,0 +1,76 @@
+"""
+Request metrics: latency histograms and SQL time by route, Server-Timing, slow-query samples
+"""
+import pytest
+
+from metrics import metrics
+
+
+@pytest.fixture
+def instrumented(engine):
+    metrics.reset()
+    metrics.enable([engine])
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+def test_disabled_metrics_add_nothing(client, auth_headers):
+    response = client.get("/contacts", headers=auth_headers)
+    assert "server-timing" not in response.headers
+    assert client.get("/metrics").status_code == 404
+    assert metrics.routes == {}
+
+
+def test_requests_are_recorded_by_route_template(client, auth_headers, instrumented):
+    first = client.post("/contacts", json={"first_name": "Ada", "last_name": "L"}, headers=auth_headers).json()
+    second = client.post("/contacts", json={"first_name": "Bob", "last_name": "M"}, headers=auth_headers).json()
+    client.get(f"/contacts/{first['id']}", headers=auth_headers)
+    client.get(f"/contacts/{second['id']}", headers=auth_headers)
+    client.get("/contacts/999999", headers=auth_headers)
+
+    stats = instrumented.routes[("GET", "/contacts/{contact_id}")]
+    assert stats.requests == 3
+    assert stats.statuses == {200: 2, 404: 1}
+    assert stats.statements >= 3
+    assert stats.db_seconds > 0
+
+    body = client.get("/metrics").text
+    assert 'zencrm_http_request_duration_seconds_count{method="GET",route="/contacts/{contact_id}"} 3' in body
+    assert 'zencrm_http_request_duration_seconds_bucket{method="GET",route="/contacts/{contact_id}",le="+Inf"} 3' in body
+    assert 'zencrm_http_requests_total{method="GET",route="/contacts/{contact_id}",status="404"} 1' in body
+    assert 'zencrm_db_statements_total{method="POST",route="/contacts"}' in body
+    assert "/contacts/1\"" not in body
+
+
+def test_server_timing_header_reports_db_time(client, auth_headers, instrumented):
+    response = client.get("/contacts", headers=auth_headers)
+    timing = response.headers["server-timing"]
+    assert timing.startswith("total;dur=")
+    assert "db;dur=" in timing and "statements" in timing
+
+
+def test_slow_queries_are_sampled_with_their_route(client, auth_headers, instrumented):
+    # Every statement counts as slow
+    instrumented.slow_query_seconds, threshold = 0, instrumented.slow_query_seconds
+    try:
+        client.get("/contacts", headers=auth_headers)
+    finally:
+        instrumented.slow_query_seconds = threshold
+
+    assert instrumented.slow_query_count > 0
+    assert any(sample["route"] == "/contacts" and "contacts" in sample["statement"] for sample in instrumented.slow_queries)
+    assert client.get("/admin/slow-queries", headers=auth_headers).status_code == 403
+
+
+def test_disable_removes_engine_hooks(engine, db):
+    from sqlalchemy import text
+
+    metrics.enable([engine])
+    metrics.disable()
+    metrics.slow_query_seconds, threshold = 0, metrics.slow_query_seconds
+    try:
+        db.execute(text("SELECT 1"))
+    finally:
+        metrics.slow_query_seconds = threshold
+    assert metrics.slow_query_count == 0
@@ -0,0 +1,97 @@
+"""
+Tests for keyset (cursor) pagination of the list endpoints
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+from crud import get_interactions, INTERACTION_KEYSET
+from models import Interaction, InteractionType
+
+
+def test_contacts_cursor_walks_every_row_once(client, auth_headers):
+    for i in range(7):
+        client.post("/contacts", json={"first_name": f"C{i}", "last_name": "X"}, headers=auth_headers)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {"pagination": "cursor"})}
+        page = client.get("/contacts", params=params, headers=auth_headers).json()
+        seen += [contact["first_name"] for contact in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"C{i}" for i in range(7)]
+
+
+def test_cursor_is_stable_when_rows_are_inserted(client, auth_headers):
+    for i in range(4):
+        client.post("/contacts", json={"first_name": f"C{i}", "last_name": "X"}, headers=auth_headers)
+    first = client.get("/contacts", params={"pagination": "cursor", "limit": 2}, headers=auth_headers).json()
+    client.post("/contacts", json={"first_name": "new", "last_name": "X"}, headers=auth_headers)
+
+    second = client.get("/contacts", params={"limit": 2, "cursor": first["next_cursor"]}, headers=auth_headers).json()
+
+    assert [c["first_name"] for c in second["items"]] == ["C2", "C3"]
+
+
+def test_offset_mode_returns_plain_list(client, auth_headers):
+    for i in range(3):
+        client.post("/contacts", json={"first_name": f"C{i}", "last_name": "X"}, headers=auth_headers)
+
+    response = client.get("/contacts", params={"pagination": "offset", "skip": 1, "limit": 5}, headers=auth_headers)
+
+    assert [c["first_name"] for c in response.json()] == ["C1", "C2"]
+
+
+def test_offset_is_the_default_for_existing_clients(client, auth_headers):
+    for i in range(3):
+        client.post("/contacts", json={"first_name": f"C{i}", "last_name": "X"}, headers=auth_headers)
+
+    assert [c["first_name"] for c in client.get("/contacts?skip=1", headers=auth_headers).json()] == ["C1", "C2"]
+    response = client.get("/contacts", params={"pagination": "offset", "cursor": "WzFd"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers):
+    response = client.get("/deals", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_wrongly_typed_cursor_is_rejected(client, auth_headers):
+    def cursor(values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+    # Valid base64 JSON lists of the right length, but not values a keyset column can hold
+    for path, values in [("/interactions", [1, 1]), ("/contacts", [{"a": 1}]), ("/tasks", [[1]]), ("/deals", "x")]:
+        response = client.get(path, params={"cursor": cursor(values)}, headers=auth_headers)
+        assert response.status_code == 400, (path, values)
+
+
+def test_skip_is_rejected_in_cursor_mode(client, auth_headers):
+    response = client.get("/contacts", params={"pagination": "cursor", "skip": 20}, headers=auth_headers)
+    assert response.status_code == 400
+    assert "pagination=offset" in response.json()["detail"]
+
+
+def test_interactions_cursor_breaks_created_at_ties(db):
+    now = datetime.utcnow()
+    db.add_all([
+        Interaction(type=InteractionType.NOTE, subject=str(i), contact_id=1, user_id=1,
+                    created_at=now - timedelta(minutes=i // 2))
+        for i in range(6)
+    ])
+    db.commit()
+
+    subjects, cursor = [], None
+    while True:
+        rows = get_interactions(db, limit=3, user_id=1, cursor=cursor)
+        page = INTERACTION_KEYSET.page(rows, 2)
+        subjects += [row.subject for row in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(subjects) == [str(i) for i in range(6)]
+    assert len(subjects) == 6
@@ -0,0 +1,34 @@
+"""
+Tests for the fields= projection of the list endpoints
+"""
+
+
+def test_fields_narrow_select_and_response(client, auth_headers, count_statements):
+    for i in range(3):
+        client.post("/contacts", json={"first_name": f"F{i}", "last_name": "L", "notes": "x" * 1000}, headers=auth_headers)
+    count_statements.clear()
+
+    page = client.get("/contacts?pagination=cursor&fields=first_name,status&limit=2", headers=auth_headers).json()
+
+    assert page["items"] == [{"first_name": "F0", "status": "lead"}, {"first_name": "F1", "status": "lead"}]
+    select = next(statement for statement in count_statements if "FROM contacts" in statement)
+    assert "contacts.notes" not in select and "contacts.first_name" in select
+    rest = client.get(f"/contacts?fields=first_name&cursor={page['next_cursor']}", headers=auth_headers).json()
+    assert rest == {"items": [{"first_name": "F2"}], "next_cursor": None}
+
+
+def test_fields_with_sort_offset_and_unknown_names(client, auth_headers):
+    contact = client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers).json()
+    for value in (10, 30, 20):
+        client.post("/deals", json={"title": f"D{value}", "value": value, "contact_id": contact["id"]}, headers=auth_headers)
+
+    # The sort column is loaded for the cursor even when it is not requested
+    page = client.get("/deals?pagination=cursor&fields=title&sort=-value&limit=2", headers=auth_headers).json()
+    rest = client.get(f"/deals?fields=title&sort=-value&cursor={page['next_cursor']}", headers=auth_headers).json()
+    assert [deal["title"] for deal in page["items"] + rest["items"]] == ["D30", "D20", "D10"]
+
+    offset = client.get("/deals?pagination=offset&fields=id,value", headers=auth_headers).json()
+    assert [set(deal) for deal in offset] == [{"id", "value"}] * 3
+    response = client.get("/deals?fields=title,hashed_password", headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: hashed_password"
@@ -0,0 +1,112 @@
+"""
+Runs EXPLAIN QUERY PLAN on every statement the crud functions issue and fails on full table scans
+"""
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+import crud
+from models import Contact, Deal, Interaction, Task, ContactStatus, TaskStatus, DealStage, InteractionType
+from schemas import (
+    UserCreate, ContactCreate, ContactUpdate, InteractionCreate, InteractionUpdate,
+    TaskCreate, TaskUpdate, DealCreate, DealUpdate,
+    ContactFilter, ContactSort, TaskFilter, TaskSort, DealFilter, DealSort
+)
+
+# "SCAN contacts" reads the whole table; "SCAN contacts USING INDEX ..." and "SEARCH ..." do not
+FULL_SCAN = re.compile(r"\bSCAN (\w+)$")
+
+# Deliberately whole-table operations: the admin user list, the rollup rebuild and the analytics snapshot
+UNSCOPED = {"get_users", "rebuild_stats", "refresh_pipeline_snapshot"}
+
+
+@pytest.fixture
+def seeded(db):
+    user = crud.create_user(db, UserCreate(email="owner@example.com", full_name="Owner", password="secret1"), "x")
+    contact = crud.create_contact(db, ContactCreate(first_name="A", last_name="B"), user.id)
+    interaction = crud.create_interaction(db, InteractionCreate(type=InteractionType.CALL, subject="s", contact_id=contact.id), user.id)
+    task = crud.create_task(db, TaskCreate(title="t", contact_id=contact.id), user.id)
+    deal = crud.create_deal(db, DealCreate(title="d", value=1.0, contact_id=contact.id), user.id)
+    return {
+        "user": user.id, "email": user.email, "contact": contact.id,
+        "interaction": interaction.id, "task": task.id, "deal": deal.id,
+    }
+
+
+def crud_calls(ids):
+    """One representative call per crud query, in an order that leaves every row in place until its delete"""
+    contact_cursor = crud.CONTACT_KEYSET.encode(Contact(id=0))
+    value_cursor = crud.DEAL_SORTS[DealSort.VALUE].encode(Deal(value=0.5, id=0))
+    return [
+        ("get_user_by_email", lambda db: crud.get_user_by_email(db, ids["email"])),
+        ("get_users", lambda db: crud.get_users(db)),
+        ("create_contact", lambda db: crud.create_contact(db, ContactCreate(first_name="C", last_name="D"), ids["user"])),
+        ("get_contacts", lambda db: crud.get_contacts(db, user_id=ids["user"])),
+        ("get_contacts_cursor", lambda db: crud.get_contacts(db, user_id=ids["user"], cursor=contact_cursor)),
+        ("search_contacts", lambda db: crud.search_contacts(db, ids["user"], "a b")),
+        ("get_contacts_filtered", lambda db: crud.get_contacts(db, user_id=ids["user"], filters=ContactFilter(
+            status=[ContactStatus.LEAD], sort=ContactSort.LAST_NAME))),
+        ("get_contact", lambda db: crud.get_contact(db, ids["contact"], ids["user"])),
+        ("get_contact_overview", lambda db: crud.get_contact_overview(db, ids["contact"], ids["user"])),
+        ("update_contact", lambda db: crud.update_contact(db, ids["contact"], ContactUpdate(status=ContactStatus.CUSTOMER), ids["user"])),
+        ("create_interaction", lambda db: crud.create_interaction(db, InteractionCreate(type=InteractionType.NOTE, subject="n", contact_id=ids["contact"]), ids["user"])),
+        ("get_interactions", lambda db: crud.get_interactions(db, user_id=ids["user"])),
+        ("get_interactions_by_contact", lambda db: crud.get_interactions_by_contact(db, ids["contact"], ids["user"])),
+        ("get_interaction", lambda db: crud.get_interaction(db, ids["interaction"], ids["user"])),
+        ("update_interaction", lambda db: crud.update_interaction(db, ids["interaction"], InteractionUpdate(type=InteractionType.EMAIL, subject="e"), ids["user"])),
+        ("create_task", lambda db: crud.create_task(db, TaskCreate(title="t2"), ids["user"])),
+        ("get_tasks", lambda db: crud.get_tasks(db, user_id=ids["user"])),
+        ("get_tasks_with_contact", lambda db: crud.get_tasks(db, user_id=ids["user"], fields=["title"], include_contact=True)),
+        ("get_tasks_filtered", lambda db: crud.get_tasks(db, user_id=ids["user"], filters=TaskFilter(
+            status=[TaskStatus.PENDING], due_after=datetime(2026, 1, 1), sort=TaskSort.DUE_DATE_DESC))),
+        ("get_task", lambda db: crud.get_task(db, ids["task"], ids["user"])),
+        ("update_task", lambda db: crud.update_task(db, ids["task"], TaskUpdate(status=TaskStatus.COMPLETED), ids["user"])),
+        ("get_due_tasks", lambda db: crud.get_due_tasks(db, datetime(2026, 1, 1), datetime(2026, 1, 2))),
+        ("create_deal", lambda db: crud.create_deal(db, DealCreate(title="d2", contact_id=ids["contact"]), ids["user"])),
+        ("get_deals", lambda db: crud.get_deals(db, user_id=ids["user"])),
+        ("get_deals_filtered", lambda db: crud.get_deals(db, user_id=ids["user"], cursor=value_cursor, filters=DealFilter(
+            stage=[DealStage.PROPOSAL, DealStage.NEGOTIATION], min_value=1, sort=DealSort.VALUE))),
+        ("get_deal", lambda db: crud.get_deal(db, ids["deal"], ids["user"])),
+        ("update_deal", lambda db: crud.update_deal(db, ids["deal"], DealUpdate(stage=DealStage.CLOSED_WON), ids["user"])),
+        ("apply_batch", lambda db: crud.apply_batch(db, ids["user"], [
+            ("update", Task, ids["task"], {"title": "b"}), ("create", Deal, None, {"title": "d3", "contact_id": ids["contact"]})])),
+        ("export_statement", lambda db: db.execute(crud.export_statement(Interaction, ids["user"])).all()),
+        ("compute_owner_stats", lambda db: crud.compute_owner_stats(db, ids["user"])),
+        ("get_dashboard_stats", lambda db: crud.get_dashboard_stats(db, ids["user"])),
+        ("get_changes", lambda db: crud.get_changes(db, ids["user"], dict.fromkeys(crud.COLLECTIONS.values(), 1))),
+        ("get_collection_versions", lambda db: crud.get_collection_versions(db, ids["user"], list(crud.COLLECTIONS.values()))),
+        ("rebuild_stats", lambda db: crud.rebuild_stats(db)),
+        ("refresh_pipeline_snapshot", lambda db: crud.refresh_pipeline_snapshot(db)),
+        ("get_stage_durations", lambda db: crud.get_stage_durations(db, ids["user"], datetime(2026, 1, 1), datetime(2027, 1, 1))),
+        ("get_stage_funnel", lambda db: crud.get_stage_funnel(db, ids["user"], datetime(2026, 1, 1))),
+        ("get_pipeline_analytics", lambda db: crud.get_pipeline_analytics(db, [ids["user"]])),
+        ("delete_interaction", lambda db: crud.delete_interaction(db, ids["interaction"], ids["user"])),
+        ("delete_task", lambda db: crud.delete_task(db, ids["task"], ids["user"])),
+        ("delete_deal", lambda db: crud.delete_deal(db, ids["deal"], ids["user"])),
+        ("delete_contact", lambda db: crud.delete_contact(db, ids["contact"], ids["user"])),
+    ]
+
+
+def test_crud_queries_use_indexes(db, engine, seeded):
+    captured = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, parameters, context, executemany:
+                 captured.append((statement, parameters[0] if executemany else parameters)))
+
+    full_scans = []
+    for name, call in crud_calls(seeded):
+        captured.clear()
+        call(db)
+        statements = list(captured)
+        if name in UNSCOPED:
+            continue
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            plan = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            for row in plan:
+                if FULL_SCAN.search(row[-1]):
+                    full_scans.append(f"{name}: {row[-1]}\n    {statement}")
+
+    assert not full_scans, "full table scans:\n" + "\n".join(full_scans)
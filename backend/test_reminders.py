@@ -0,0 +1,123 @@
+"""
+Tests for the task due-date reminder scheduler
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+import crud
+from crud import create_user, create_task, update_task, apply_batch
+from models import Task, TaskStatus
+from reminders import ReminderScheduler
+from schemas import UserCreate, TaskCreate, TaskUpdate
+
+
+class CollectingSink:
+    def __init__(self):
+        self.reminders = []
+
+    async def send(self, reminder):
+        self.reminders.append(reminder)
+
+
+@pytest.fixture
+def owner_id(db):
+    return create_user(db, UserCreate(email="owner@example.com", full_name="Owner", password="secret1"), "x").id
+
+
+class Clock:
+    """A UTC clock that only moves when the test advances it"""
+
+    def __init__(self):
+        self.now = datetime(2026, 1, 5, 9, 0)
+
+    def __call__(self):
+        return self.now
+
+    def at(self, seconds):
+        return self.now + timedelta(seconds=seconds)
+
+
+def _run(engine, clock, body, horizon=60):
+    """Run `body(scheduler, sink)` next to a started scheduler on `clock` and return the sink"""
+    sink = CollectingSink()
+
+    async def main():
+        scheduler = ReminderScheduler(sessionmaker(bind=engine), sink, horizon=horizon, catchup=3600, clock=clock)
+        runner = scheduler.start()
+        try:
+            await scheduler.wait_idle()
+            await body(scheduler, sink)
+        finally:
+            await scheduler.stop()
+        # stop() returns once the runner has actually finished
+        assert runner.cancelled()
+
+    asyncio.run(main())
+    assert crud.WRITE_LISTENERS == []
+    return sink
+
+
+async def _advance(scheduler, clock, seconds):
+    """Move the clock on and let the scheduler send whatever became due"""
+    clock.now += timedelta(seconds=seconds)
+    scheduler.wake()
+    await scheduler.wait_idle()
+
+
+def test_loads_window_and_sends_in_due_order(db, engine, owner_id):
+    clock = Clock()
+    create_task(db, TaskCreate(title="later", due_date=clock.at(40)), owner_id)
+    create_task(db, TaskCreate(title="sooner", due_date=clock.at(20)), owner_id)
+    create_task(db, TaskCreate(title="missed", due_date=clock.at(-600)), owner_id)
+    create_task(db, TaskCreate(title="done", due_date=clock.at(10), status=TaskStatus.COMPLETED), owner_id)
+    create_task(db, TaskCreate(title="beyond horizon", due_date=clock.at(120)), owner_id)
+    create_task(db, TaskCreate(title="undated"), owner_id)
+
+    async def body(scheduler, sink):
+        # "missed" went out straight away
+        assert [reminder.title for reminder in sink.reminders] == ["missed"] and len(scheduler) == 2
+        await _advance(scheduler, clock, 30)
+        assert [reminder.title for reminder in sink.reminders] == ["missed", "sooner"]
+        await _advance(scheduler, clock, 15)
+
+    sink = _run(engine, clock, body)
+    assert [(reminder.title, reminder.overdue) for reminder in sink.reminders] == [
+        ("missed", True), ("sooner", False), ("later", False)
+    ]
+
+
+def test_writes_update_the_heap(db, engine, owner_id):
+    clock = Clock()
+    moved = create_task(db, TaskCreate(title="moved", due_date=clock.at(30)), owner_id)
+    completed = create_task(db, TaskCreate(title="completed", due_date=clock.at(30)), owner_id)
+    deleted = create_task(db, TaskCreate(title="deleted", due_date=clock.at(30)), owner_id)
+
+    async def body(scheduler, sink):
+        # Writes land from worker threads, as they do behind the API
+        await run_in_threadpool(create_task, db, TaskCreate(title="new", due_date=clock.at(20)), owner_id)
+        await run_in_threadpool(update_task, db, moved.id, TaskUpdate(due_date=clock.at(50)), owner_id)
+        await run_in_threadpool(update_task, db, completed.id, TaskUpdate(status=TaskStatus.COMPLETED), owner_id)
+        await run_in_threadpool(apply_batch, db, owner_id, [("delete", Task, deleted.id, {})])
+        await _advance(scheduler, clock, 40)
+        assert list(scheduler._scheduled) == [moved.id]
+
+    sink = _run(engine, clock, body)
+    assert [reminder.title for reminder in sink.reminders] == ["new"]
+
+
+def test_next_window_is_loaded_when_the_horizon_passes(db, engine, owner_id):
+    clock = Clock()
+    create_task(db, TaskCreate(title="second window", due_date=clock.at(50)), owner_id)
+
+    async def body(scheduler, sink):
+        assert len(scheduler) == 0
+        await _advance(scheduler, clock, 40)
+        assert len(scheduler) == 1 and sink.reminders == []
+        await _advance(scheduler, clock, 15)
+
+    sink = _run(engine, clock, body, horizon=30)
+    assert [reminder.title for reminder in sink.reminders] == ["second window"]
@@ -0,0 +1,51 @@
+"""
+Tests for the contact full-text search endpoint
+"""
+
+
+def add_contacts(client, headers, *contacts):
+    return [client.post("/contacts", json=contact, headers=headers).json() for contact in contacts]
+
+
+def test_prefix_search_is_ranked_and_paginated(client, auth_headers):
+    ada, _, notes_only, company = add_contacts(
+        client, auth_headers,
+        {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@analytical.org", "company": "Engines Ltd"},
+        {"first_name": "Alan", "last_name": "Turing", "company": "Bletchley"},
+        {"first_name": "Grace", "last_name": "Hopper", "notes": "Met Ada at the conference"},
+        {"first_name": "Charles", "last_name": "Babbage", "company": "Ada Analytics"},
+    )
+
+    def search(q, **params):
+        return [c["id"] for c in client.get("/contacts/search", params={"q": q, **params}, headers=auth_headers).json()]
+
+    # Name matches outrank company matches, which outrank notes
+    assert search("ada") == [ada["id"], company["id"], notes_only["id"]]
+    assert search("ad lov") == [ada["id"]]
+    assert search("analytical.org") == [ada["id"]]
+    assert search("ada", skip=1, limit=1) == [company["id"]]
+    assert search("nobody") == []
+    assert search('"* AND (') == []
+
+
+def test_search_follows_updates_deletes_and_bulk_imports(client, auth_headers):
+    contact, = add_contacts(client, auth_headers, {"first_name": "Old", "last_name": "Name"})
+    client.put(f"/contacts/{contact['id']}", json={"first_name": "Renamed"}, headers=auth_headers)
+    client.post("/contacts/bulk", json=[{"first_name": "Imported", "last_name": "Row"}], headers=auth_headers)
+
+    def search(q):
+        return [c["first_name"] for c in client.get(f"/contacts/search?q={q}", headers=auth_headers).json()]
+
+    assert search("old") == []
+    assert search("renamed") == ["Renamed"]
+    assert search("imported") == ["Imported"]
+    client.delete(f"/contacts/{contact['id']}", headers=auth_headers)
+    assert search("renamed") == []
+
+
+def test_search_is_owner_scoped(client, auth_headers, other_headers):
+    add_contacts(client, auth_headers, {"first_name": "Mine", "last_name": "Contact"})
+
+    response = client.get("/contacts/search?q=mine", headers=other_headers)
+
+    assert response.json() == []
@@ -0,0 +1,38 @@
+"""
+The direct row serializer must produce exactly what the response models would
+"""
+import json
+
+import crud
+from schemas import (
+    UserCreate, ContactCreate, InteractionCreate, TaskCreate, DealCreate,
+    UserResponse, ContactResponse, InteractionResponse, TaskResponse, DealResponse,
+)
+from models import ContactStatus, DealStage, InteractionType
+from serialization import ORJSONResponse, RowSerializer
+
+
+def test_rows_match_response_models(db):
+    user = crud.create_user(db, UserCreate(email="owner@example.com", full_name="Owner", password="secret1"), "x")
+    contact = crud.create_contact(db, ContactCreate(first_name="Ada", last_name="L", email="ada@example.com", status=ContactStatus.CUSTOMER), user.id)
+    rows = [
+        (UserResponse, user),
+        (ContactResponse, contact),
+        (InteractionResponse, crud.create_interaction(db, InteractionCreate(type=InteractionType.CALL, subject="s", contact_id=contact.id), user.id)),
+        (TaskResponse, crud.create_task(db, TaskCreate(title="t"), user.id)),
+        (DealResponse, crud.create_deal(db, DealCreate(title="d", value=12.5, stage=DealStage.PROPOSAL, contact_id=contact.id), user.id)),
+    ]
+
+    for schema, row in rows:
+        body = ORJSONResponse(RowSerializer(schema).dicts([row])).body
+        assert json.loads(body) == [schema.model_validate(row).model_dump(mode="json")], schema.__name__
+
+
+def test_list_endpoints_use_orjson(client, auth_headers):
+    client.post("/contacts", json={"first_name": "A", "last_name": "B", "email": "a@example.com"}, headers=auth_headers)
+
+    response = client.get("/contacts", headers=auth_headers)
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()[0]["email"] == "a@example.com"
+    assert client.get("/contacts?pagination=offset&fields=email", headers=auth_headers).json() == [{"email": "a@example.com"}]
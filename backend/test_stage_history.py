@@ -0,0 +1,103 @@
+"""
+Tests for the deal stage history and the duration/funnel reports built on it
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from crud import (
+    create_user, create_contact, create_deal, update_deal, bulk_create, apply_batch,
+    get_stage_durations, get_stage_funnel
+)
+from models import Deal, DealStage, DealStageEvent
+from schemas import UserCreate, ContactCreate, DealCreate, DealUpdate
+
+
+@pytest.fixture
+def owner(db):
+    user = create_user(db, UserCreate(email="owner@example.com", full_name="Owner", password="secret1"), "x")
+    contact = create_contact(db, ContactCreate(first_name="A", last_name="B"), user.id)
+    return user.id, contact.id
+
+
+def _events(db, deal_id):
+    return db.query(DealStageEvent).filter(DealStageEvent.deal_id == deal_id).order_by(DealStageEvent.id).all()
+
+
+def _backdate(db, deal_id, days):
+    """Pretend the deal's stage events happened `days` earlier"""
+    for event in _events(db, deal_id):
+        event.changed_at -= timedelta(days=days)
+    db.commit()
+
+
+def test_create_and_stage_changes_append_events(db, owner):
+    owner_id, contact_id = owner
+    deal = create_deal(db, DealCreate(title="d", contact_id=contact_id), owner_id)
+    _backdate(db, deal.id, 3)
+    update_deal(db, deal.id, DealUpdate(stage=DealStage.PROPOSAL), owner_id)
+    # Edits that keep the stage leave no event
+    update_deal(db, deal.id, DealUpdate(value=10.0), owner_id)
+    update_deal(db, deal.id, DealUpdate(stage=DealStage.PROPOSAL), owner_id)
+
+    created, moved = _events(db, deal.id)
+    assert (created.from_stage, created.to_stage, created.seconds_in_from_stage) == (None, DealStage.PROSPECTING, None)
+    assert (moved.from_stage, moved.to_stage) == (DealStage.PROSPECTING, DealStage.PROPOSAL)
+    assert moved.seconds_in_from_stage == pytest.approx(3 * 86400, abs=60)
+
+
+def test_bulk_and_batch_writes_record_history(db, owner):
+    owner_id, contact_id = owner
+    bulk_create(db, Deal, [DealCreate(title=f"d{i}", stage=stage, contact_id=contact_id).model_dump()
+                           for i, stage in enumerate((DealStage.PROSPECTING, DealStage.NEGOTIATION))], owner_id)
+    first, second = db.query(Deal).order_by(Deal.id).all()
+    assert [event.to_stage for event in _events(db, second.id)] == [DealStage.NEGOTIATION]
+
+    apply_batch(db, owner_id, [
+        ("update", Deal, first.id, {"stage": DealStage.QUALIFICATION}),
+        ("update", Deal, second.id, {"title": "renamed"}),
+        ("create", Deal, None, {"title": "new", "stage": DealStage.PROPOSAL, "contact_id": contact_id}),
+    ])
+    assert [(event.from_stage, event.to_stage) for event in _events(db, first.id)] == [
+        (None, DealStage.PROSPECTING), (DealStage.PROSPECTING, DealStage.QUALIFICATION)
+    ]
+    assert len(_events(db, second.id)) == 1
+    assert db.query(DealStageEvent).filter(DealStageEvent.to_stage == DealStage.PROPOSAL).count() == 1
+
+
+def test_stage_durations_and_funnel_over_range(db, owner):
+    owner_id, contact_id = owner
+    deals = [create_deal(db, DealCreate(title=f"d{i}", contact_id=contact_id), owner_id) for i in range(4)]
+    for days, deal in zip((2, 4, 6, 8), deals):
+        _backdate(db, deal.id, days)
+    update_deal(db, deals[0].id, DealUpdate(stage=DealStage.QUALIFICATION), owner_id)
+    update_deal(db, deals[1].id, DealUpdate(stage=DealStage.PROPOSAL), owner_id)
+    update_deal(db, deals[2].id, DealUpdate(stage=DealStage.CLOSED_WON), owner_id)
+    update_deal(db, deals[3].id, DealUpdate(stage=DealStage.CLOSED_LOST), owner_id)
+
+    [prospecting] = get_stage_durations(db, owner_id).stages
+    assert prospecting.stage == DealStage.PROSPECTING and prospecting.exits == 4
+    assert prospecting.avg_days == pytest.approx(5, abs=0.01)
+    assert prospecting.median_days == pytest.approx(4, abs=0.01)
+    assert (prospecting.min_days, prospecting.max_days) == (pytest.approx(2, abs=0.01), pytest.approx(8, abs=0.01))
+
+    funnel = get_stage_funnel(db, owner_id)
+    assert [step.deals for step in funnel.steps] == [4, 3, 2, 1, 1]
+    assert funnel.steps[1].conversion_rate == 0.75 and funnel.steps[0].conversion_rate is None
+    assert funnel.lost == 1
+
+    # Only the moves inside the range count: the creations were backdated out of it
+    recent = get_stage_funnel(db, owner_id, start=datetime.utcnow() - timedelta(days=1))
+    assert [step.deals for step in recent.steps] == [4, 3, 2, 1, 1]
+    assert get_stage_durations(db, owner_id, end=datetime.utcnow() - timedelta(days=1)).stages == []
+
+
+def test_stage_report_endpoints(client, auth_headers):
+    contact = client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers).json()
+    deal = client.post("/deals", json={"title": "d", "contact_id": contact["id"]}, headers=auth_headers).json()
+    client.put(f"/deals/{deal['id']}", json={"stage": "negotiation"}, headers=auth_headers)
+
+    durations = client.get("/analytics/stage-durations", headers=auth_headers).json()
+    assert [(stage["stage"], stage["exits"]) for stage in durations["stages"]] == [("prospecting", 1)]
+    funnel = client.get("/analytics/funnel", params={"start": "2000-01-01T00:00:00"}, headers=auth_headers).json()
+    assert [step["deals"] for step in funnel["steps"]] == [1, 1, 1, 1, 0]
+    assert funnel["start"] == "2000-01-01T00:00:00"
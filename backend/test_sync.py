@@ -0,0 +1,51 @@
+"""
+Tests for the /sync delta endpoint
+"""
+
+
+def test_full_sync_then_deltas_and_tombstones(client, auth_headers):
+    contact = client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers).json()
+    task = client.post("/tasks", json={"title": "T"}, headers=auth_headers).json()
+    client.post("/tasks", json={"title": "Kept"}, headers=auth_headers)
+    interaction = client.post("/interactions", json={"type": "call", "subject": "S", "contact_id": contact["id"]}, headers=auth_headers).json()
+
+    full = client.get("/sync", headers=auth_headers).json()
+    assert sorted(full["reset"]) == ["contacts", "deals", "interactions", "tasks"]
+    assert [row["id"] for row in full["contacts"]] == [contact["id"]]
+    assert full["interactions"][0]["updated_at"] is not None
+    assert full["deleted"] == {"contacts": [], "interactions": [], "tasks": [], "deals": []}
+
+    client.put(f"/contacts/{contact['id']}", json={"company": "Acme"}, headers=auth_headers)
+    client.delete(f"/tasks/{task['id']}", headers=auth_headers)
+    client.post("/tasks/bulk", json=[{"title": "B1"}, {"title": "B2"}], headers=auth_headers)
+    delta = client.get(f"/sync?since={full['token']}", headers=auth_headers).json()
+
+    assert delta["reset"] == []
+    assert [row["company"] for row in delta["contacts"]] == ["Acme"]
+    assert [row["title"] for row in delta["tasks"]] == ["B1", "B2"]
+    assert delta["interactions"] == [] and delta["deals"] == []
+    assert delta["deleted"]["tasks"] == [task["id"]]
+
+    client.delete(f"/interactions/{interaction['id']}", headers=auth_headers)
+    again = client.get(f"/sync?since={delta['token']}", headers=auth_headers).json()
+    assert again["contacts"] == [] and again["tasks"] == []
+    assert again["deleted"]["interactions"] == [interaction["id"]]
+
+
+def test_unchanged_collections_are_not_queried(client, auth_headers, count_statements):
+    client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers)
+    token = client.get("/sync", headers=auth_headers).json()["token"]
+    count_statements.clear()
+
+    delta = client.get(f"/sync?since={token}", headers=auth_headers).json()
+
+    assert delta["token"] == token and delta["contacts"] == []
+    assert not any("FROM contacts" in statement or "FROM tombstones" in statement for statement in count_statements)
+
+
+def test_sync_is_owner_scoped_and_rejects_bad_tokens(client, auth_headers, other_headers):
+    client.post("/tasks", json={"title": "Mine"}, headers=auth_headers)
+
+    assert client.get("/sync", headers=other_headers).json()["tasks"] == []
+    response = client.get("/sync?since=not-a-token", headers=auth_headers)
+    assert response.status_code == 400 and response.json()["detail"] == "Invalid sync token"
@@ -0,0 +1,44 @@
+"""
+Tests for the authenticated-user cache
+"""
+import auth
+from cache import TTLCache
+from models import User, UserRole
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expired():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    expired = TTLCache(maxsize=2, ttl=0)
+    expired.set("a", 1)
+    assert expired.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_authenticated_requests_skip_user_lookup(client, auth_headers, count_statements):
+    client.get("/users/me", headers=auth_headers)
+    count_statements.clear()
+
+    response = client.get("/users/me", headers=auth_headers)
+
+    assert response.json()["email"] == "owner@example.com"
+    assert count_statements == []
+    assert auth.user_cache.stats()["hits"] >= 1
+
+
+def test_user_update_invalidates_cache(client, auth_headers, db):
+    client.get("/users/me", headers=auth_headers)
+    user = db.query(User).filter(User.email == "owner@example.com").first()
+    user.role = UserRole.ADMIN
+    db.commit()
+
+    response = client.get("/admin/cache-stats", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["user_cache"]["size"] == 1
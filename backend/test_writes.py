@@ -0,0 +1,34 @@
+"""
+Tests for the single-row write paths (INSERT/UPDATE/DELETE ... RETURNING)
+"""
+from sqlalchemy import select
+
+from models import Deal
+
+
+def test_writes_skip_the_lookup_and_refresh(client, auth_headers, count_statements):
+    count_statements.clear()
+
+    contact = client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers).json()
+    updated = client.put(f"/contacts/{contact['id']}", json={"company": "Acme"}, headers=auth_headers).json()
+    assert client.delete(f"/contacts/{contact['id']}", headers=auth_headers).status_code == 200
+
+    assert updated["company"] == "Acme" and updated["first_name"] == "A"
+    contact_statements = [statement.split()[0] for statement in count_statements if " contacts" in statement]
+    assert contact_statements == ["INSERT", "UPDATE", "DELETE"]
+    assert all("RETURNING" in statement for statement in count_statements if " contacts" in statement)
+
+
+def test_updates_and_deletes_are_owner_scoped(client, auth_headers, other_headers, engine):
+    contact = client.post("/contacts", json={"first_name": "A", "last_name": "B"}, headers=auth_headers).json()
+    deal = client.post("/deals", json={"title": "D", "value": 5, "contact_id": contact["id"]}, headers=auth_headers).json()
+
+    assert client.put(f"/deals/{deal['id']}", json={"stage": "closed_won"}, headers=other_headers).status_code == 404
+    assert client.delete(f"/contacts/{contact['id']}", headers=other_headers).status_code == 404
+    assert client.get(f"/deals/{deal['id']}", headers=auth_headers).json()["stage"] == "prospecting"
+
+    # Deleting a contact detaches its deals instead of leaving a dangling contact_id
+    assert client.delete(f"/contacts/{contact['id']}", headers=auth_headers).status_code == 200
+    with engine.connect() as conn:
+        assert conn.execute(select(Deal.contact_id).where(Deal.id == deal["id"])).scalar_one() is None
+    assert client.get("/dashboard/stats", headers=auth_headers).json()["total_contacts"] == 0
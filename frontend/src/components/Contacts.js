@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Plus, Search, Edit, Trash2, Phone, Mail, Building, User } from 'lucide-react';
 import axios from 'axios';
+import useChangeFeed from '../hooks/useChangeFeed';
 
 
 const statusColors = {
@@ -27,13 +28,22 @@ export default function Contacts() {
   });
 
   useEffect(() => {
-    fetchContacts();
-  }, []);
+    // Debounce typing; the search itself runs server-side
+    const timer = setTimeout(fetchContacts, searchTerm ? 250 : 0);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  useChangeFeed(['contacts'], () => fetchContacts());
 
   const fetchContacts = async () => {
     try {
-      const response = await axios.get(process.env.REACT_APP_URL+'/contacts');
-      setContacts(response.data);
+      if (searchTerm.trim()) {
+        const response = await axios.get(process.env.REACT_APP_URL+'/contacts/search', { params: { q: searchTerm, limit: 100 } });
+        setContacts(response.data);
+      } else {
+        const response = await axios.get(process.env.REACT_APP_URL+'/contacts');
+        setContacts(response.data);
+      }
     } catch (error) {
       console.error('Error fetching contacts:', error);
     } finally {
@@ -93,12 +103,6 @@ export default function Contacts() {
     }
   };
 
-  const filteredContacts = contacts.filter(contact =>
-    `${contact.first_name} ${contact.last_name}`.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    contact.email?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    contact.company?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -141,7 +145,7 @@ export default function Contacts() {
 
       {/* Contacts Grid */}
       <div className="grid grid-cols-1 gap-6 sm:grid-cols-2 lg:grid-cols-3">
-        {filteredContacts.map((contact) => (
+        {contacts.map((contact) => (
           <div key={contact.id} className="bg-white overflow-hidden shadow rounded-lg">
             <div className="p-6">
               <div className="flex items-center">
@@ -194,7 +198,7 @@ export default function Contacts() {
         ))}
       </div>
 
-      {filteredContacts.length === 0 && (
+      {contacts.length === 0 && (
         <div className="text-center py-12">
           <User className="mx-auto h-12 w-12 text-gray-400" />
           <h3 className="mt-2 text-sm font-medium text-gray-900">No contacts</h3>
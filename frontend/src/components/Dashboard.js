@@ -33,6 +33,7 @@ import {
   AreaChart
 } from 'recharts';
 import axios from 'axios';
+import useChangeFeed from '../hooks/useChangeFeed';
 
 
 const COLORS = ['#3b82f6', '#10b981', '#f59e0b', '#ef4444', '#8b5cf6'];
@@ -45,6 +46,8 @@ export default function Dashboard() {
     fetchDashboardStats();
   }, []);
 
+  useChangeFeed(['contacts', 'interactions', 'tasks', 'deals'], () => fetchDashboardStats());
+
   const fetchDashboardStats = async () => {
     try {
       const response = await axios.get(process.env.REACT_APP_URL+'/dashboard/stats');
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Plus, Search, Edit, Trash2, DollarSign, TrendingUp, Calendar, User } from 'lucide-react';
 import axios from 'axios';
+import useChangeFeed from '../hooks/useChangeFeed';
 
 const stageColors = {
   prospecting: 'bg-gray-100 text-gray-800',
@@ -30,13 +31,19 @@ export default function Deals() {
   });
 
   useEffect(() => {
-    fetchDeals();
     fetchContacts();
   }, []);
 
+  useEffect(() => {
+    fetchDeals();
+  }, [filterStage]);
+
+  useChangeFeed(['deals', 'contacts'], () => fetchDeals());
+
   const fetchDeals = async () => {
     try {
-      const response = await axios.get(process.env.REACT_APP_URL+'/deals');
+      const params = filterStage === 'all' ? { include: 'contact' } : { stage: filterStage, include: 'contact' };
+      const response = await axios.get(process.env.REACT_APP_URL+'/deals', { params });
       setDeals(response.data);
     } catch (error) {
       console.error('Error fetching deals:', error);
@@ -111,12 +118,11 @@ export default function Deals() {
     }
   };
 
-  const filteredDeals = deals.filter(deal => {
-    const matchesSearch = deal.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         deal.description?.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesStage = filterStage === 'all' || deal.stage === filterStage;
-    return matchesSearch && matchesStage;
-  });
+  // Stage/status filtering happens server-side; the search box narrows the loaded page
+  const filteredDeals = deals.filter(deal =>
+    deal.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
+    deal.description?.toLowerCase().includes(searchTerm.toLowerCase())
+  );
 
   const totalValue = deals.reduce((sum, deal) => sum + (deal.value || 0), 0);
 
@@ -293,10 +299,10 @@ export default function Deals() {
                   </div>
                 )}
                 
-                {deal.contact_id && (
+                {deal.contact && (
                   <div className="flex items-center text-sm text-gray-500">
                     <User className="h-4 w-4 mr-2" />
-                    {contacts.find(c => c.id === deal.contact_id)?.first_name} {contacts.find(c => c.id === deal.contact_id)?.last_name}
+                    {deal.contact.first_name} {deal.contact.last_name}
                   </div>
                 )}
               </div>
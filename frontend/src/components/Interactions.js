@@ -12,6 +12,7 @@ import {
   X
 } from 'lucide-react';
 import axios from 'axios';
+import useChangeFeed from '../hooks/useChangeFeed';
 
 
 export default function Interactions() {
@@ -35,9 +36,11 @@ export default function Interactions() {
     fetchContacts();
   }, []);
 
+  useChangeFeed(['interactions', 'contacts'], () => fetchInteractions());
+
   const fetchInteractions = async () => {
     try {
-      const response = await axios.get(process.env.REACT_APP_URL+'/interactions');
+      const response = await axios.get(process.env.REACT_APP_URL+'/interactions', { params: { include: 'contact' } });
       setInteractions(response.data);
     } catch (error) {
       console.error('Error fetching interactions:', error);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Plus, Search, Edit, Trash2, CheckCircle, Clock, AlertCircle, Calendar } from 'lucide-react';
 import axios from 'axios';
+import useChangeFeed from '../hooks/useChangeFeed';
 
 
 const priorityColors = {
@@ -35,13 +36,19 @@ export default function Tasks() {
   });
 
   useEffect(() => {
-    fetchTasks();
     fetchContacts();
   }, []);
 
+  useEffect(() => {
+    fetchTasks();
+  }, [filterStatus]);
+
+  useChangeFeed(['tasks', 'contacts'], () => fetchTasks());
+
   const fetchTasks = async () => {
     try {
-      const response = await axios.get(process.env.REACT_APP_URL+'/tasks');
+      const params = filterStatus === 'all' ? { include: 'contact' } : { status: filterStatus, include: 'contact' };
+      const response = await axios.get(process.env.REACT_APP_URL+'/tasks', { params });
       setTasks(response.data);
     } catch (error) {
       console.error('Error fetching tasks:', error);
@@ -122,12 +129,11 @@ export default function Tasks() {
     }
   };
 
-  const filteredTasks = tasks.filter(task => {
-    const matchesSearch = task.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         task.description?.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesStatus = filterStatus === 'all' || task.status === filterStatus;
-    return matchesSearch && matchesStatus;
-  });
+  // Stage/status filtering happens server-side; the search box narrows the loaded page
+  const filteredTasks = tasks.filter(task =>
+    task.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
+    task.description?.toLowerCase().includes(searchTerm.toLowerCase())
+  );
 
   if (loading) {
     return (
@@ -220,9 +226,9 @@ export default function Tasks() {
                             {new Date(task.due_date).toLocaleDateString()}
                           </div>
                         )}
-                        {task.contact_id && (
+                        {task.contact && (
                           <div className="text-sm text-gray-500">
-                            Contact: {contacts.find(c => c.id === task.contact_id)?.first_name} {contacts.find(c => c.id === task.contact_id)?.last_name}
+                            Contact: {task.contact.first_name} {task.contact.last_name}
                           </div>
                         )}
                       </div>
@@ -0,0 +1,61 @@
+import { useEffect, useRef } from 'react';
+import axios from 'axios';
+
+// Calls onChange (debounced) whenever one of `collections` changes on the server, e.g. from
+// another tab or device, using the /events server-sent event stream instead of polling
+export default function useChangeFeed(collections, onChange) {
+  const callback = useRef(onChange);
+  callback.current = onChange;
+  const key = collections.join(',');
+
+  useEffect(() => {
+    if (!localStorage.getItem('token')) return undefined;
+
+    const watched = key.split(',');
+    let source = null;
+    let timer = null;
+    let retry = null;
+    let closed = false;
+    const refresh = () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => callback.current(), 200);
+    };
+
+    // EventSource cannot send the Authorization header, so the URL carries a short-lived token
+    // that only opens /events; the access token itself never ends up in a URL
+    const connect = async (reconnecting) => {
+      let streamToken;
+      try {
+        const response = await axios.post(process.env.REACT_APP_URL + '/events/token');
+        streamToken = response.data.stream_token;
+      } catch (error) {
+        if (!closed) retry = setTimeout(() => connect(reconnecting), 5000);
+        return;
+      }
+      if (closed) return;
+
+      source = new EventSource(`${process.env.REACT_APP_URL}/events?stream_token=${encodeURIComponent(streamToken)}`);
+      source.addEventListener('change', (message) => {
+        if (watched.includes(JSON.parse(message.data).collection)) refresh();
+      });
+      // The server dropped events this client was too slow to read
+      source.addEventListener('resync', refresh);
+      source.addEventListener('error', () => {
+        // The browser retries dropped streams itself with the same URL; once the stream token
+        // has expired that retry is refused, so fetch a new one and catch up on what was missed
+        if (source.readyState === EventSource.CLOSED && !closed) {
+          retry = setTimeout(() => connect(true), 3000);
+        }
+      });
+      if (reconnecting) refresh();
+    };
+    connect(false);
+
+    return () => {
+      closed = true;
+      clearTimeout(timer);
+      clearTimeout(retry);
+      if (source) source.close();
+    };
+  }, [key]);
+}